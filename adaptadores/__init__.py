@@ -0,0 +1,4 @@
+""" Adaptadores dos sites monitorados e o executor genérico que os monitora (ver adaptadores/base.py e adaptadores/executor.py). """
+
+from adaptadores.base import AdaptadorSite
+from adaptadores.executor import ADAPTADORES, monitorar_conta, monitorar_sites, monitorar_usina
@@ -0,0 +1,105 @@
+""" Este módulo contém a interface comum dos sites monitorados.
+
+Cada site implementa um AdaptadorSite com as etapas separadas (login, abertura da usina, prints, status dos inversores, histórico de falhas e dados mensais).
+O fluxo de controle (contexto, sessão salva, páginas, fase de prints, tratamento de erros e tempos) fica todo no executor (adaptadores/executor.py), assim um site novo só precisa implementar as etapas."""
+
+import logging
+from playwright.async_api import Page
+from config import *
+
+
+logger = logging.getLogger('Adaptadores')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'adaptadores.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+class AdaptadorSite:
+    """ Interface de um site monitorado. As etapas que não fazem sentido para um site podem ficar com a implementação padrão, que não faz nada.
+
+    Atributos:
+        site (str): o nome do site, igual à chave em config.sites.
+
+        etapas (tuple[str]): os nomes dos métodos executados para cada usina depois de abrir_usina, na ordem em que são executados. Alguns sites precisam extrair os dados mensais no meio dos prints, por isso a ordem é do adaptador.
+
+        etapas_visuais (frozenset[str]): as etapas que precisam de imagens, fontes e mídias (ver roteamento.py). abrir_usina sempre é visual.
+
+        etapas_status (tuple[str]): as etapas do modo de sondagem dos status (sondagem_status.py), sem prints e sem dados mensais.
+
+        etapas_sem_repeticao (frozenset[str]): as etapas com efeitos fora do navegador (emails, linhas dos dados mensais) que não são repetidas ao retomar uma execução (diario_execucao.py). As etapas de prints são sempre refeitas, elas deixam a página no estado esperado pelas próximas.
+
+        reutiliza_sessao (bool): se a sessão salva da conta é restaurada (sessoes.py) antes de tentar o login.
+
+        login_visual (bool): se a sondagem da sessão e o login também são feitos na fase de prints, por exemplo quando o captcha é resolvido pela imagem.
+
+        opcoes_contexto (dict): opções extras repassadas para browser.new_context.
+
+        abre_em_nova_pagina (bool): se abrir_usina abre a usina em outra aba. Define onde o link direto do índice (indice_usinas.py) é aberto, em uma página nova ou na própria página da lista.
+
+    """
+    site: str = ''
+    etapas: tuple = ('capturar', 'verificar_status', 'verificar_falhas', 'extrair_mes')
+    etapas_visuais: frozenset = frozenset({'capturar'})
+    etapas_status: tuple = ('abrir_status', 'verificar_status', 'verificar_falhas')
+    etapas_sem_repeticao: frozenset = frozenset({'verificar_status', 'verificar_falhas', 'extrair_mes'})
+    reutiliza_sessao: bool = True
+    login_visual: bool = False
+    opcoes_contexto: dict = {}
+    abre_em_nova_pagina: bool = False
+
+
+    async def login(self, pagina: Page, credenciais: dict) -> bool:
+        """ Faz o login da conta a partir de uma página em branco.
+
+        Args:
+            pagina (Page): a página inicial do contexto.
+
+            credenciais (dict): {'login': ..., 'senha': ...} da conta.
+
+        Returns:
+            bool: False caso o login falhe e o erro já tenha sido notificado. Erros não tratados devem ser lançados, o executor registra e notifica.
+
+        """
+        raise NotImplementedError
+
+
+    async def abrir_lista(self, pagina: Page):
+        """ Leva a página logada (pelo login ou pela sessão salva) até a lista de usinas e aguarda ela carregar. """
+
+
+    async def abrir_usina(self, pagina_lista: Page, usina: str) -> Page:
+        """ Abre a usina a partir da lista de usinas e retorna a página onde ela ficou aberta, que pode ser a própria página da lista. """
+        return pagina_lista
+
+
+    async def abrir_status(self, pag_usina: Page, usina: str):
+        """ Leva a usina aberta até onde os status dos inversores são lidos, sem tirar prints. Usada no lugar das etapas de prints no modo de sondagem. """
+
+
+    async def capturar(self, pag_usina: Page, usina: str):
+        """ Tira os prints da usina. """
+
+
+    async def verificar_status(self, pag_usina: Page, usina: str):
+        """ Analisa o status dos inversores da usina. """
+
+
+    async def verificar_falhas(self, pag_usina: Page, usina: str):
+        """ Analisa o histórico de falhas da usina. """
+
+
+    async def extrair_mes(self, pag_usina: Page, usina: str):
+        """ Extrai e processa os dados do mês anterior. Só é chamada no dia 1. """
+
+
+    async def fechar_usina(self, pag_usina: Page, pagina_lista: Page, usina: str):
+        """ Fecha a usina depois das etapas, deixando a página da lista pronta para a próxima usina. Também é chamada quando uma etapa falha. """
+        if pag_usina is not pagina_lista:
+            await pag_usina.close()
@@ -0,0 +1,313 @@
+""" Este módulo contém o executor genérico que monitora qualquer site a partir do seu AdaptadorSite.
+
+Para cada conta o executor abre o contexto (restaurando a sessão salva quando o site permite), faz o login, leva a página até a lista de usinas e distribui as usinas entre as páginas do contexto (distribuir_usinas_entre_paginas).
+Cada usina é uma sequência de etapas independentes: abrir a usina e as etapas do adaptador, cada uma cronometrada em RESULTADOS e executada dentro ou fora da fase de prints conforme o adaptador. O perfil de captura da usina no registro (PERFIS_CAPTURA) define as etapas que são ignoradas.
+Os alertas do site são enviados em um único resumo quando o site termina (resumo_alertas.py).
+As etapas e as usinas concluídas são registradas no diário da execução (diario_execucao.py), assim uma execução retomada pula o que já foi feito.
+
+Quando o índice das usinas (indice_usinas.py) já tem o link direto da usina ela é aberta pelo link, sem passar pela lista, desde que o nome da usina apareça na página aberta. Caso contrário ela é aberta pela lista, avançando até a página onde a descoberta a encontrou, e o link da página aberta é guardado para as próximas vezes.
+
+No modo 'status' (sondagem_status.py) apenas as etapas_status do adaptador são executadas, sem fase de prints, sem dados mensais e sem docx."""
+
+import asyncio
+from typing import Literal
+from contextlib import asynccontextmanager, nullcontext
+from functools import partial
+from time import perf_counter
+from playwright.async_api import Browser, Page
+from config import *
+from adaptadores.base import AdaptadorSite, logger
+from adaptadores.growatt import AdaptadorGrowatt
+from adaptadores.phb import AdaptadorPHB
+from adaptadores.shine import AdaptadorShine
+from adaptadores.solis import AdaptadorSolis
+from adaptadores.solplanet import AdaptadorSolplanet
+from adaptadores.sungrow import AdaptadorSungrow
+from codificacao_prints import aguardar_prints
+from coletor_rede import ativar_coletor, coletor_da_pagina
+from diario_execucao import DIARIO
+from escalonador import EscalonadorAdaptativo
+from indice_usinas import INDICE, descobrir_usinas, ir_para_pagina
+from monitoramento import distribuir_usinas_entre_paginas, enviar_email
+from prontidao import aguardar_seletor
+from registro_usinas import REGISTRO
+from resultados import RESULTADOS
+from resumo_alertas import RESUMO
+from roteamento import aplicar_politica_roteamento, fase_visual
+from sessoes import abrir_contexto_autenticado, salvar_sessao, sessao_valida
+
+
+
+ADAPTADORES: dict[str, AdaptadorSite] = {
+    adaptador.site: adaptador
+    for adaptador in (AdaptadorSolis(), AdaptadorSolplanet(), AdaptadorPHB(), AdaptadorGrowatt(), AdaptadorShine(), AdaptadorSungrow())
+}
+
+
+
+def etapas_ignoradas(site: str, usina: str) -> set:
+    """ Retorna as etapas que o perfil de captura da usina (no registro de usinas) manda ignorar. """
+    usina_registrada = REGISTRO.usina(site, usina)
+    perfil = usina_registrada.perfil_captura if usina_registrada else 'padrao'
+
+    if perfil not in PERFIS_CAPTURA:
+        logger.warning(f'Perfil de captura {perfil} da usina {site} - {usina} não existe, usando o perfil padrão')
+        perfil = 'padrao'
+
+    return set(PERFIS_CAPTURA[perfil])
+
+
+
+@asynccontextmanager
+async def _fase_visual_usina(pagina_lista: Page, pag_usina: Page):
+    # A página aberta pelo link direto não é um popup da lista, então ela também precisa ser marcada
+    async with fase_visual(pagina_lista):
+        async with fase_visual(pag_usina) if pag_usina is not pagina_lista else nullcontext():
+            yield
+
+
+
+async def _abrir_pelo_indice(adaptador: AdaptadorSite, pagina_lista: Page, usina: str, visual: bool) -> Page:
+    """ Abre a usina pelo link direto do índice, ou pela lista (na página onde ela foi descoberta) guardando o link da página aberta. """
+    site = adaptador.site
+    conta = REGISTRO.conta_da_usina(site, usina)
+    entrada = INDICE.entrada(site, conta, usina) if site in INDICE_USINAS['listas'] else None
+    url_lista = pagina_lista.url
+
+    if entrada and entrada.get('url'):
+        pag_usina = await pagina_lista.context.new_page() if adaptador.abre_em_nova_pagina else pagina_lista
+
+        try:
+            async with fase_visual(pag_usina) if visual else nullcontext():
+                await pag_usina.goto(entrada['url'])
+
+            # O link precisa abrir a própria usina, senão os prints, os status e os alertas seriam guardados em nome de outra
+            if not await aguardar_seletor(pag_usina, f'text={usina}', teto=INDICE_USINAS['teto_conferencia'], estado='attached'):
+                raise ValueError(f'o nome da usina não apareceu na página {pag_usina.url}')
+
+            return pag_usina
+
+        except Exception as e:
+            logger.warning(f'Não foi possível abrir a usina {site} - {usina} pelo link direto, abrindo pela lista: {e}')
+            INDICE.invalidar_link(site, conta, usina)
+
+            if pag_usina is not pagina_lista:
+                await pag_usina.close()
+
+            else:
+                await pagina_lista.goto(url_lista)
+
+    pagina = entrada['pagina'] if entrada else 1
+
+    async with fase_visual(pagina_lista) if visual else nullcontext():
+        if pagina > 1:
+            await ir_para_pagina(pagina_lista, site, pagina)
+
+        pag_usina = await adaptador.abrir_usina(pagina_lista, usina)
+
+    # As páginas da lista que abrem a usina em outra aba voltam para a primeira página, onde as próximas usinas são procuradas
+    if pagina > 1 and pag_usina is not pagina_lista:
+        await pagina_lista.goto(url_lista)
+
+    if site in INDICE_USINAS['listas'] and pag_usina.url not in (url_lista, 'about:blank'):
+        INDICE.registrar_link(site, conta, usina, pag_usina.url)
+
+    return pag_usina
+
+
+
+async def monitorar_usina(adaptador: AdaptadorSite, pagina_lista: Page, usina: str, modo: Literal['completo', 'status'] = 'completo'):
+    """ Abre a usina e executa as etapas do adaptador, registrando a duração de cada etapa em RESULTADOS.
+
+    Args:
+        adaptador (AdaptadorSite): o adaptador do site da usina.
+
+        pagina_lista (Page): a página já logada na lista de usinas.
+
+        usina (str): o nome da usina que será monitorada.
+
+        modo (str): 'completo' executa adaptador.etapas, 'status' executa apenas adaptador.etapas_status e nunca libera imagens, fontes e mídias.
+
+    """
+    site = adaptador.site
+    ignoradas = etapas_ignoradas(site, usina)
+    visual = modo == 'completo'
+    etapas = adaptador.etapas if visual else adaptador.etapas_status
+
+    DIARIO.restaurar_resultado(site, usina)
+
+    coletor = coletor_da_pagina(pagina_lista)
+
+    if coletor:
+        coletor.limpar(pagina_lista) # As respostas da usina anterior não podem ser confundidas com as da próxima
+
+    inicio = perf_counter()
+
+    pag_usina = await _abrir_pelo_indice(adaptador, pagina_lista, usina, visual)
+
+    RESULTADOS.registrar_duracao_etapa(site, usina, 'abrir_usina', perf_counter() - inicio)
+
+    try:
+        for etapa in etapas:
+            if etapa in ignoradas or (etapa == 'extrair_mes' and RELOGIO.data.day != 1):
+                continue
+
+            if etapa in adaptador.etapas_sem_repeticao and DIARIO.etapa_concluida(site, usina, etapa):
+                logger.info(f'Etapa {etapa} da usina {site} - {usina} já concluída nesta execução, pulando')
+                continue
+
+            inicio = perf_counter()
+            inicio_etapa = datetime.now().timestamp()
+
+            # Fora da fase de prints as imagens, fontes e mídias da usina deixam de ser carregadas
+            async with _fase_visual_usina(pagina_lista, pag_usina) if visual and etapa in adaptador.etapas_visuais else nullcontext():
+                await getattr(adaptador, etapa)(pag_usina, usina)
+
+            RESULTADOS.registrar_duracao_etapa(site, usina, etapa, perf_counter() - inicio)
+            DIARIO.registrar_etapa(site, usina, etapa, inicio_etapa)
+
+    except Exception:
+        try:
+            await adaptador.fechar_usina(pag_usina, pagina_lista, usina)
+
+        except Exception as e:
+            logger.warning(f'Não foi possível fechar a usina {site} - {usina} após a falha: {e}')
+
+        raise
+
+    await adaptador.fechar_usina(pag_usina, pagina_lista, usina)
+
+    # A usina só é dada como concluída no diário quando os prints dela já estão no disco
+    await aguardar_prints(site, usina)
+
+    DIARIO.registrar_usina(site, usina)
+
+
+
+async def _autenticar(adaptador: AdaptadorSite, pagina: Page, credenciais: dict) -> bool:
+    site = adaptador.site
+
+    if adaptador.reutiliza_sessao and await sessao_valida(pagina, site):
+        return True
+
+    try:
+        sucesso = await adaptador.login(pagina, credenciais)
+
+    except Exception as e:
+        logger.critical(f'Erro durante o login da {site}: {e}')
+        enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'login do site {site}')
+        return False
+
+    if sucesso and adaptador.reutiliza_sessao:
+        logger.info(f'Login na {site} realizado com sucesso, monitorando as usinas...')
+        await salvar_sessao(pagina.context, site, credenciais['login'])
+
+    return sucesso
+
+
+
+async def monitorar_conta(browser: Browser, adaptador: AdaptadorSite, lista_usinas: list, escalonador: EscalonadorAdaptativo, modo: Literal['completo', 'status'] = 'completo'):
+    """ Realiza o monitoramento das usinas de uma conta de um site.
+
+    Args:
+        browser (Browser): a instância do navegador que será utilizado.
+
+        adaptador (AdaptadorSite): o adaptador do site.
+
+        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas. Todas devem ser da mesma conta.
+
+        escalonador (EscalonadorAdaptativo): o escalonador que admite o site e cada uma de suas usinas.
+
+        modo (str): 'completo' ou 'status', ver monitorar_usina.
+
+    """
+    site = adaptador.site
+
+    async with escalonador:
+        logger.info(f'Iniciando monitoramento {site}...')
+        credenciais = REGISTRO.credenciais(site, lista_usinas[0])
+
+        if adaptador.reutiliza_sessao:
+            contexto = await abrir_contexto_autenticado(browser, site, credenciais['login'], viewport=VIEWPORT_PADRAO, **adaptador.opcoes_contexto)
+
+        else:
+            contexto = await browser.new_context(viewport=VIEWPORT_PADRAO, **adaptador.opcoes_contexto)
+
+        async with contexto:
+            pagina = await contexto.new_page()
+
+            ativar_coletor(contexto, site)
+            # Os sites que abrem a usina na própria lista nunca recarregam o documento do login, então as fontes dele precisam chegar desde o início
+            await aplicar_politica_roteamento(contexto, site, liberar_fontes=not adaptador.abre_em_nova_pagina)
+
+            async with fase_visual(pagina) if adaptador.login_visual else nullcontext():
+                if not await _autenticar(adaptador, pagina, credenciais):
+                    return
+
+            try:
+                await adaptador.abrir_lista(pagina)
+
+                conta = REGISTRO.conta_da_usina(site, lista_usinas[0])
+
+                if INDICE.precisa_descobrir(site, conta):
+                    paginas_usinas = await descobrir_usinas(pagina, site)
+
+                    if paginas_usinas:
+                        INDICE.registrar_descoberta(site, conta, paginas_usinas)
+
+                await distribuir_usinas_entre_paginas(pagina, lista_usinas, partial(monitorar_usina, adaptador, modo=modo), site, escalonador)
+
+            except Exception as e:
+                logger.error(f'Erro inesperado durante o monitoramento {site}: {e}')
+                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'monitoramento das usinas {site}')
+
+        logger.info(f'Monitoramento {site} concluído')
+
+
+
+async def monitorar_sites(browser: Browser, mapeamento_site_usinas: dict, escalonador: EscalonadorAdaptativo, modo: Literal['completo', 'status'] = 'completo'):
+    """ Monitora em paralelo todos os sites do mapeamento com o mesmo navegador, registrando o tempo de cada site e os prints gerados em RESULTADOS.
+
+    Args:
+        browser (Browser): o navegador usado por todos os sites.
+
+        mapeamento_site_usinas (dict): os sites como chave e a lista de usinas de cada site como valor. Pode conter apenas parte dos sites.
+
+        escalonador (EscalonadorAdaptativo): o escalonador que admite os sites e as usinas.
+
+        modo (str): 'completo' ou 'status', ver monitorar_usina. No modo 'status' os prints não são associados às usinas.
+
+    """
+    async def monitorar_site(site: str, usinas: list):
+        inicio = perf_counter()
+
+        pendentes = [usina for usina in usinas if not DIARIO.usina_concluida(site, usina)]
+
+        for usina in usinas:
+            if usina not in pendentes:
+                DIARIO.restaurar_resultado(site, usina)
+
+        if not pendentes:
+            logger.info(f'Todas as usinas {site} {usinas} já foram concluídas nesta execução')
+            RESULTADOS.registrar_capturas(site, usinas)
+            return
+
+        try:
+            await monitorar_conta(browser, ADAPTADORES[site], pendentes, escalonador, modo)
+
+        finally:
+            await aguardar_prints(site)
+
+            RESULTADOS.registrar_duracao_site(site, perf_counter() - inicio)
+
+            if modo == 'completo':
+                RESULTADOS.registrar_capturas(site, usinas)
+
+            RESUMO.enviar(site)
+
+    # Cada conta de um site é monitorada separadamente, com o seu próprio login
+    await asyncio.gather(*(
+        monitorar_site(site, usinas_conta)
+        for site, usinas in mapeamento_site_usinas.items()
+        for usinas_conta in REGISTRO.agrupar_por_conta(site, usinas).values()
+    ))
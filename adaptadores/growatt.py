@@ -0,0 +1,81 @@
+""" Adaptador do site Growatt. """
+
+from playwright.async_api import Page
+from config import *
+from adaptadores.base import AdaptadorSite
+from codificacao_prints import salvar_print
+from dados_mensais import extrair_dados_mensais_growatt, processar_dados_mensais_growatt
+from monitoramento import analisar_status_inversores_growatt
+from prontidao import aguardar_carregamento_sumir, aguardar_grafico_echarts, aguardar_seletor
+
+
+
+class AdaptadorGrowatt(AdaptadorSite):
+    site = 'Growatt'
+    # A Growatt não tem histórico de falhas analisado
+    etapas = ('capturar', 'verificar_status', 'extrair_mes')
+    abre_em_nova_pagina = True
+
+
+    async def login(self, pagina: Page, credenciais: dict) -> bool:
+        await pagina.goto(sites['Growatt']['url'])
+
+        print(f'Página inicial Growatt aberta')
+
+        await pagina.get_by_placeholder('Usuário').fill(credenciais['login'])
+        await pagina.get_by_placeholder('Senha').fill(credenciais['senha'])
+        await pagina.get_by_role('button', name='Entrar').click()
+
+        await pagina.locator('tbody#tbl_data_plant').wait_for(state='visible')
+
+        return True
+
+
+    async def abrir_lista(self, pagina: Page):
+        await pagina.locator('tbody#tbl_data_plant').wait_for(state='visible')
+
+
+    async def abrir_usina(self, pagina_lista: Page, usina: str) -> Page:
+        async with pagina_lista.expect_popup() as nova_pag:
+            await pagina_lista.locator('tbody#tbl_data_plant td.plantName').filter(has_text=usina).click(click_count=2, delay=120)
+
+        return await nova_pag.value
+
+
+    async def abrir_status(self, pag_usina: Page, usina: str):
+        await pag_usina.wait_for_load_state('domcontentloaded')
+
+        await aguardar_carregamento_sumir(pag_usina, 'Growatt')
+        await aguardar_seletor(pag_usina, 'tbody#inverterRefreshData > tr', teto=SINAIS_PRONTIDAO['Growatt']['teto'])
+
+
+    async def capturar(self, pag_usina: Page, usina: str):
+        await self.abrir_status(pag_usina, usina)
+        await aguardar_grafico_echarts(pag_usina.locator('canvas').first, teto=2)
+
+        area_limite = await pag_usina.locator('span').filter(has_text='Device List').bounding_box()
+        limite_altura = area_limite['y'] - 20 # <- reduzindo 20px para não pegar a borda desse locator
+
+        await salvar_print(
+            pag_usina,
+            Path(CAMINHO_PASTA_PRINTS, 'Growatt', f'{usina} - visão geral.png'),
+            self.site, usina,
+            clip={'x': 0, 'y': 0, 'width': 1920, 'height': limite_altura}
+        )
+
+        inversores = pag_usina.locator('tbody#inverterRefreshData')
+        await salvar_print(
+            inversores,
+            Path(CAMINHO_PASTA_PRINTS, 'Growatt', f'{usina} - inversores.png'),
+            self.site, usina,
+            aguardar=True # o print é anexado ao email de inversores offline logo em seguida
+        )
+
+
+    async def verificar_status(self, pag_usina: Page, usina: str):
+        await analisar_status_inversores_growatt(pag_usina, usina)
+
+
+    async def extrair_mes(self, pag_usina: Page, usina: str):
+        await extrair_dados_mensais_growatt(pag_usina, usina)
+        processar_dados_mensais_growatt(usina)
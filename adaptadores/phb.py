@@ -0,0 +1,119 @@
+""" Adaptador do site Solar Portal (PHB).
+
+Na PHB cada usina tem um login próprio, então abrir a usina é fazer o login com as credenciais dela e fechar a usina é sair da conta. """
+
+from playwright.async_api import Page, expect
+from config import *
+from adaptadores.base import AdaptadorSite, logger
+from codificacao_prints import aguardar_prints, salvar_print
+from dados_mensais import extrair_dados_mensais_phb, processar_dados_mensais_phb
+from monitoramento import analisar_status_inversores_phb
+from prontidao import aguardar_animacoes, aguardar_carregamento_sumir, aguardar_grafico_echarts, aguardar_slide_mudar, slide_ativo
+from registro_usinas import REGISTRO
+
+
+
+class AdaptadorPHB(AdaptadorSite):
+    site = 'PHB'
+    # A PHB não tem histórico de falhas analisado
+    etapas = ('capturar', 'verificar_status', 'extrair_mes')
+    reutiliza_sessao = False
+
+
+    async def login(self, pagina: Page, credenciais: dict) -> bool:
+        await pagina.goto(sites['PHB']['url'])
+
+        print(f'Página inicial PHB aberta')
+
+        return True
+
+
+    async def abrir_usina(self, pagina_lista: Page, usina: str) -> Page:
+        credenciais = REGISTRO.credenciais('PHB', usina)
+
+        try:
+            await pagina_lista.get_by_role("textbox", name="Endereço de e-mail").fill(credenciais['login'], timeout=5000)
+            await pagina_lista.get_by_role('textbox', name='Por favor, digite sua senha').fill(credenciais['senha'], timeout=5000)
+
+            await pagina_lista.locator('input#readStatement').check()
+
+            await pagina_lista.get_by_role('button', name='Login').click()
+
+        except Exception:
+            # Em caso de não haver correspondencia dos locators devido a linguagem, o código tenta executar com os nomes em ingles
+            await pagina_lista.get_by_role("textbox", name="Email Address").fill(credenciais['login'], timeout=5000)
+            await pagina_lista.get_by_role('textbox', name='Please enter your password').fill(credenciais['senha'], timeout=5000)
+
+            await pagina_lista.locator('input#readStatement').check()
+            await pagina_lista.get_by_role('button', name='Log In').click()
+
+        logger.info(f'Login na PHB da usina {usina} realizado com sucesso')
+
+        return pagina_lista
+
+
+    async def abrir_status(self, pag_usina: Page, usina: str):
+        await pag_usina.wait_for_load_state('networkidle')
+
+        await aguardar_carregamento_sumir(pag_usina, 'PHB')
+        await pag_usina.locator('div.device-status').first.wait_for(state='attached', timeout=15000)
+
+
+    async def capturar(self, pag_usina: Page, usina: str):
+        await pag_usina.wait_for_load_state('networkidle')
+
+        grafico = pag_usina.locator('canvas').last
+        await grafico.wait_for(state='visible', timeout=15000)
+
+        await aguardar_carregamento_sumir(pag_usina, 'PHB')
+        await aguardar_grafico_echarts(grafico, teto=2) # Aguardando o gráfico de geração acabar as animações
+
+        div_inversores = pag_usina.locator('div.row.foot-row')
+        area_inversores = await div_inversores.bounding_box()
+
+        await salvar_print(
+            pag_usina,
+            Path(CAMINHO_PASTA_PRINTS, 'PHB', f'{usina} - visão geral.png'),
+            self.site, usina,
+            clip={'x': 0,'y': 0,'width': 1920,'height': area_inversores['y']}
+        )
+
+        await div_inversores.wait_for(state='attached')
+
+        carrossel = pag_usina.locator('div#data_carousel')
+        await aguardar_animacoes(carrossel, teto=0.8)
+
+        for n in range(1, 5):
+            await salvar_print(
+                div_inversores,
+                Path(CAMINHO_PASTA_PRINTS, 'PHB', f'{usina} - inversor {n}.png'),
+                self.site, usina
+            )
+
+            await div_inversores.hover()
+
+            slide_anterior = await slide_ativo(carrossel)
+            await pag_usina.locator('div#data_carousel i.el-icon-arrow-right').click(force=True)
+
+            # Logo após o clique a transição pode ainda não ter começado, então primeiro é aguardada a troca do slide ativo
+            await aguardar_slide_mudar(carrossel, slide_anterior, teto=2)
+
+
+    async def verificar_status(self, pag_usina: Page, usina: str):
+        # Os prints dos inversores são anexados ao email de inversores offline, então precisam estar gravados antes da análise
+        await aguardar_prints(self.site, usina)
+        await analisar_status_inversores_phb(pag_usina, usina)
+
+
+    async def extrair_mes(self, pag_usina: Page, usina: str):
+        dados = await extrair_dados_mensais_phb(pag_usina, usina)
+        processar_dados_mensais_phb(dados, usina)
+
+
+    async def fechar_usina(self, pag_usina: Page, pagina_lista: Page, usina: str):
+        await pagina_lista.get_by_role('link', name='Sair').click()
+
+        botao_confirmar = pagina_lista.get_by_role('button', name='Cofirmar')
+
+        await expect(botao_confirmar).to_be_visible()
+        await botao_confirmar.click()
@@ -0,0 +1,82 @@
+""" Adaptador do site ShineMonitor.
+
+Na Shine a conta tem uma única usina, cujo painel já é aberto no login, então a sondagem da sessão e o login também fazem parte da fase de prints. """
+
+from playwright.async_api import Page
+from config import *
+from adaptadores.base import AdaptadorSite
+from codificacao_prints import salvar_print
+from dados_mensais import extrair_dados_mensais_shine, processar_dados_mensais_shine
+from monitoramento import analisar_historico_de_falhas_shine, analisar_status_inversores_shine
+from prontidao import aguardar_carregamento_sumir, aguardar_grafico_echarts
+
+
+
+class AdaptadorShine(AdaptadorSite):
+    site = 'Shine'
+    etapas = ('capturar', 'verificar_status', 'extrair_mes', 'verificar_falhas')
+    login_visual = True
+    opcoes_contexto = {'ignore_https_errors': True}
+
+
+    def __init__(self):
+        self._geracao_total = {} # lida no painel durante os prints e usada nos dados mensais
+
+
+    async def login(self, pagina: Page, credenciais: dict) -> bool:
+        await pagina.goto(sites['Shine']['url'])
+
+        print(f'Página inicial Shine aberta!')
+
+        await pagina.get_by_placeholder('Digite o nome do usuário').fill(credenciais['login'])
+        await pagina.get_by_placeholder('Por favor, digite sua senha').fill(credenciais['senha'])
+        await pagina.locator('div#loginbtn').filter(has_text='Login').click()
+
+        await pagina.wait_for_load_state('networkidle')
+
+        return True
+
+
+    async def abrir_status(self, pag_usina: Page, usina: str):
+        await pag_usina.locator('strong#stats03').wait_for(state='visible')
+        await aguardar_carregamento_sumir(pag_usina, 'Shine')
+
+
+    async def capturar(self, pag_usina: Page, usina: str):
+        await self.abrir_status(pag_usina, usina)
+
+        await salvar_print(
+            pag_usina,
+            Path(CAMINHO_PASTA_PRINTS, 'Shine', f'{usina} - visão geral.png'),
+            self.site, usina,
+            full_page=True
+        )
+
+        self._geracao_total[usina] = await pag_usina.locator('strong#stats03').text_content()
+
+        await pag_usina.get_by_text('Visão Geral da Geração de Energia').click()
+        await pag_usina.get_by_role('link', name='Energia Mês').click()
+
+        grafico = pag_usina.locator('div#MonthContainer')
+
+        await aguardar_grafico_echarts(grafico, teto=2)
+
+        await salvar_print(
+            grafico,
+            Path(CAMINHO_PASTA_PRINTS, 'Shine', f'{usina} - inversores.png'),
+            self.site, usina,
+            aguardar=True # o print é anexado ao email de inversores offline logo em seguida
+        )
+
+
+    async def verificar_status(self, pag_usina: Page, usina: str):
+        await analisar_status_inversores_shine(pag_usina, usina)
+
+
+    async def extrair_mes(self, pag_usina: Page, usina: str):
+        dados = await extrair_dados_mensais_shine(pag_usina, usina)
+        processar_dados_mensais_shine(dados, usina, self._geracao_total.pop(usina, None))
+
+
+    async def verificar_falhas(self, pag_usina: Page, usina: str):
+        await analisar_historico_de_falhas_shine(pag_usina, usina)
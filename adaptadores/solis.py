@@ -0,0 +1,92 @@
+""" Adaptador do site SolisCloud. """
+
+from playwright.async_api import Page
+from config import *
+from adaptadores.base import AdaptadorSite
+from codificacao_prints import salvar_print
+from dados_mensais import extrair_dados_mensais_solis, processar_dados_mensais_solis
+from monitoramento import analisar_historico_de_falhas_solis, analisar_status_inversores_solis
+from prontidao import aguardando_respostas, aguardar_carregamento_sumir, aguardar_seletor
+
+
+
+class AdaptadorSolis(AdaptadorSite):
+    site = 'Solis'
+    # Os dados mensais são extraídos na visão geral, antes de a aba da usina ir para a lista de dispositivos
+    etapas = ('capturar', 'extrair_mes', 'capturar_inversores', 'verificar_status', 'verificar_falhas')
+    etapas_visuais = frozenset({'capturar', 'capturar_inversores'})
+    abre_em_nova_pagina = True
+
+
+    async def login(self, pagina: Page, credenciais: dict) -> bool:
+        await pagina.goto(sites['Solis']['url'])
+
+        print(f'Página inicial Solis aberta')
+
+        await pagina.get_by_role('textbox', name='Username/Email').fill(credenciais['login'])
+        await pagina.get_by_role('textbox', name='Palavra-passe').fill(credenciais['senha'])
+
+        await pagina.locator('label.el-checkbox.el-checkbox--default.el-tooltip__trigger').click()
+
+        await pagina.get_by_role('button', name="Login").click()
+
+        await pagina.wait_for_load_state('domcontentloaded')
+        await pagina.locator('div.station-name').first.wait_for(state='visible')
+
+        return True
+
+
+    async def abrir_lista(self, pagina: Page):
+        await pagina.locator('div.station-name').first.wait_for(state='visible')
+
+
+    async def abrir_usina(self, pagina_lista: Page, usina: str) -> Page:
+        async with pagina_lista.expect_popup() as nova_pag:
+            await pagina_lista.locator('div.station-name', has_text=usina).first.click()
+
+        return await nova_pag.value
+
+
+    async def capturar(self, pag_usina: Page, usina: str):
+        await pag_usina.wait_for_load_state('networkidle')
+
+        await salvar_print(
+            pag_usina,
+            Path(CAMINHO_PASTA_PRINTS, 'Solis', f'{usina} - visão geral.png'),
+            self.site, usina,
+            full_page=True
+        )
+
+
+    async def extrair_mes(self, pag_usina: Page, usina: str):
+        dados_extraidos = await extrair_dados_mensais_solis(pag_usina, usina)
+        processar_dados_mensais_solis(dados_extraidos, usina)
+
+
+    async def abrir_status(self, pag_usina: Page, usina: str):
+        async with aguardando_respostas(pag_usina, 'Solis', 'inversores'):
+            await pag_usina.locator('a').filter(has_text='Dispositivo').click()
+
+        await pag_usina.locator('div#equipment.equipment').wait_for(state='visible')
+
+        await aguardar_carregamento_sumir(pag_usina, 'Solis')
+        await aguardar_seletor(pag_usina, 'div#equipment.equipment tbody > tr', teto=SINAIS_PRONTIDAO['Solis']['teto'])
+
+
+    async def capturar_inversores(self, pag_usina: Page, usina: str):
+        await self.abrir_status(pag_usina, usina)
+
+        await salvar_print(
+            pag_usina.locator('div#equipment.equipment'),
+            Path(CAMINHO_PASTA_PRINTS, 'Solis', f'{usina} - inversores.png'),
+            self.site, usina,
+            aguardar=True # o print é anexado ao email de inversores offline logo em seguida
+        )
+
+
+    async def verificar_status(self, pag_usina: Page, usina: str):
+        await analisar_status_inversores_solis(pag_usina, usina)
+
+
+    async def verificar_falhas(self, pag_usina: Page, usina: str):
+        await analisar_historico_de_falhas_solis(pag_usina, usina)
@@ -0,0 +1,100 @@
+""" Adaptador do site Solplanet. """
+
+from playwright.async_api import Page
+from config import *
+from adaptadores.base import AdaptadorSite, logger
+from codificacao_prints import salvar_print
+from monitoramento import analisar_historico_falhas_solplanet, analisar_status_inversores_solplanet, enviar_email, gerenciar_tentativas_captcha_solplanet
+from prontidao import aguardar_carregamento_sumir, aguardar_grafico_echarts, aguardar_seletor
+
+
+
+class AdaptadorSolplanet(AdaptadorSite):
+    site = 'Solplanet'
+    # Os dados mensais da Solplanet ainda não são extraídos (ver dados_mensais.py)
+    etapas = ('capturar', 'verificar_status', 'verificar_falhas')
+    # O captcha é resolvido pela imagem, então o login inteiro carrega as imagens normalmente
+    login_visual = True
+    abre_em_nova_pagina = True
+
+
+    async def login(self, pagina: Page, credenciais: dict) -> bool:
+        await pagina.goto(sites['Solplanet']['url'])
+
+        print(f'Página inicial Solplanet aberta')
+
+        try:
+            await pagina.get_by_placeholder('Please enter your email address or phone number').fill(credenciais['login'])
+            await pagina.get_by_placeholder('Please enter your password').fill(credenciais['senha'])
+
+            await pagina.get_by_role('checkbox').check()
+
+            await pagina.get_by_role('button', name="login").click()
+
+        except Exception as e:
+            logger.critical(f'Erro durante o login da SolPlanet: {e}')
+            enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='login do site Solplanet')
+
+        else:
+            logger.info('Login realizado, resolvendo o recaptcha...')
+
+        # o erro já é registrado dentro da função que gerencia as tentativas por isso não é preciso registrar de novo
+        return await gerenciar_tentativas_captcha_solplanet(pagina)
+
+
+    async def abrir_usina(self, pagina_lista: Page, usina: str) -> Page:
+        async with pagina_lista.expect_popup() as nova_pag:
+            await pagina_lista.get_by_text(usina).click()
+
+        return await nova_pag.value
+
+
+    async def abrir_status(self, pag_usina: Page, usina: str):
+        await aguardar_carregamento_sumir(pag_usina, 'Solplanet')
+        await aguardar_seletor(pag_usina, '#rc-tabs-1-panel-item-1 div.ant-collapse', teto=SINAIS_PRONTIDAO['Solplanet']['teto'])
+
+
+    async def capturar(self, pag_usina: Page, usina: str):
+        imagem = pag_usina.get_by_role('img', name='avatar').last
+        await imagem.wait_for(state='visible')
+
+        grafico = pag_usina.locator('div#rc-tabs-0-panel-power')
+
+        await aguardar_carregamento_sumir(pag_usina, 'Solplanet')
+        await aguardar_grafico_echarts(grafico.locator('canvas').first, teto=8.5)
+        await aguardar_seletor(pag_usina, '#rc-tabs-1-panel-item-1 div.ant-collapse', teto=SINAIS_PRONTIDAO['Solplanet']['teto'])
+
+        limitador = pag_usina.locator('div.ant-card-head-title').filter(has_text='Energy flow diagram')
+
+        area_limite = await limitador.bounding_box()
+        limite_altura = area_limite['y'] - 20 # <- reduzindo 20px para não pegar a borda desse locator
+
+        await salvar_print(
+            pag_usina,
+            Path(CAMINHO_PASTA_PRINTS, 'Solplanet', f'{usina} - visão geral.png'),
+            self.site, usina,
+            clip={'x': 0, 'y': 0, 'width': 1920, 'height': limite_altura}
+        )
+
+        await salvar_print(
+            grafico,
+            Path(CAMINHO_PASTA_PRINTS, 'Solplanet', f'{usina} - gráfico.png'),
+            self.site, usina
+        )
+
+        area_inversores = pag_usina.locator('#rc-tabs-1-panel-item-1')
+
+        await salvar_print(
+            area_inversores,
+            Path(CAMINHO_PASTA_PRINTS, 'Solplanet', f'{usina} - inversores.png'),
+            self.site, usina,
+            aguardar=True # o print é anexado ao email de inversores offline logo em seguida
+        )
+
+
+    async def verificar_status(self, pag_usina: Page, usina: str):
+        await analisar_status_inversores_solplanet(pag_usina, usina)
+
+
+    async def verificar_falhas(self, pag_usina: Page, usina: str):
+        await analisar_historico_falhas_solplanet(pag_usina, usina)
@@ -0,0 +1,103 @@
+""" Adaptador do site ISolarCloud (Sungrow).
+
+No site Sungrow a usina é aberta na mesma página da lista de usinas, por isso ao fechar a usina a página volta para a lista de estações de energia. """
+
+from playwright.async_api import Page
+from config import *
+from adaptadores.base import AdaptadorSite
+from codificacao_prints import salvar_print
+from dados_mensais import extrair_dados_mensais_sungrow, processar_dados_mensais_sungrow
+from monitoramento import analisar_historico_de_falhas_sungrow, analisar_status_inversores_sungrow
+from prontidao import aguardando_respostas, aguardar_carregamento_sumir, aguardar_grafico_echarts
+
+
+
+class AdaptadorSungrow(AdaptadorSite):
+    site = 'Sungrow'
+    # Os dados mensais são extraídos nos indicadores da visão geral, antes de abrir os dispositivos
+    etapas = ('capturar', 'extrair_mes', 'capturar_inversores', 'verificar_status', 'verificar_falhas')
+    etapas_visuais = frozenset({'capturar', 'capturar_inversores'})
+
+
+    async def login(self, pagina: Page, credenciais: dict) -> bool:
+        await pagina.goto(sites['Sungrow']['url'])
+
+        print(f'Página inicial Sungrow aberta')
+
+        await pagina.get_by_placeholder('Conta').fill(credenciais['login'])
+        await pagina.get_by_placeholder('Senha').fill(credenciais['senha'])
+        await pagina.get_by_role('button').filter(has_text='Entrar').click()
+
+        await pagina.locator('div.menu-item').first.wait_for(state='visible')
+
+        return True
+
+
+    async def abrir_lista(self, pagina: Page):
+        await pagina.locator('div.menu-item').filter(has_text='Estação de energia').click()
+
+        await pagina.locator('div.plant-name').first.wait_for(state='visible')
+
+
+    async def abrir_usina(self, pagina_lista: Page, usina: str) -> Page:
+        await pagina_lista.wait_for_load_state('domcontentloaded')
+        await pagina_lista.locator('div.plant-name').filter(has_text=usina).click()
+
+        return pagina_lista
+
+
+    async def capturar(self, pag_usina: Page, usina: str):
+        canvas = pag_usina.locator('canvas')
+
+        await aguardar_carregamento_sumir(pag_usina, 'Sungrow')
+        await aguardar_grafico_echarts(canvas, teto=6.5)
+
+        await salvar_print(
+            pag_usina,
+            Path(CAMINHO_PASTA_PRINTS, 'Sungrow', f'{usina} - visão geral.png'),
+            self.site, usina,
+            full_page=False
+        )
+
+        await salvar_print(
+            canvas,
+            Path(CAMINHO_PASTA_PRINTS, 'Sungrow', f'{usina} - gráfico.png'),
+            self.site, usina
+        )
+
+
+    async def extrair_mes(self, pag_usina: Page, usina: str):
+        dados_do_mes = await extrair_dados_mensais_sungrow(pag_usina, usina)
+        processar_dados_mensais_sungrow(dados_do_mes, usina)
+
+
+    async def abrir_status(self, pag_usina: Page, usina: str):
+        async with aguardando_respostas(pag_usina, 'Sungrow', 'inversores'):
+            await pag_usina.locator('span.menu-item-text').filter(has_text='Dispositivos').click()
+
+        await pag_usina.locator('div.card-container').wait_for(state='visible')
+
+        await aguardar_carregamento_sumir(pag_usina, 'Sungrow')
+
+
+    async def capturar_inversores(self, pag_usina: Page, usina: str):
+        await self.abrir_status(pag_usina, usina)
+
+        await salvar_print(
+            pag_usina.locator('div.card-container'),
+            Path(CAMINHO_PASTA_PRINTS, 'Sungrow', f'{usina} - inversores.png'),
+            self.site, usina,
+            aguardar=True # o print é anexado ao email de inversores offline logo em seguida
+        )
+
+
+    async def verificar_status(self, pag_usina: Page, usina: str):
+        await analisar_status_inversores_sungrow(pag_usina, usina)
+
+
+    async def verificar_falhas(self, pag_usina: Page, usina: str):
+        await analisar_historico_de_falhas_sungrow(pag_usina, usina)
+
+
+    async def fechar_usina(self, pag_usina: Page, pagina_lista: Page, usina: str):
+        await pagina_lista.get_by_text('Estação de energia').nth(1).click()
@@ -0,0 +1,233 @@
+""" Este módulo prepara os prints anexados aos emails de aviso, que saem da captura como PNGs em resolução cheia.
+
+Cada print tem as bordas de cor uniforme recortadas (sobrando só a área com conteúdo), é reduzido para no máximo ANEXOS_EMAIL['largura_maxima'] pixels de largura e recodificado em JPEG ou WebP.
+Caso os anexos de uma mensagem passem de ANEXOS_EMAIL['orcamento_bytes'] a qualidade é reduzida até ANEXOS_EMAIL['qualidade_minima']. Se ainda assim não couberem, os prints são juntados em uma única folha de contato, que é reduzida até caber.
+As imagens recodificadas ficam em ANEXOS_EMAIL['pasta'], identificadas pelo print de origem e pelos parâmetros, e são apagadas depois de ANEXOS_EMAIL['manter_dias'] dias."""
+
+import hashlib
+import logging
+import math
+from typing import Optional, Union
+from PIL import Image, ImageChops
+from config import *
+
+
+logger = logging.getLogger('Anexos dos emails')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'anexos_email.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+EXTENSOES = {'JPEG': 'jpg', 'WEBP': 'webp', 'PNG': 'png'}
+
+LARGURA_MINIMA = 320
+
+
+
+def _chave(caminhos: list[Path], *parametros) -> str:
+    """ Identifica a imagem gerada pelos prints de origem (caminho, tamanho e data de modificação) e pelos parâmetros, assim um print refeito gera uma imagem nova. """
+    partes = []
+
+    for caminho in caminhos:
+        estado = caminho.stat()
+        partes.append(f'{caminho.resolve()}|{estado.st_size}|{estado.st_mtime_ns}')
+
+    partes.extend(str(parametro) for parametro in parametros)
+
+    return hashlib.sha1('|'.join(partes).encode()).hexdigest()[:16]
+
+
+
+def recortar_bordas(imagem: Image.Image, tolerancia: int = 20) -> Image.Image:
+    """ Recorta as bordas com a mesma cor do canto superior esquerdo (fundo branco das páginas, margens dos gráficos), mantendo só a área com conteúdo. """
+    fundo = Image.new(imagem.mode, imagem.size, imagem.getpixel((0, 0)))
+    diferenca = ImageChops.difference(imagem, fundo)
+
+    # Ignora as pequenas variações de cor da compressão e do antialiasing
+    diferenca = ImageChops.add(diferenca, diferenca, 2.0, -tolerancia)
+    area = diferenca.getbbox()
+
+    return imagem.crop(area) if area else imagem
+
+
+
+def recodificar_imagem(caminho: Path, tamanho_maximo: tuple[int, int], qualidade: int, formato: str = ANEXOS_EMAIL['formato']) -> Optional[Path]:
+    """ Recorta, reduz e recodifica o print, reaproveitando a imagem de uma chamada anterior com os mesmos parâmetros.
+
+    Args:
+        caminho (Path): o print original.
+
+        tamanho_maximo (tuple[int, int]): a largura e a altura máximas, a proporção do print é mantida.
+
+        qualidade (int): a qualidade do JPEG ou do WebP, de 1 a 100.
+
+        formato (str): 'JPEG', 'WEBP' ou 'PNG'.
+
+    Returns:
+        Path: o caminho da imagem recodificada, ou None caso o print não exista ou não possa ser lido.
+
+    """
+    try:
+        destino = Path(ANEXOS_EMAIL['pasta'], f'{_chave([caminho], tamanho_maximo, qualidade, formato)}.{EXTENSOES[formato]}')
+
+        if destino.exists():
+            return destino
+
+        destino.parent.mkdir(parents=True, exist_ok=True)
+
+        with Image.open(caminho) as original:
+            imagem = original.convert('RGB')
+
+        if ANEXOS_EMAIL['recortar_bordas']:
+            imagem = recortar_bordas(imagem)
+
+        imagem.thumbnail(tamanho_maximo, Image.LANCZOS)
+        imagem.save(destino, formato, quality=qualidade, optimize=True, method=6)
+
+    except OSError as e:
+        logger.warning(f'Não foi possível recodificar o print {caminho}: {e}')
+        return None
+
+    return destino
+
+
+
+def montar_folha_contato(caminhos: list[Path]) -> Path:
+    """ Junta os prints em uma grade (PNG), cada um reduzido para caber em uma célula da largura máxima dos anexos. """
+    destino = Path(ANEXOS_EMAIL['pasta'], f'folha {_chave(caminhos, ANEXOS_EMAIL["largura_maxima"])}.png')
+
+    if destino.exists():
+        return destino
+
+    colunas = math.ceil(math.sqrt(len(caminhos)))
+    largura_celula = ANEXOS_EMAIL['largura_maxima'] // colunas
+    margem = 8
+
+    imagens = []
+
+    for caminho in caminhos:
+        with Image.open(caminho) as original:
+            imagem = original.convert('RGB')
+
+        if ANEXOS_EMAIL['recortar_bordas']:
+            imagem = recortar_bordas(imagem)
+
+        imagem.thumbnail((largura_celula - margem, ANEXOS_EMAIL['altura_maxima']), Image.LANCZOS)
+        imagens.append(imagem)
+
+    linhas = [imagens[inicio:inicio + colunas] for inicio in range(0, len(imagens), colunas)]
+    alturas = [max(imagem.height for imagem in linha) + margem for linha in linhas]
+
+    folha = Image.new('RGB', (largura_celula * colunas, sum(alturas)), 'white')
+    y = 0
+
+    for linha, altura in zip(linhas, alturas):
+        for coluna, imagem in enumerate(linha):
+            folha.paste(imagem, (coluna * largura_celula + margem // 2, y + margem // 2))
+
+        y += altura
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    folha.save(destino, 'PNG')
+
+    return destino
+
+
+
+def _ajustar_ao_orcamento(caminhos: list[Path], orcamento: int, reduzir_largura: bool) -> tuple[list[Path], bool]:
+    """ Recodifica os prints reduzindo a qualidade (e, se permitido, a largura) até a soma caber no orçamento. Retorna as imagens da última tentativa e se elas couberam. """
+    largura = ANEXOS_EMAIL['largura_maxima']
+
+    while True:
+        for qualidade in range(ANEXOS_EMAIL['qualidade'], ANEXOS_EMAIL['qualidade_minima'] - 1, -10):
+            recodificados = []
+
+            for caminho in caminhos:
+                imagem = recodificar_imagem(caminho, (largura, ANEXOS_EMAIL['altura_maxima']), qualidade)
+
+                # Prints com poucas cores podem ficar maiores em JPEG do que no PNG original
+                if imagem and imagem.stat().st_size < caminho.stat().st_size:
+                    recodificados.append(imagem)
+
+                else:
+                    recodificados.append(caminho)
+
+            if sum(imagem.stat().st_size for imagem in recodificados) <= orcamento:
+                return recodificados, True
+
+        if not reduzir_largura or largura <= LARGURA_MINIMA:
+            return recodificados, False
+
+        largura = max(LARGURA_MINIMA, int(largura * 0.75))
+
+
+
+def preparar_anexos(anexos: Union[Path, str, list, None], orcamento: int = ANEXOS_EMAIL['orcamento_bytes']) -> list[Path]:
+    """ Prepara os prints de uma mensagem para caberem no orçamento de bytes.
+
+    Args:
+        anexos (Path | list): os prints originais. Os que não existem são ignorados.
+
+        orcamento (int): o tamanho máximo da soma dos anexos em bytes.
+
+    Returns:
+        list[Path]: as imagens que devem ser anexadas no lugar dos prints, uma por print ou uma única folha de contato.
+
+    """
+    if anexos is None:
+        return []
+
+    if not isinstance(anexos, list):
+        anexos = [anexos]
+
+    caminhos = []
+
+    for anexo in map(Path, anexos):
+        if anexo.exists():
+            caminhos.append(anexo)
+
+        else:
+            logger.warning(f'Print {anexo} não encontrado, o email seguirá sem ele')
+
+    if not caminhos:
+        return []
+
+    tamanho_original = sum(caminho.stat().st_size for caminho in caminhos)
+
+    recodificados, cabem = _ajustar_ao_orcamento(caminhos, orcamento, reduzir_largura=len(caminhos) == 1)
+
+    if not cabem and len(caminhos) > 1:
+        try:
+            recodificados, cabem = _ajustar_ao_orcamento([montar_folha_contato(caminhos)], orcamento, reduzir_largura=True)
+
+        except OSError as e:
+            logger.warning(f'Não foi possível montar a folha de contato dos prints {caminhos}: {e}')
+
+    tamanho_final = sum(imagem.stat().st_size for imagem in recodificados)
+
+    if not cabem:
+        logger.warning(f'Os anexos ficaram com {tamanho_final / 1024:.0f} KB, acima do orçamento de {orcamento / 1024:.0f} KB')
+
+    logger.info(f'{len(caminhos)} prints ({tamanho_original / 1024:.0f} KB) preparados como {len(recodificados)} anexos ({tamanho_final / 1024:.0f} KB)')
+
+    return recodificados
+
+
+
+def limpar_anexos_antigos():
+    """ Apaga as imagens recodificadas com mais de ANEXOS_EMAIL['manter_dias'] dias. """
+    limite = datetime.now().timestamp() - ANEXOS_EMAIL['manter_dias'] * 24 * 60 * 60
+
+    try:
+        for arquivo in Path(ANEXOS_EMAIL['pasta']).glob('*'):
+            if arquivo.stat().st_mtime < limite:
+                arquivo.unlink()
+
+    except OSError as e:
+        logger.warning(f'Não foi possível limpar os anexos antigos: {e}')
@@ -0,0 +1,149 @@
+""" Este módulo contém o armazém dos prints endereçado pelo conteúdo, que guarda uma única vez os prints idênticos.
+
+Cada print é guardado em ARMAZEM_PRINTS['pasta'] com o hash dos pixels como nome, e o arquivo de sempre ({usina} - visão geral.png etc.) passa a ser um hard link para ele.
+Os prints de uma usina estável ou da noite costumam ser idênticos de um dia para o outro, então eles ocupam o espaço de um só, e a recodificação do print é pulada quando o conteúdo já está no armazém.
+Como os nomes continuam sendo arquivos comuns, organizar_screenshots, os docx, os emails e os resultados leem os prints sem saber do armazém.
+
+A contagem de referências de cada conteúdo é a contagem de links do próprio sistema de arquivos: um conteúdo sem nenhum nome apontando para ele fica com um único link e é apagado por coletar_lixo.
+Caso o sistema de arquivos não aceite hard links o nome recebe uma cópia do conteúdo, que funciona igual mas sem a economia de espaço."""
+
+import hashlib
+import logging
+import os
+import shutil
+from typing import Callable
+from config import *
+
+
+logger = logging.getLogger('Armazém de prints')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'armazem_prints.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+def chave_do_conteudo(modo: str, tamanho: tuple[int, int], pixels: bytes) -> str:
+    """ O hash dos pixels decodificados, assim dois prints iguais têm a mesma chave mesmo que o PNG do navegador tenha sido gerado de outra forma. """
+    return hashlib.sha256(f'{modo}|{tamanho[0]}x{tamanho[1]}|'.encode() + pixels).hexdigest()
+
+
+
+def caminho_conteudo(chave: str) -> Path:
+    return Path(ARMAZEM_PRINTS['pasta'], chave[:2], f'{chave}.png')
+
+
+
+def _vincular(origem: Path, destino: Path):
+    """ Faz destino ser um hard link para o mesmo conteúdo de origem, substituindo o destino anterior de forma atômica. """
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f'{destino.name}.{os.getpid()}.tmp')
+
+    try:
+        os.link(origem, temporario)
+
+    except OSError:
+        # Sistema de arquivos sem hard links (ou o armazém em outro disco): o nome recebe uma cópia
+        shutil.copyfile(origem, temporario)
+
+    # Substituir o nome antigo já desfaz o link dele com o conteúdo anterior
+    os.replace(temporario, destino)
+
+
+
+def fixar_print(caminho: Path, destino: Path):
+    """ Cria mais um nome para o conteúdo atual do print, que continua apontando para ele depois que o print for refeito.
+
+    Usada pelos manifestos dos docx mensais (ver organizacao_prints.py) para guardar os prints de cada dia sem copiá-los: enquanto o nome existir o conteúdo conta como referenciado e não é apagado por coletar_lixo.
+
+    Args:
+        caminho (Path): o print atual, como Prints/Solis/Usina 1 - visão geral.png.
+
+        destino (Path): o novo nome.
+
+    """
+    _vincular(caminho, destino)
+
+
+
+def gravar_referencia(destino: Path, chave: str, gerar_conteudo: Callable[[], bytes]) -> tuple[int, bool]:
+    """ Faz o nome do print apontar para o conteúdo do armazém, gravando o conteúdo apenas se ele ainda não existir.
+
+    Args:
+        destino (Path): o nome do print, como Prints/Solis/Usina 1 - visão geral.png.
+
+        chave (str): a chave do conteúdo (chave_do_conteudo).
+
+        gerar_conteudo (Callable): gera os bytes do PNG, chamada apenas quando o conteúdo é novo.
+
+    Returns:
+        tuple[int, bool]: o tamanho do conteúdo em bytes e se ele já estava no armazém.
+
+    """
+    conteudo = caminho_conteudo(chave)
+    reaproveitado = conteudo.exists()
+
+    if not reaproveitado:
+        conteudo.parent.mkdir(parents=True, exist_ok=True)
+
+        temporario = conteudo.with_name(f'{conteudo.name}.{os.getpid()}.tmp')
+        temporario.write_bytes(gerar_conteudo())
+        os.replace(temporario, conteudo)
+
+    _vincular(conteudo, destino)
+
+    return conteudo.stat().st_size, reaproveitado
+
+
+
+def estatisticas() -> dict:
+    """ Retorna a quantidade de conteúdos no armazém, o espaço ocupado por eles e o espaço que os nomes ocupariam sem o armazém. """
+    conteudos = referencias = ocupado = sem_armazem = 0
+
+    for conteudo in Path(ARMAZEM_PRINTS['pasta']).glob('*/*.png'):
+        estado = conteudo.stat()
+        links = max(estado.st_nlink - 1, 0)
+
+        conteudos += 1
+        referencias += links
+        ocupado += estado.st_size
+        sem_armazem += estado.st_size * links
+
+    return {'conteudos': conteudos, 'referencias': referencias, 'bytes_ocupados': ocupado, 'bytes_sem_armazem': sem_armazem}
+
+
+
+def coletar_lixo() -> int:
+    """ Apaga os conteúdos que nenhum nome referencia mais (apenas o link do próprio armazém).
+
+    Returns:
+        int: a quantidade de bytes liberados.
+
+    """
+    liberados = 0
+
+    for conteudo in Path(ARMAZEM_PRINTS['pasta']).glob('*/*'):
+        try:
+            estado = conteudo.stat()
+
+            # Os temporários abandonados por um processo interrompido também são apagados
+            if estado.st_nlink <= 1 or conteudo.suffix == '.tmp':
+                conteudo.unlink()
+                liberados += estado.st_size
+
+        except OSError as e:
+            logger.warning(f'Não foi possível verificar o conteúdo {conteudo.name} do armazém: {e}')
+
+    dados = estatisticas()
+
+    logger.info(
+        f'Coleta do armazém de prints: {liberados / 1024 ** 2:.1f} MB liberados, {dados["conteudos"]} conteúdos com {dados["referencias"]} nomes, '
+        f'{dados["bytes_ocupados"] / 1024 ** 2:.1f} MB ocupados ({dados["bytes_sem_armazem"] / 1024 ** 2:.1f} MB sem o armazém)'
+    )
+
+    return liberados
@@ -0,0 +1,141 @@
+""" Benchmark da montagem do docx mensal, antes e depois dos manifestos.
+
+Gera prints sintéticos para cada dia do mês e monta o docx de uma usina das duas formas:
+    antes: todo dia o docx do mês é aberto, recebe os prints do dia e é salvo novamente (o inserir_prints_docx antigo).
+    depois: todo dia os prints só são registrados no manifesto, e o docx é montado uma única vez no fim do mês (montar_docx).
+Cada forma roda em um processo separado, medindo o tempo total, o tempo do último dia, os bytes lidos e gravados nos docx e o pico de memória do processo.
+
+A primeira página do docx é trocada por um documento em branco, assim o benchmark não depende das imagens do cabeçalho e do logo.
+
+Uso:
+    python benchmarks/docx_mensal.py --dias 30 --prints 3
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import docx
+from PIL import Image
+
+
+def gerar_prints(pasta: Path, dias: int, prints: int) -> dict[int, list[Path]]:
+    """ Gera os prints de cada dia, com uma área de ruído para que o PNG tenha um tamanho parecido com o de um print real. """
+    prints_por_dia = {}
+
+    for dia in range(1, dias + 1):
+        prints_por_dia[dia] = []
+
+        for n in range(1, prints + 1):
+            imagem = Image.new('RGB', (1600, 900), 'white')
+            imagem.paste(Image.effect_noise((400, 300), 40 + dia + n).convert('RGB'), (100 * n, 200))
+
+            caminho = Path(pasta, f'{dia:02d} - {n}.png')
+            imagem.save(caminho, 'PNG')
+
+            prints_por_dia[dia].append(caminho)
+
+    return prints_por_dia
+
+
+def antes(pasta: Path, prints_por_dia: dict) -> dict:
+    import organizacao_prints
+
+    caminho_doc = Path(pasta, 'antes.docx')
+    docx.Document().save(caminho_doc)
+
+    lidos = gravados = 0
+    tempo_dia = 0.0
+
+    for dia, prints in prints_por_dia.items():
+        inicio_dia = perf_counter()
+        lidos += caminho_doc.stat().st_size
+
+        doc = docx.Document(caminho_doc)
+        organizacao_prints._adicionar_dia(doc, 'Solis', f'{dia:02d}/01/2025', prints)
+        doc.save(caminho_doc)
+
+        gravados += caminho_doc.stat().st_size
+        tempo_dia = perf_counter() - inicio_dia
+
+    return {'lidos': lidos, 'gravados': gravados, 'ultimo_dia': tempo_dia, 'tamanho': caminho_doc.stat().st_size}
+
+
+def depois(pasta: Path, prints_por_dia: dict) -> dict:
+    import organizacao_prints
+
+    organizacao_prints.criar_docx_monitoramentos = lambda *args, **kwargs: docx.Document()
+
+    pasta_manifesto = Path(pasta, 'manifesto')
+    caminho_doc = Path(pasta, 'depois.docx')
+    tempo_dia = 0.0
+
+    for dia, prints in prints_por_dia.items():
+        inicio_dia = perf_counter()
+        organizacao_prints.registrar_no_manifesto(pasta_manifesto, 'Solis', 'Usina', date(2025, 1, dia), prints)
+        tempo_dia = perf_counter() - inicio_dia
+
+    inicio_montagem = perf_counter()
+    organizacao_prints.montar_docx(pasta_manifesto, caminho_doc)
+
+    return {
+        'lidos': 0, 'gravados': caminho_doc.stat().st_size, 'ultimo_dia': tempo_dia, 'montagem': perf_counter() - inicio_montagem,
+        'tamanho': caminho_doc.stat().st_size
+    }
+
+
+def medir(forma, pasta: Path, prints_por_dia: dict, retorno):
+    inicio = perf_counter()
+    dados = forma(pasta, prints_por_dia)
+
+    dados['total'] = perf_counter() - inicio
+    dados['memoria'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    retorno.put(dados)
+
+
+def executar(dias: int, prints: int):
+    contexto = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        prints_por_dia = gerar_prints(pasta, dias, prints)
+
+        tamanho_prints = sum(caminho.stat().st_size for caminhos in prints_por_dia.values() for caminho in caminhos)
+        print(f'{dias} dias, {prints} prints por dia, {tamanho_prints / 1024 ** 2:.1f} MB de prints no mês')
+
+        for nome, forma in (('antes', antes), ('depois', depois)):
+            retorno = contexto.Queue()
+            processo = contexto.Process(target=medir, args=(forma, pasta, prints_por_dia, retorno))
+            processo.start()
+
+            processo.join()
+
+            if processo.exitcode != 0:
+                print(f'{nome:<7} falhou (código {processo.exitcode})')
+                continue
+
+            dados = retorno.get()
+
+            print(
+                f'{nome:<7} total {dados["total"]:7.2f}s | último dia {dados["ultimo_dia"]:6.2f}s | '
+                f'montagem {dados.get("montagem", 0):6.2f}s | docx lidos {dados["lidos"] / 1024 ** 2:7.1f} MB | '
+                f'docx gravados {dados["gravados"] / 1024 ** 2:7.1f} MB | pico de memória {dados["memoria"]:6.0f} MB | '
+                f'docx final {dados["tamanho"] / 1024 ** 2:5.1f} MB'
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da montagem do docx mensal')
+    parser.add_argument('--dias', type=int, default=30)
+    parser.add_argument('--prints', type=int, default=3, help='prints por dia de cada usina')
+    argumentos = parser.parse_args()
+
+    executar(argumentos.dias, argumentos.prints)
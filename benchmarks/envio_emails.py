@@ -0,0 +1,142 @@
+""" Benchmark do envio dos emails de aviso, antes e depois da fila de emails com a sessão SMTP reaproveitada.
+
+Sobe um servidor SMTP local que só aceita as mensagens, com um atraso configurável na abertura de cada conexão (no lugar do handshake TLS e do login) e em cada envio.
+Em seguida envia os emails da forma antiga (uma conexão nova por email, dentro do loop de eventos) e pela FilaEmails, medindo o tempo total, quantas conexões foram abertas e o maior travamento do loop de eventos enquanto os emails eram enviados.
+
+Uso:
+    python benchmarks/envio_emails.py --emails 20 --atraso-conexao 0.3 --atraso-envio 0.05
+"""
+
+import argparse
+import asyncio
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from time import perf_counter, sleep
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yagmail
+from fila_emails import FilaEmails
+
+
+class ServidorSMTPLocal(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, atraso_conexao: float, atraso_envio: float):
+        super().__init__(('127.0.0.1', 0), ManipuladorSMTP)
+        self.atraso_conexao = atraso_conexao
+        self.atraso_envio = atraso_envio
+        self.conexoes = 0
+        self.mensagens = 0
+
+
+class ManipuladorSMTP(socketserver.StreamRequestHandler):
+    def responder(self, linha: str):
+        self.wfile.write(f'{linha}\r\n'.encode())
+
+    def handle(self):
+        self.server.conexoes += 1
+        sleep(self.server.atraso_conexao)
+        self.responder('220 localhost SMTP local')
+
+        while linha := self.rfile.readline():
+            comando = linha.decode(errors='ignore').strip().upper()
+
+            if comando.startswith('EHLO'):
+                self.wfile.write(b'250-localhost\r\n250 SIZE 52428800\r\n')
+
+            elif comando.startswith('DATA'):
+                self.responder('354 fim com <CRLF>.<CRLF>')
+
+                while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                    pass
+
+                sleep(self.server.atraso_envio)
+                self.server.mensagens += 1
+                self.responder('250 OK')
+
+            elif comando.startswith('QUIT'):
+                self.responder('221 tchau')
+                return
+
+            else:
+                self.responder('250 OK')
+
+
+def conectar_local(porta: int):
+    return yagmail.SMTP(user='benchmark@localhost', host='127.0.0.1', port=porta, smtp_ssl=False, smtp_starttls=False, smtp_skip_login=True)
+
+
+async def medir_travamento(parar: asyncio.Event, travamentos: list):
+    """ Mede de quanto em quanto tempo o loop de eventos consegue rodar uma tarefa que pede para dormir 10 ms. """
+    while not parar.is_set():
+        inicio = perf_counter()
+        await asyncio.sleep(0.01)
+        travamentos.append(perf_counter() - inicio - 0.01)
+
+
+async def antes(porta: int, emails: int):
+    for n in range(emails):
+        yag = conectar_local(porta)
+        yag.send(to='destino@localhost', subject=f'Aviso {n}', contents='corpo do aviso')
+        yag.close()
+        await asyncio.sleep(0)
+
+
+async def depois(fila: FilaEmails, emails: int):
+    for n in range(emails):
+        fila.enfileirar('destino@localhost', f'Aviso {n}', 'corpo do aviso')
+        await asyncio.sleep(0)
+
+
+async def medir(nome: str, envio, servidor: ServidorSMTPLocal, aguardar_fila=None):
+    servidor.conexoes = servidor.mensagens = 0
+    parar = asyncio.Event()
+    travamentos = []
+
+    inicio = perf_counter()
+    medidor = asyncio.create_task(medir_travamento(parar, travamentos))
+
+    await envio
+    tempo_loop = perf_counter() - inicio
+
+    if aguardar_fila:
+        await asyncio.to_thread(aguardar_fila)
+
+    parar.set()
+    await medidor
+
+    print(
+        f'{nome:<8} total {perf_counter() - inicio:7.3f}s | loop ocupado {tempo_loop:7.3f}s | '
+        f'maior travamento do loop {max(travamentos, default=0) * 1000:8.1f} ms | '
+        f'{servidor.conexoes} conexões | {servidor.mensagens} mensagens'
+    )
+
+
+async def executar(emails: int, atraso_conexao: float, atraso_envio: float):
+    servidor = ServidorSMTPLocal(atraso_conexao, atraso_envio)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    porta = servidor.server_address[1]
+
+    print(f'{emails} emails, {atraso_conexao * 1000:.0f} ms por conexão e {atraso_envio * 1000:.0f} ms por envio')
+
+    await medir('antes', antes(porta, emails), servidor)
+
+    fila = FilaEmails(conectar=lambda: conectar_local(porta))
+    await medir('depois', depois(fila, emails), servidor, aguardar_fila=lambda: fila.esvaziar(teto=600))
+    fila.encerrar()
+
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do envio dos emails de aviso')
+    parser.add_argument('--emails', type=int, default=20)
+    parser.add_argument('--atraso-conexao', type=float, default=0.3, help='segundos de atraso na abertura de cada conexão, simulando o handshake TLS e o login')
+    parser.add_argument('--atraso-envio', type=float, default=0.05, help='segundos de atraso em cada envio')
+    argumentos = parser.parse_args()
+
+    asyncio.run(executar(argumentos.emails, argumentos.atraso_conexao, argumentos.atraso_envio))
@@ -0,0 +1,183 @@
+""" Benchmark das idas e voltas ao navegador feitas pela leitura dos status dos inversores, antes e depois da extração em lote.
+
+Monta, para cada site, uma página sintética com a mesma estrutura de seletores usada nas funções analisar_status_inversores_* e com a quantidade de inversores escolhida.
+Em seguida lê os status da forma antiga (locator.all() e um text_content/inner_text por elemento) e pela extrair_linhas, contando as chamadas ao navegador e medindo o tempo.
+
+Uso:
+    python benchmarks/idas_e_voltas_analisadores.py --inversores 50 --repeticoes 5
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.async_api import Page, async_playwright
+from extracao_dom import extrair_linhas
+
+
+def html_solis(qtd: int) -> str:
+    linhas = ''.join(f'<tr><td>On-line</td> <td>Inversor</td> <td>SN{n:05d}</td></tr>' for n in range(qtd))
+    return f'<table><tbody>{linhas}</tbody></table>'
+
+
+def html_solplanet(qtd: int) -> str:
+    paineis = ''.join(
+        f'<div class="ant-collapse ant-collapse-icon-position-start ant-collapse-ghost"><table><tr><td>SN{n:05d}</td></tr><tr><td>Normal</td></tr></table></div>'
+        for n in range(qtd)
+    )
+    return f'<div id="rc-tabs-1-panel-item-1">{paineis}</div>'
+
+
+def html_sungrow(qtd: int) -> str:
+    cards = ''.join(f'<div class="container"><span>SN{n:05d}</span><div class="isc-tag">Normal</div></div>' for n in range(qtd))
+    return f'<div class="card-container">{cards}</div>'
+
+
+def html_phb(qtd: int) -> str:
+    return ''.join(f'<div class="device-status">Trabalhando</div>' for _ in range(qtd))
+
+
+def html_growatt(qtd: int) -> str:
+    linhas = ''.join(f'<tr><td>SN{n:05d}</td><td>Online</td></tr>' for n in range(qtd))
+    return f'<table><tbody id="inverterRefreshData">{linhas}</tbody></table>'
+
+
+def html_shine(qtd: int) -> str:
+    caixas = ''.join('<div class="basic_box_bottom">Normal</div>' for _ in range(qtd))
+    return f'<div id="basicInfo">{caixas}</div>'
+
+
+
+async def antes_solis(pagina: Page) -> int:
+    idas = 1
+    for inversor in await pagina.locator('tbody > tr').all():
+        await inversor.text_content()
+        idas += 1
+    return idas
+
+
+async def antes_solplanet(pagina: Page) -> int:
+    idas = 1
+    for inversor in await pagina.locator('#rc-tabs-1-panel-item-1 div.ant-collapse.ant-collapse-icon-position-start.ant-collapse-ghost').all():
+        await inversor.locator('tr').last.inner_text()
+        idas += 1
+    return idas
+
+
+async def antes_sungrow(pagina: Page) -> int:
+    idas = 1
+    for card in await pagina.locator('div.card-container div.container').all():
+        await card.locator('div.isc-tag').text_content()
+        idas += 1
+    return idas
+
+
+async def antes_phb(pagina: Page) -> int:
+    idas = 1
+    for item in await pagina.locator('div.device-status').all():
+        await item.inner_text()
+        idas += 1
+    return idas
+
+
+async def antes_growatt(pagina: Page) -> int:
+    idas = 1
+    for linha in await pagina.locator('tbody#inverterRefreshData > tr').all():
+        await linha.text_content()
+        idas += 1
+    return idas
+
+
+async def antes_shine(pagina: Page) -> int:
+    idas = 1
+    for inversor in await pagina.locator('div#basicInfo div.basic_box_bottom').all():
+        await inversor.inner_text()
+        idas += 1
+    return idas
+
+
+
+async def depois_solis(pagina: Page) -> int:
+    await extrair_linhas(pagina.locator('tbody > tr'))
+    return 1
+
+
+async def depois_solplanet(pagina: Page) -> int:
+    await extrair_linhas(pagina.locator('#rc-tabs-1-panel-item-1 div.ant-collapse.ant-collapse-icon-position-start.ant-collapse-ghost'), campos={'linhas': 'tr'})
+    return 1
+
+
+async def depois_sungrow(pagina: Page) -> int:
+    await extrair_linhas(pagina.locator('div.card-container div.container'), campos={'status': 'div.isc-tag'})
+    return 1
+
+
+async def depois_phb(pagina: Page) -> int:
+    await extrair_linhas(pagina.locator('div.device-status'))
+    return 1
+
+
+async def depois_growatt(pagina: Page) -> int:
+    await extrair_linhas(pagina.locator('tbody#inverterRefreshData > tr'))
+    return 1
+
+
+async def depois_shine(pagina: Page) -> int:
+    await extrair_linhas(pagina.locator('div#basicInfo div.basic_box_bottom'))
+    return 1
+
+
+
+CENARIOS = {
+    'Solis': (html_solis, antes_solis, depois_solis),
+    'Solplanet': (html_solplanet, antes_solplanet, depois_solplanet),
+    'Sungrow': (html_sungrow, antes_sungrow, depois_sungrow),
+    'PHB': (html_phb, antes_phb, depois_phb),
+    'Growatt': (html_growatt, antes_growatt, depois_growatt),
+    'Shine': (html_shine, antes_shine, depois_shine)
+}
+
+
+
+async def medir(pagina: Page, leitura, repeticoes: int) -> tuple[int, float]:
+    inicio = perf_counter()
+
+    for _ in range(repeticoes):
+        idas = await leitura(pagina)
+
+    return idas, (perf_counter() - inicio) / repeticoes * 1000
+
+
+
+async def main(qtd_inversores: int, repeticoes: int):
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        pagina = await browser.new_page()
+
+        print(f'{qtd_inversores} inversores por usina, média de {repeticoes} repetições\n')
+        print(f'{"Site":<10} {"idas antes":>11} {"idas depois":>12} {"ms antes":>10} {"ms depois":>10}')
+
+        for site, (montar_html, antes, depois) in CENARIOS.items():
+            await pagina.set_content(f'<html><body>{montar_html(qtd_inversores)}</body></html>')
+
+            idas_antes, ms_antes = await medir(pagina, antes, repeticoes)
+            idas_depois, ms_depois = await medir(pagina, depois, repeticoes)
+
+            print(f'{site:<10} {idas_antes:>11} {idas_depois:>12} {ms_antes:>10.1f} {ms_depois:>10.1f}')
+
+        await browser.close()
+
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--inversores', type=int, default=50)
+    parser.add_argument('--repeticoes', type=int, default=5)
+
+    argumentos = parser.parse_args()
+
+    asyncio.run(main(argumentos.inversores, argumentos.repeticoes))
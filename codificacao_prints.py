@@ -0,0 +1,176 @@
+""" Este módulo contém a gravação dos prints em segundo plano.
+
+salvar_print pede o print ao navegador como bytes (sem path, então o Playwright não grava nada no loop de eventos) e entrega os bytes a um pool de processos, que recodifica e grava o arquivo enquanto a usina segue para as próximas etapas.
+O arquivo principal continua sendo um PNG sem perdas no mesmo caminho de antes (os docx, os emails e os resultados dependem dele), recomprimido com CODIFICACAO_PRINTS['nivel_compressao_png'] e guardado pelo armazém de prints (armazem_prints.py), que guarda uma única vez os prints idênticos. Caso CODIFICACAO_PRINTS['copia'] esteja configurada também é gravada uma cópia em JPEG ou WebP, por exemplo para o arquivo histórico.
+O tempo de codificação e o tamanho de cada print são registrados em RESULTADOS. Os prints de uma usina só existem no disco depois de aguardar_prints, que o executor chama no fim de cada usina."""
+
+import asyncio
+import atexit
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import Optional, Union
+from PIL import Image
+from playwright.async_api import Locator, Page
+from config import *
+from armazem_prints import chave_do_conteudo, gravar_referencia
+from resultados import RESULTADOS
+
+
+logger = logging.getLogger('Codificação dos prints')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'codificacao_prints.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+_pendentes: dict[tuple[str, str], set[asyncio.Future]] = {}
+
+
+
+def codificar_print(dados: bytes, caminho: str, opcoes: dict) -> tuple[int, int, float, bool]:
+    """ Executada nos processos do pool: recomprime o PNG do navegador, grava o arquivo principal pelo armazém de prints e a cópia opcional.
+
+    Args:
+        dados (bytes): o PNG retornado pelo screenshot do Playwright.
+
+        caminho (str): onde o PNG principal é gravado.
+
+        opcoes (dict): CODIFICACAO_PRINTS, passado como argumento porque o processo do pool não recebe alterações feitas no config do processo principal.
+
+    Returns:
+        tuple[int, int, float, bool]: o tamanho do PNG do navegador, o tamanho do conteúdo no armazém, o tempo de codificação em segundos e se o conteúdo já estava no armazém.
+
+    """
+    inicio = perf_counter()
+    destino = Path(caminho)
+
+    with Image.open(io.BytesIO(dados)) as imagem:
+        imagem.load()
+
+        def gerar_conteudo() -> bytes:
+            buffer = io.BytesIO()
+            imagem.save(buffer, 'PNG', optimize=opcoes['nivel_compressao_png'] >= 9, compress_level=opcoes['nivel_compressao_png'])
+
+            # A recompressão só é usada quando realmente diminui o arquivo
+            return buffer.getvalue() if buffer.tell() < len(dados) else dados
+
+        # Um print idêntico a um já guardado não é recodificado, o nome só passa a apontar para o conteúdo existente (ver armazem_prints.py)
+        tamanho, reaproveitado = gravar_referencia(destino, chave_do_conteudo(imagem.mode, imagem.size, imagem.tobytes()), gerar_conteudo)
+
+        copia = opcoes.get('copia')
+
+        if copia:
+            pasta_copia = Path(copia['pasta'], destino.parent.relative_to(CAMINHO_PASTA_PRINTS)) if destino.is_relative_to(CAMINHO_PASTA_PRINTS) else Path(copia['pasta'])
+            pasta_copia.mkdir(parents=True, exist_ok=True)
+
+            extensao = 'webp' if copia['formato'] == 'WEBP' else 'jpg'
+            imagem.convert('RGB').save(Path(pasta_copia, f'{destino.stem}.{extensao}'), copia['formato'], quality=copia['qualidade'], method=6)
+
+    return len(dados), tamanho, perf_counter() - inicio, reaproveitado
+
+
+
+def _obter_pool() -> ProcessPoolExecutor:
+    global _pool
+
+    if _pool is None:
+        # 'spawn' pelo mesmo motivo de processos_sites.py: um fork copiaria o estado do Playwright e das threads
+        _pool = ProcessPoolExecutor(max_workers=CODIFICACAO_PRINTS['processos'], mp_context=multiprocessing.get_context('spawn'))
+        atexit.register(encerrar_codificacao)
+
+    return _pool
+
+
+
+def encerrar_codificacao():
+    """ Encerra o pool de codificação depois de gravar os prints pendentes. Os processos dos sites chamam no fim do grupo, porque terminam sem passar pelo atexit. """
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+
+def _concluir(site: str, usina: str, caminho: Path, dados: bytes, inicio: float, capturado_em: float, tarefa: asyncio.Future):
+    _pendentes[(site, usina)].discard(tarefa)
+
+    try:
+        tamanho_original, tamanho, segundos, reaproveitado = tarefa.result()
+
+    except Exception as e:
+        logger.error(f'Erro ao codificar o print {caminho}, gravando o PNG do navegador: {e}')
+
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        # O nome pode ser um link para um conteúdo do armazém, que não pode ser sobrescrito no lugar
+        caminho.unlink(missing_ok=True)
+        caminho.write_bytes(dados)
+
+        tamanho_original = tamanho = len(dados)
+        segundos = 0.0
+        reaproveitado = False
+
+    RESULTADOS.registrar_print(site, usina, caminho, tamanho, segundos, reaproveitado, capturado_em)
+
+    logger.info(
+        f'Print {caminho.name} ({site}) gravado: {tamanho_original / 1024:.0f} KB -> {tamanho / 1024:.0f} KB'
+        f'{" (idêntico a um print já guardado)" if reaproveitado else ""}, {segundos:.2f}s de codificação, {perf_counter() - inicio:.2f}s até o disco'
+    )
+
+
+
+async def salvar_print(fonte: Union[Page, Locator], caminho: Path, site: str, usina: str, aguardar: bool = False, **opcoes):
+    """ Tira o print da página ou do elemento e o grava em segundo plano pelo pool de codificação.
+
+    Args:
+        fonte (Page | Locator): a página ou o elemento do print.
+
+        caminho (Path): onde o PNG é gravado.
+
+        site (str): o site da usina, usado para registrar o print e para aguardar_prints.
+
+        usina (str): o nome da usina.
+
+        aguardar (bool): se a função só retorna depois de o arquivo ser gravado, para os prints que são usados logo em seguida (como os anexos dos emails de falhas).
+
+        **opcoes: as opções repassadas para o screenshot do Playwright (clip, full_page...).
+
+    """
+    inicio = perf_counter()
+    capturado_em = datetime.now().timestamp()
+    dados = await fonte.screenshot(type='png', **opcoes)
+
+    tarefa = asyncio.get_running_loop().run_in_executor(_obter_pool(), codificar_print, dados, str(caminho), CODIFICACAO_PRINTS)
+
+    _pendentes.setdefault((site, usina), set()).add(tarefa)
+    tarefa.add_done_callback(partial(_concluir, site, usina, Path(caminho), dados, inicio, capturado_em))
+
+    if aguardar:
+        await aguardar_prints(site, usina)
+
+
+
+async def aguardar_prints(site: str, usina: Optional[str] = None):
+    """ Aguarda a gravação dos prints pendentes da usina, ou de todas as usinas do site caso usina seja None. """
+    tarefas = [
+        tarefa
+        for (site_tarefa, usina_tarefa), pendentes in _pendentes.items()
+        if site_tarefa == site and usina in (None, usina_tarefa)
+        for tarefa in pendentes
+    ]
+
+    # _concluir foi adicionado antes nos callbacks de cada tarefa, então já terá gravado o print (ou o PNG do navegador) quando o gather retornar
+    if tarefas:
+        await asyncio.gather(*tarefas, return_exceptions=True)
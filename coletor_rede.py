@@ -0,0 +1,258 @@
+""" Este módulo contém o coletor opcional que lê os status dos inversores e os alarmes direto das respostas JSON dos sites.
+
+Os seis sites carregam a lista de dispositivos e os alarmes por requisições XHR. Quando o coletor está ativo (COLETOR_REDE['ativo']) ele escuta as respostas do contexto, guarda as que correspondem aos padrões do site e as transforma em registros estruturados sob demanda.
+As funções de análise consultam o coletor primeiro e, se nenhuma resposta foi vista para aquela página, continuam lendo o DOM como antes."""
+
+import logging
+import re
+import weakref
+from dataclasses import dataclass
+from typing import Optional
+from playwright.async_api import BrowserContext, Page, Response
+from config import *
+
+
+logger = logging.getLogger('Coletor de rede')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'coletor_rede.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+# Relaciona cada contexto ao seu coletor, assim as funções de análise encontram o coletor a partir da página
+_coletores_por_contexto = weakref.WeakKeyDictionary()
+
+
+
+@dataclass
+class RegistroInversor:
+    numero_serie: str
+    status: str
+    online: bool
+
+
+
+@dataclass
+class RegistroAlarme:
+    numero_serie: str
+    descricao: str
+
+
+
+class ColetorRespostas:
+    """ Guarda as respostas de lista de dispositivos e de alarmes de um site, separadas por página. """
+
+    def __init__(self, site: str):
+        self.site = site
+        self.configuracao = COLETOR_REDE[site]
+
+        self._padroes = {tipo: re.compile(config['url'], re.IGNORECASE) for tipo, config in self.configuracao.items()}
+        self._respostas: dict[str, weakref.WeakKeyDictionary] = {tipo: weakref.WeakKeyDictionary() for tipo in self.configuracao}
+
+
+    def ao_receber_resposta(self, resposta: Response):
+        if resposta.request.resource_type not in ('xhr', 'fetch') or not resposta.ok:
+            return
+
+        for tipo, padrao in self._padroes.items():
+            if padrao.search(resposta.url):
+                try:
+                    pagina = resposta.frame.page
+
+                except Exception:
+                    return # resposta de um frame que já foi fechado
+
+                self._respostas[tipo].setdefault(pagina, []).append(resposta)
+
+
+    def limpar(self, pagina: Page):
+        """ Descarta as respostas já vistas na página, usado quando a mesma página passa para outra usina. """
+        for respostas in self._respostas.values():
+            respostas.pop(pagina, None)
+
+
+    async def _itens_coletados(self, pagina: Page, tipo: str) -> Optional[list[dict]]:
+        respostas = self._respostas.get(tipo, {}).get(pagina)
+
+        if not respostas:
+            return None
+
+        config = self.configuracao[tipo]
+        itens = []
+
+        for resposta in respostas:
+            try:
+                corpo = await resposta.json()
+
+            except Exception as e:
+                logger.warning(f'Resposta {resposta.url} do site {self.site} não é um JSON válido: {e}')
+                continue
+
+            itens.extend(_buscar_lista_de_itens(corpo, config['campos_status'] if tipo == 'inversores' else config['campos_descricao']))
+
+        return itens
+
+
+    async def inversores(self, pagina: Page) -> Optional[list[RegistroInversor]]:
+        itens = await self._itens_coletados(pagina, 'inversores')
+
+        if itens is None:
+            return None
+
+        config = self.configuracao['inversores']
+        valores_online = {str(valor).lower() for valor in config['valores_online']}
+
+        registros = {}
+
+        for item in itens:
+            numero_serie = str(_primeiro_campo(item, config['campos_numero_serie']) or len(registros))
+            status = str(_primeiro_campo(item, config['campos_status'])).strip()
+
+            # Respostas repetidas (paginação, atualização automática) sobrescrevem o registro do mesmo inversor
+            registros[numero_serie] = RegistroInversor(numero_serie, status, status.lower() in valores_online)
+
+        return list(registros.values())
+
+
+    async def alarmes(self, pagina: Page) -> Optional[list[RegistroAlarme]]:
+        itens = await self._itens_coletados(pagina, 'alarmes')
+
+        if itens is None:
+            return None
+
+        config = self.configuracao['alarmes']
+
+        return [
+            RegistroAlarme(
+                str(_primeiro_campo(item, config['campos_numero_serie']) or ''),
+                str(_primeiro_campo(item, config['campos_descricao']) or '')
+            )
+            for item in itens
+        ]
+
+
+
+def ativar_coletor(contexto: BrowserContext, site: str) -> Optional[ColetorRespostas]:
+    """ Liga o coletor de respostas no contexto do site, caso ele esteja ativo na configuração.
+
+    Args:
+        contexto (BrowserContext): o contexto do site, todas as páginas dele (inclusive as abas das usinas) serão escutadas.
+
+        site (str): o nome do site.
+
+    Returns:
+        ColetorRespostas: o coletor ligado ao contexto, ou None caso o coletor esteja desativado ou o site não tenha configuração.
+
+    """
+    if not COLETOR_REDE['ativo'] or site not in COLETOR_REDE:
+        return None
+
+    coletor = ColetorRespostas(site)
+    contexto.on('response', coletor.ao_receber_resposta)
+
+    _coletores_por_contexto[contexto] = coletor
+
+    logger.info(f'Coletor de respostas ativado para o site {site}')
+    return coletor
+
+
+
+def coletor_da_pagina(pagina: Page) -> Optional[ColetorRespostas]:
+    return _coletores_por_contexto.get(pagina.context)
+
+
+
+async def inversores_coletados(pagina: Page) -> Optional[list[RegistroInversor]]:
+    """ Retorna os inversores lidos das respostas JSON da página.
+
+    Args:
+        pagina (Page): a página da usina.
+
+    Returns:
+        list[RegistroInversor]: os inversores encontrados, ou None quando o coletor está desativado ou nenhuma resposta de lista de dispositivos foi vista (nesse caso o DOM deve ser lido).
+
+    """
+    coletor = coletor_da_pagina(pagina)
+
+    if not coletor:
+        return None
+
+    registros = await coletor.inversores(pagina)
+
+    if not registros:
+        logger.info(f'Nenhum inversor encontrado nas respostas do site {coletor.site}, usando a leitura do DOM')
+        return None
+
+    return registros
+
+
+
+async def alarmes_coletados(pagina: Page) -> Optional[list[RegistroAlarme]]:
+    """ Retorna os alarmes lidos das respostas JSON da página.
+
+    Args:
+        pagina (Page): a página da usina.
+
+    Returns:
+        list[RegistroAlarme]: os alarmes encontrados, ou None quando o coletor está desativado ou nenhum alarme foi encontrado nas respostas.
+        Uma resposta sem alarmes também retorna None, para que a ausência de falhas seja sempre confirmada pelo DOM e uma mudança no formato do JSON nunca esconda uma falha.
+
+    """
+    coletor = coletor_da_pagina(pagina)
+
+    if not coletor:
+        return None
+
+    return await coletor.alarmes(pagina) or None
+
+
+
+def contar_inversores_offline(registros: list[RegistroInversor], site: str, nome_usina: str) -> int:
+    """ Conta e registra no log os inversores que não estão online a partir dos registros coletados. """
+    contador = 0
+
+    for registro in registros:
+        if not registro.online:
+            logger.warning(f'O inversor de SN {registro.numero_serie} da usina {site} - {nome_usina} não está online! Status atual: {registro.status}')
+            contador += 1
+
+    return contador
+
+
+
+def _primeiro_campo(item: dict, campos: list[str]):
+    for campo in campos:
+        if item.get(campo) not in (None, ''):
+            return item[campo]
+
+    return None
+
+
+
+def _buscar_lista_de_itens(corpo, campos_obrigatorios: list[str]) -> list[dict]:
+    """ Procura no JSON, em qualquer profundidade, a primeira lista de objetos que tenha algum dos campos informados. """
+    if isinstance(corpo, list):
+        if corpo and all(isinstance(item, dict) for item in corpo) and any(campo in corpo[0] for campo in campos_obrigatorios):
+            return corpo
+
+        valores = corpo
+
+    elif isinstance(corpo, dict):
+        valores = corpo.values()
+
+    else:
+        return []
+
+    for valor in valores:
+        if isinstance(valor, (list, dict)):
+            itens = _buscar_lista_de_itens(valor, campos_obrigatorios)
+
+            if itens:
+                return itens
+
+    return []
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import datetime, time
+from typing import Optional
 from dotenv import load_dotenv
 
 
@@ -16,19 +17,67 @@ CAMINHO_PASTA_LOGS = Path(CAMINHO_PASTA_RAIZ, 'Logs')
 
 CAMINHO_PASTA_DADOS_MENSAIS = Path(CAMINHO_PASTA_RAIZ, 'Dados Mensais')
 
+CAMINHO_PASTA_SESSOES = Path(CAMINHO_PASTA_RAIZ, 'Sessões')
+
+CAMINHO_PASTA_CACHE = Path(CAMINHO_PASTA_RAIZ, 'Cache')
+
 
 FORMATACAO_LOGGING = '%(asctime)s - %(name)s - %(levelname)s - %(message)s \n'
 
 
-AGORA = datetime.now()
+class Relogio:
+    """ Relógio compartilhado por todos os módulos, com o momento de início do ciclo de monitoramento atual.
+
+    Antes cada execução era um processo novo e o momento podia ser fixado na importação. No modo daemon o mesmo processo roda vários ciclos, então o relógio é atualizado no início de cada um com atualizar().
+    """
+
+    def __init__(self):
+        self.atualizar()
+
+
+    def atualizar(self, momento: Optional[datetime] = None):
+        self.agora = momento or datetime.now()
+
+
+    @property
+    def data(self):
+        return self.agora.date()
 
-DATA_ATUAL = AGORA.date()
 
-HORARIO_ATUAL = AGORA.time()
+    @property
+    def horario(self):
+        return self.agora.time()
+
+
+RELOGIO = Relogio()
 
 HORARIO_PARA_INSERIR_PRINTS = time(hour=17, minute=30, second=0)
 
 
+# Quantidade máxima de páginas abertas em paralelo no mesmo contexto para monitorar as usinas de cada site
+PAGINAS_POR_SITE = {
+    'Solis': 3,
+    'Solplanet': 2,
+    'Sungrow': 2,
+    'Growatt': 3
+}
+
+# Limites e parâmetros do escalonador adaptativo que decide quantos sites e usinas são monitorados ao mesmo tempo
+LIMITES_ESCALONADOR = {
+    'sites': {'limite_inicial': 2, 'limite_minimo': 1, 'limite_maximo': 6},
+    'usinas': {'limite_inicial': 4, 'limite_minimo': 1, 'limite_maximo': 12},
+    'cpu_maximo': 85, # %
+    'memoria_livre_minima_mb': 800,
+    'renderizadores_maximo': 24,
+    'fator_latencia': 1.5, # Latência recente acima de 1.5x a referência da etapa reduz a concorrência
+    'amostras_latencia': 5, # Medições recentes de cada etapa comparadas com a referência
+    'amostras_base': 2, # Medições necessárias para criar a referência de uma etapa que ainda não tem referência guardada
+    'peso_base_nova': 0.2, # Peso da mediana do ciclo ao atualizar a referência guardada de cada etapa no fim do ciclo
+    'caminho_latencias': Path(CAMINHO_PASTA_CACHE, 'latencias_escalonador.json'),
+    'intervalo_ajuste': 5 # segundos
+}
+
+
 load_dotenv(encoding='utf-8', verbose=True)
 
 sites = {
@@ -64,16 +113,337 @@ sites = {
 
     'PHB': {
         'url': 'http://www.phbsolar.com.br/home/login',
-        'login_Imebras': os.getenv('LOGIN_PHB_IMEBRAS'),
-        'senha_Imebras': os.getenv('SENHA_PHB_IMEBRAS')
+        # Conta usada pelas usinas PHB do registro cujas variáveis de ambiente não estejam definidas (ver RegistroUsinas.credenciais)
+        'login': os.getenv('LOGIN_PHB_IMEBRAS'),
+        'senha': os.getenv('SENHA_PHB_IMEBRAS')
+    }
+}
+
+
+# Url e seletor usados para confirmar se uma sessão salva ainda está logada. O seletor só deve existir para usuários autenticados.
+SONDAS_SESSAO = {
+    'Solis': {'url': sites['Solis']['url'], 'seletor': 'div.station-name', 'timeout': 10000},
+    'Solplanet': {'url': 'https://internation-pro-cloud.solplanet.net/plant-center/plant-overview-all/plant-overview', 'seletor': None, 'timeout': 10000},
+    'Sungrow': {'url': sites['Sungrow']['url'], 'seletor': 'div.menu-item', 'timeout': 10000},
+    'Shine': {'url': sites['Shine']['url'], 'seletor': 'strong#stats03', 'timeout': 10000},
+    'Growatt': {'url': sites['Growatt']['url'], 'seletor': 'tbody#tbl_data_plant', 'timeout': 10000}
+}
+
+
+# Sinais de prontidão de cada site: seletores dos elementos de carregamento, padrões de url das respostas XHR de cada etapa e o teto (s) das esperas
+SINAIS_PRONTIDAO = {
+    'Solis': {
+        'carregamento': ['div.el-loading-mask', 'div.el-skeleton'],
+        'respostas': {'falhas': r'alarm', 'inversores': r'inverter|device'},
+        'teto': 8
+    },
+    'Solplanet': {
+        'carregamento': ['div.ant-spin-spinning', 'div.ant-skeleton-active'],
+        'respostas': {'falhas': r'fault|error|alarm'},
+        'teto': 10
+    },
+    'Sungrow': {
+        'carregamento': ['div.el-loading-mask', 'div.isc-loading', 'div.ant-spin-spinning'],
+        'respostas': {'falhas': r'fault|alarm', 'inversores': r'device'},
+        'teto': 8
+    },
+    'Growatt': {
+        'carregamento': ['div.layui-layer-loading', 'div.loading'],
+        'respostas': {},
+        'teto': 6
+    },
+    'Shine': {
+        'carregamento': ['div.loading', 'div.layui-layer-loading'],
+        'respostas': {'falhas': r'warn|alarm'},
+        'teto': 6
+    },
+    'PHB': {
+        'carregamento': ['div.el-loading-mask'],
+        'respostas': {},
+        'teto': 6
+    }
+}
+
+
+# Coletor opcional que lê os inversores e alarmes das respostas JSON dos sites. Para cada tipo de resposta: o padrão da url e os campos possíveis de cada informação.
+COLETOR_REDE = {
+    'ativo': os.getenv('COLETOR_REDE_ATIVO', '0') == '1',
+
+    'Solis': {
+        'inversores': {'url': r'inverter/(list|page)', 'campos_numero_serie': ['sn', 'inverterSn'], 'campos_status': ['state', 'inverterState', 'status'], 'valores_online': [1, 'online']},
+        'alarmes': {'url': r'alarm/(list|page)', 'campos_numero_serie': ['alarmDeviceSn', 'sn'], 'campos_descricao': ['alarmMsg', 'alarmCode']}
+    },
+
+    'Solplanet': {
+        'inversores': {'url': r'(device|inverter)/(list|page)', 'campos_numero_serie': ['sn', 'deviceSn'], 'campos_status': ['status', 'deviceStatus'], 'valores_online': [1, 'normal']},
+        'alarmes': {'url': r'(fault|error)/(list|page)', 'campos_numero_serie': ['sn', 'deviceSn'], 'campos_descricao': ['faultName', 'errorMsg', 'message']}
+    },
+
+    'Sungrow': {
+        'inversores': {'url': r'getDeviceList|getPsDeviceList', 'campos_numero_serie': ['device_sn', 'sn'], 'campos_status': ['dev_status', 'device_status'], 'valores_online': [1]},
+        'alarmes': {'url': r'getFaultAlarm|faultList', 'campos_numero_serie': ['device_sn', 'sn'], 'campos_descricao': ['fault_name', 'fault_reason']}
+    },
+
+    'Growatt': {
+        'inversores': {'url': r'getDevicesByPlantList|getInvList', 'campos_numero_serie': ['sn', 'deviceSn'], 'campos_status': ['status', 'deviceStatus'], 'valores_online': [1, 'online']},
+        'alarmes': {'url': r'getEventList|getAlarmList', 'campos_numero_serie': ['sn', 'deviceSn'], 'campos_descricao': ['eventName', 'alarmName']}
+    },
+
+    'Shine': {
+        'inversores': {'url': r'queryPlantDeviceStatus|queryDevices', 'campos_numero_serie': ['sn', 'pn'], 'campos_status': ['status'], 'valores_online': [0, 'normal']},
+        'alarmes': {'url': r'queryPlantWarning', 'campos_numero_serie': ['sn', 'pn'], 'campos_descricao': ['desc', 'code']}
+    },
+
+    'PHB': {
+        'inversores': {'url': r'GetInverterAllPoint|GetPowerStationInverter', 'campos_numero_serie': ['sn', 'inverterSn'], 'campos_status': ['status', 'statusText'], 'valores_online': [1, 'working', 'trabalhando']},
+        'alarmes': {'url': r'GetWarning', 'campos_numero_serie': ['sn', 'inverterSn'], 'campos_descricao': ['warningname', 'warning_name']}
+    }
+}
+
+
+# Política de roteamento: o que é bloqueado sempre e o que só é carregado nas fases em que há prints. 'permitir' tem prioridade sobre qualquer bloqueio.
+ROTEAMENTO = {
+    'ativo': True,
+    'tipos_nao_essenciais': ['image', 'font', 'media'],
+    'bloquear_sempre': [
+        r'google-analytics\.com|googletagmanager\.com|doubleclick\.net|hotjar\.com|clarity\.ms|connect\.facebook\.net',
+        r'hm\.baidu\.com|cnzz\.com|umeng\.com|growingio\.com|sentry\.io'
+    ],
+    'sites': {
+        'Solis': {'permitir': [r'captcha'], 'bloquear': []},
+        'Solplanet': {'permitir': [r'captcha|verify|slider'], 'bloquear': []},
+        'Sungrow': {'permitir': [], 'bloquear': []},
+        'Growatt': {'permitir': [], 'bloquear': []},
+        'Shine': {'permitir': [], 'bloquear': []},
+        'PHB': {'permitir': [], 'bloquear': []}
     }
 }
 
 
+# Chromium de longa duração reaproveitado entre as execuções (ver navegador.py). Com 'ativo' False o navegador é aberto e fechado a cada execução.
+SERVIDOR_NAVEGADOR = {
+    'ativo': os.getenv('SERVIDOR_NAVEGADOR_ATIVO') == '1',
+    'headless': os.getenv('NAVEGADOR_HEADLESS') == '1',
+    'porta': int(os.getenv('SERVIDOR_NAVEGADOR_PORTA', '9333')),
+    'execucoes_maximas': 48,
+    'memoria_maxima_mb': 1500,
+    'timeout_conexao': 15
+}
+
+
+# Modo daemon (python main.py --daemon): intervalo entre o início de dois ciclos e a janela do dia em que os ciclos são executados
+DAEMON = {
+    'intervalo_ciclos': int(os.getenv('DAEMON_INTERVALO_MINUTOS', '60')) * 60, # segundos
+    'horario_inicio': time(hour=6, minute=0, second=0),
+    'horario_fim': time(hour=18, minute=30, second=0)
+}
+
+
+# Execução com um processo por grupo de sites (python main.py --processos). Sites que não estiverem em nenhum grupo recebem um processo próprio.
+PROCESSOS_SITES = {
+    'ativo': os.getenv('PROCESSOS_SITES_ATIVO') == '1',
+    'grupos': [
+        ['Solis'],
+        ['Solplanet'],
+        ['Sungrow'],
+        ['Growatt'],
+        ['PHB', 'Shine']
+    ]
+}
+
+
+# Fila de tarefas (site, conta, usina, fase) compartilhada entre as máquinas que monitoram as usinas (ver fila_tarefas.py)
+FILA_TAREFAS = {
+    'backend': os.getenv('FILA_TAREFAS_BACKEND', 'sqlite'), # 'sqlite' ou 'http'
+    'caminho': Path(CAMINHO_PASTA_CACHE, 'fila_tarefas.sqlite3'),
+    'url': os.getenv('FILA_TAREFAS_URL', 'http://127.0.0.1:8765'),
+    'token': os.getenv('FILA_TAREFAS_TOKEN', ''), # obrigatório para expor a fila fora de 127.0.0.1
+    'host': os.getenv('FILA_TAREFAS_HOST', '0.0.0.0'), # endereço em que python main.py --servidor-fila escuta
+    'visibilidade': 15 * 60, # segundos que uma tarefa arrendada fica invisível para os outros trabalhadores
+    'tentativas_maximas': 3,
+    'lote': 4, # tarefas arrendadas por vez por trabalhador
+    'intervalo_consulta': 30 # segundos entre consultas quando a fila está vazia
+}
+
+
+# Índice das usinas de cada conta nos sites: a página da lista onde cada usina aparece e o link direto dela, descobertos e guardados por 'validade' segundos (ver indice_usinas.py)
+INDICE_USINAS = {
+    'caminho': Path(CAMINHO_PASTA_CACHE, 'indice_usinas.json'),
+    'validade': 24 * 60 * 60,
+    'paginas_maximas': 50,
+    # Tempo máximo, em segundos, para o nome da usina aparecer na página aberta pelo link direto antes de o link ser descartado
+    'teto_conferencia': 10,
+    # Seletores dos nomes das usinas e do botão de próxima página na lista de usinas de cada site, e o padrão do id da usina no link direto
+    'listas': {
+        'Solis': {'nomes': 'div.station-name', 'proxima': 'button.btn-next', 'padrao_id': r'[?&#](?:id|stationId)=(\w+)'},
+        'Solplanet': {'nomes': 'td.ant-table-cell a, div.plant-name', 'proxima': 'li.ant-pagination-next', 'padrao_id': r'(?:plantId|plant_id|id)=(\w+)'},
+        'Sungrow': {'nomes': 'div.plant-name', 'proxima': 'button.btn-next', 'padrao_id': r'(?:ps_id|psId)=(\w+)'},
+        'Growatt': {'nomes': 'tbody#tbl_data_plant td.plantName', 'proxima': 'a.layui-laypage-next', 'padrao_id': r'(?:plantId|id)=(\w+)'}
+    }
+}
+
+
+# Modo de sondagem dos status (python main.py --sondagem): só os status dos inversores e o histórico de falhas, com um intervalo por usina (ver sondagem_status.py)
+SONDAGEM_STATUS = {
+    'caminho_agenda': Path(CAMINHO_PASTA_CACHE, 'agenda_sondagens.json'),
+    'intervalo_inicial': 15 * 60, # segundos
+    'intervalo_minimo': 5 * 60, # usado logo após uma anomalia
+    'intervalo_maximo': 60 * 60,
+    'fator_relaxamento': 1.5, # o intervalo é multiplicado por este fator após cada período estável
+    'sondagens_estaveis': 3, # sondagens seguidas sem anomalia que formam um período estável
+    'tique': 60 # segundos entre verificações das usinas que já podem ser sondadas
+}
+
+
+# Diário das execuções, usado pelo --resume para continuar uma execução interrompida sem refazer o que já foi concluído (ver diario_execucao.py)
+DIARIO_EXECUCAO = {
+    'pasta': Path(CAMINHO_PASTA_CACHE, 'Diários de execução'),
+    'manter': 30 # quantidade de diários guardados, os mais antigos são apagados
+}
+
+
+# Registro declarativo das usinas e das contas de acesso (ver registro_usinas.py). Pode ser um arquivo .json ou um banco .sqlite3
+REGISTRO_USINAS = {
+    'caminho': Path(os.getenv('REGISTRO_USINAS_CAMINHO', Path(CAMINHO_PASTA_RAIZ, 'usinas.json'))),
+    'intervalo_verificacao': 30 # segundos entre verificações de alteração do arquivo
+}
+
+# Etapas ignoradas em cada perfil de captura das usinas do registro (ver adaptadores/executor.py)
+PERFIS_CAPTURA = {
+    'padrao': [],
+    'sem_historico_falhas': ['verificar_falhas'],
+    'sem_dados_mensais': ['extrair_mes']
+}
+
+# Conteúdo usado para criar o registro quando o arquivo ainda não existe. As contas guardam apenas os nomes das variáveis de ambiente com o login e a senha
+REGISTRO_USINAS_PADRAO = {
+    'contas': {
+        'Solis': {'site': 'Solis', 'login_env': 'LOGIN_SOLIS', 'senha_env': 'SENHA_SOLIS'},
+        'Solplanet': {'site': 'Solplanet', 'login_env': 'LOGIN_SOLPLANET', 'senha_env': 'SENHA_SOLPLANET'},
+        'Sungrow': {'site': 'Sungrow', 'login_env': 'LOGIN_SUNGROW', 'senha_env': 'SENHA_SUNGROW'},
+        'Shine': {'site': 'Shine', 'login_env': 'LOGIN_SHINE', 'senha_env': 'SENHA_SHINE'},
+        'Growatt': {'site': 'Growatt', 'login_env': 'LOGIN_GROWATT', 'senha_env': 'SENHA_GROWATT'},
+        'PHB Imebras': {'site': 'PHB', 'login_env': 'LOGIN_PHB_IMEBRAS', 'senha_env': 'SENHA_PHB_IMEBRAS'}
+    },
+    'usinas': [
+        {'usina': 'Usina 1', 'site': 'Solis', 'conta': 'Solis'},
+        {'usina': 'Usina 2', 'site': 'Solis', 'conta': 'Solis'},
+        {'usina': 'Usina 3', 'site': 'Solis', 'conta': 'Solis'},
+        {'usina': 'Usina 4', 'site': 'Sungrow', 'conta': 'Sungrow'},
+        {'usina': 'Usina 5', 'site': 'Sungrow', 'conta': 'Sungrow'},
+        {'usina': 'Usina 6', 'site': 'Growatt', 'conta': 'Growatt'},
+        {'usina': 'Usina 7', 'site': 'Growatt', 'conta': 'Growatt'},
+        {'usina': 'Usina 8', 'site': 'PHB', 'conta': 'PHB Imebras'},
+        {'usina': 'Usina 9', 'site': 'PHB', 'conta': 'PHB Imebras'},
+        {'usina': 'Usina 10', 'site': 'Solplanet', 'conta': 'Solplanet'},
+        {'usina': 'Usina 11', 'site': 'Solplanet', 'conta': 'Solplanet'},
+        {'usina': 'Usina 12', 'site': 'Shine', 'conta': 'Shine'}
+    ]
+}
+
+
 remetente = os.getenv('REMETENTE_AVISOS_MONITORAMENTO')
 
+senha_de_app = os.getenv('SENHA_DE_APP')
+
 destinatario = os.getenv('DESTINATARIO')
 
 host = os.getenv('HOST')
 
 porta = os.getenv('PORTA')
+
+
+# Envio dos emails em segundo plano por uma única sessão SMTP (ver fila_emails.py)
+NOTIFICACOES_EMAIL = {
+    'tentativas': 5, # tentativas de envio de cada email antes de descartá-lo
+    'espera_inicial': 2, # segundos antes de reconectar após a primeira falha, dobrando a cada falha
+    'espera_maxima': 60,
+    'ociosidade': 300, # segundos sem emails até a sessão SMTP ser fechada
+    'tempo_encerramento': 30 # segundos para enviar os emails pendentes no fim do processo
+}
+
+
+# Resumo dos alertas: os avisos são acumulados e enviados em um único email por destinatário no fim de cada site ou a cada 'intervalo_envio' segundos (ver resumo_alertas.py)
+RESUMO_ALERTAS = {
+    'intervalo_envio': 30 * 60,
+    # As gravidades enviadas na hora, sem esperar o resumo
+    'imediatas': ['critica'],
+    # Gravidade de cada alerta, por 'config_do_email/tipo_da_falha' ou só por config_do_email
+    'gravidades': {
+        'erro_no_codigo': 'critica',
+        'inversor_offline': 'alta',
+        'historico_de_falhas/pendente': 'alta',
+        'historico_de_falhas/aviso': 'media',
+        'historico_de_falhas/resolvida': 'baixa',
+        'historico_de_falhas': 'media'
+    },
+    'miniatura': (480, 270) # tamanho máximo das miniaturas dos prints no corpo do resumo
+}
+
+
+# Preparação dos prints anexados aos emails: recorte, redução e recodificação dentro de um orçamento de bytes por mensagem (ver anexos_email.py)
+ANEXOS_EMAIL = {
+    'formato': 'JPEG', # 'JPEG' ou 'WEBP'
+    'qualidade': 80,
+    'qualidade_minima': 40,
+    'largura_maxima': 1280,
+    'altura_maxima': 4000,
+    'recortar_bordas': True,
+    'orcamento_bytes': 4 * 1024 ** 2, # abaixo do limite de 25 MB dos provedores mesmo depois da codificação base64
+    'pasta': Path(CAMINHO_PASTA_CACHE, 'Anexos dos emails'),
+    'manter_dias': 7
+}
+
+
+# Limite dos emails de erro no código: um balde de fichas por site e erro, as repetições sem fichas são suprimidas e resumidas no próximo email (ver limite_erros.py)
+LIMITE_EMAILS_ERRO = {
+    'caminho': Path(CAMINHO_PASTA_CACHE, 'limite_emails_erro.json'),
+    'capacidade': 2, # emails seguidos do mesmo erro antes da supressão
+    'recarga_por_hora': 0.5,
+    'esquecer_apos': 7 * 24 * 60 * 60 # segundos sem o erro até a chave ser esquecida
+}
+
+
+# Gravação dos prints em segundo plano por um pool de processos (ver codificacao_prints.py)
+CODIFICACAO_PRINTS = {
+    'processos': max(1, min(4, (os.cpu_count() or 2) - 1)),
+    'nivel_compressao_png': 9, # 0 a 9, o PNG principal continua sem perdas
+    # Cópia opcional em outro formato, por exemplo {'formato': 'WEBP', 'qualidade': 90, 'pasta': Path(CAMINHO_PASTA_RAIZ, 'Arquivo de prints')}
+    'copia': None
+}
+
+
+# Armazém dos prints endereçado pelo conteúdo: os nomes dos prints são hard links para um único arquivo por conteúdo (ver armazem_prints.py)
+# Fica dentro da pasta dos prints porque os hard links precisam estar no mesmo disco
+ARMAZEM_PRINTS = {
+    'pasta': Path(CAMINHO_PASTA_PRINTS, '.armazem')
+}
+
+
+# Montagem dos docx mensais com os prints (ver organizacao_prints.py)
+# 'manifesto': cada dia só registra os prints em um manifesto da usina e o docx do mês é montado de uma vez no fim do mês (ou com python main.py --montar-docx)
+# 'diario': o docx do mês é aberto, recebe os prints do dia e é salvo novamente todos os dias, como antes
+# 'parcial_diario': no modo manifesto, grava também um docx pequeno só com os prints do dia
+# 'manter_meses': por quantos meses os manifestos já montados são mantidos, para o docx poder ser montado novamente
+# 'processos': quantos docx são criados ou montados ao mesmo tempo, cada um em um processo (1 mantém tudo no processo principal)
+DOCX_MENSAL = {
+    'modo': 'manifesto',
+    'pasta_manifestos': Path(CAMINHO_PASTA_DOCX, '.manifestos'),
+    'parcial_diario': False,
+    'manter_meses': 2,
+    'processos': max(1, min(4, (os.cpu_count() or 2) - 1))
+}
+
+
+# Redução dos prints inseridos nos docx (ver organizacao_prints.py): cada print é reduzido para os pixels que ocupa impresso em 'dpi' e recodificado em 'formato'
+# 'tamanhos' guarda a largura e a altura opcional em centímetros dos prints de cada site no docx, 'padrao' vale para os sites não listados
+IMAGENS_DOCX = {
+    'dpi': 150,
+    'formato': 'JPEG', # 'JPEG' ou 'PNG'
+    'qualidade': 85,
+    'tamanhos': {
+        'Shine': {'largura_cm': 18.3, 'altura_cm': 9.5},
+        'Sungrow': {'largura_cm': 18},
+        'padrao': {'largura_cm': 20}
+    }
+}
@@ -3,11 +3,11 @@
 import xlrd
 from playwright.async_api import Page
 import logging
-import asyncio
 from pathlib import Path
 from typing import Optional
 import json
 from config import *
+from prontidao import aguardar_carregamento_sumir, aguardar_seletor, aguardar_texto_mudar
 
 logger = logging.getLogger('Dados mensais')
 
@@ -25,10 +25,16 @@ logger.addHandler(file_handler)
 async def extrair_dados_mensais_solis(pagina_usina: Page, nome_usina: str) -> tuple:
     logger.info(f'Extraindo os dados mensais da usina {nome_usina}')
 
+    area_mes = pagina_usina.locator('div.feature-content div.grid-connected-box')
+
     await pagina_usina.get_by_role('button', name='Mês').click()
+    await aguardar_carregamento_sumir(pagina_usina, 'Solis')
+
+    texto_mes_atual = await area_mes.inner_text()
+
     await pagina_usina.get_by_role("button", name="").click()
 
-    await asyncio.sleep(1.2)
+    await aguardar_texto_mudar(area_mes, texto_mes_atual, teto=1.2)
 
     infos_mes = await pagina_usina.locator('div.feature-content div.grid-connected-box > div.grid-connected-item').all_inner_texts()
 
@@ -70,7 +76,7 @@ def processar_dados_mensais_solis(dados_extraidos: tuple[list[str], list[str]],
 
         dados_processados[descricao] = valor
 
-    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Solis', f'dados das usinas Solis mês {AGORA.month-1}.json')
+    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Solis', f'dados das usinas Solis mês {RELOGIO.agora.month-1}.json')
 
     try:
         with open(caminho_arquivo, 'r', encoding='utf-8') as arquivo_json:
@@ -99,18 +105,24 @@ def processar_dados_mensais_solplanet(dados_extraidos: dict, nome_usina: str):
 async def extrair_dados_mensais_sungrow(pagina_usina: Page, nome_usina: str) -> tuple:
     logger.info(f'Extraindo os dados mensais de geração e receita da usina Sungrow - {nome_usina}')
 
+    area_indicadores = pagina_usina.locator('div.indicator-area')
+
+    texto_anterior = await area_indicadores.inner_text()
+
     await pagina_usina.get_by_role('tab', name='Mensal').click()
-    await asyncio.sleep(2) # delay para esperar as animações terminarem
+    await aguardar_texto_mudar(area_indicadores, texto_anterior, teto=2)
+
+    texto_anterior = await area_indicadores.inner_text()
 
     await pagina_usina.locator('div.date-select-pannel > span.iconfont.icon-a-G2_Leftarrow_20').click()
-    await asyncio.sleep(1.5)
+    await aguardar_texto_mudar(area_indicadores, texto_anterior, teto=1.5)
 
-    info_geracao = await pagina_usina.locator('div.indicator-area').inner_text()
+    info_geracao = await area_indicadores.inner_text()
 
     await pagina_usina.get_by_role('tab', name='Vida útil').click()
-    await asyncio.sleep(2)
+    await aguardar_texto_mudar(area_indicadores, info_geracao, teto=2)
 
-    info_totais = await pagina_usina.locator('div.indicator-area').inner_text()
+    info_totais = await area_indicadores.inner_text()
 
     return info_geracao, info_totais
 
@@ -142,7 +154,7 @@ def processar_dados_mensais_sungrow(dados_extraidos: tuple[str, str], nome_usina
 
     dados_processados['Rendimento total'] = f'{qtd_geracao_total} {unidade_geracao_total}'
 
-    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Sungrow', f'dados das usinas Sungrow mês {AGORA.month-1}.json')
+    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Sungrow', f'dados das usinas Sungrow mês {RELOGIO.agora.month-1}.json')
 
     try:
         with open(caminho_arquivo, 'r', encoding='utf-8') as arquivo_json:
@@ -162,8 +174,8 @@ def processar_dados_mensais_sungrow(dados_extraidos: tuple[str, str], nome_usina
 async def extrair_dados_mensais_phb(pagina_usina: Page, nome_usina: str) -> tuple:
     logger.info(f'Extraindo dados mensais da usina {nome_usina}')
 
-    mes = f'0{DATA_ATUAL.month -1}' if DATA_ATUAL.month < 10 else str(DATA_ATUAL.month -1)
-    data_procurada = f'{mes}.{DATA_ATUAL.year}'
+    mes = f'0{RELOGIO.data.month -1}' if RELOGIO.data.month < 10 else str(RELOGIO.data.month -1)
+    data_procurada = f'{mes}.{RELOGIO.data.year}'
 
     geracao_total = await pagina_usina.locator('div.kpi-item.kpi-power.total-power ').filter(has_text='Geração Total').text_content()
 
@@ -174,7 +186,9 @@ async def extrair_dados_mensais_phb(pagina_usina: Page, nome_usina: str) -> tupl
     await pagina_usina.wait_for_load_state('networkidle')
 
     await pagina_usina.locator('div.goodwe-station-charts__export.fr').click()
-    await asyncio.sleep(3)
+
+    await aguardar_carregamento_sumir(pagina_usina, 'PHB')
+    await aguardar_seletor(pagina_usina, 'table.el-table__body tbody > tr', teto=3)
 
     linhas = await pagina_usina.locator('table.el-table__body tbody > tr').all()
 
@@ -203,7 +217,7 @@ def processar_dados_mensais_phb(dados_extraidos: tuple[str, str], nome_usina: st
         'Rendimento total': geracao_total
     }
 
-    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'PHB', f'dados das usinas PHB mês {AGORA.month-1}.json')
+    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'PHB', f'dados das usinas PHB mês {RELOGIO.agora.month-1}.json')
 
     try:
         with open(caminho_arquivo, 'r', encoding='utf-8') as arquivo_json:
@@ -225,11 +239,11 @@ async def extrair_dados_mensais_growatt(pagina_usina: Page, nome_usina: str):
     await pagina_usina.locator('ul.dateSelectUl1 > li').filter(has_text='Month').click()
 
     await pagina_usina.get_by_role('button', name='Export').first.click()
-    await asyncio.sleep(1)
+    await aguardar_seletor(pagina_usina, 'input[placeholder="Please select the month"]', teto=1)
 
     await pagina_usina.get_by_placeholder('Please select the month').clear()
 
-    await pagina_usina.get_by_placeholder('Please select the month').fill(f'{DATA_ATUAL.year}-{DATA_ATUAL.month-1}')
+    await pagina_usina.get_by_placeholder('Please select the month').fill(f'{RELOGIO.data.year}-{RELOGIO.data.month-1}')
     await pagina_usina.get_by_text('Export data').click()
 
     async with pagina_usina.context.expect_page() as nova_pag:
@@ -252,7 +266,7 @@ async def extrair_dados_mensais_growatt(pagina_usina: Page, nome_usina: str):
         logger.error(f"ERRO: O download do arquivo com as informações mensais falhou: {failure}")
 
     else:
-        await download.save_as(Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Growatt', f'{nome_usina} mês {DATA_ATUAL.month-1}.xls'))
+        await download.save_as(Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Growatt', f'{nome_usina} mês {RELOGIO.data.month-1}.xls'))
         logger.info('Download concluído com sucesso')
 
 
@@ -266,7 +280,7 @@ def processar_dados_mensais_growatt(nome_usina: str):
     """
     logger.info('Processanado os dados mensais...')
 
-    workbook = xlrd.open_workbook(Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Growatt', f'{nome_usina} mês {DATA_ATUAL.month-1}.xls'), formatting_info=True)
+    workbook = xlrd.open_workbook(Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Growatt', f'{nome_usina} mês {RELOGIO.data.month-1}.xls'), formatting_info=True)
 
     sheet = workbook.sheet_by_index(0)
 
@@ -283,7 +297,7 @@ def processar_dados_mensais_growatt(nome_usina: str):
         'Ganho total': ganhos_totais
     }
 
-    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Growatt', f'dados das usinas Growatt mês {AGORA.month-1}.json')
+    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Growatt', f'dados das usinas Growatt mês {RELOGIO.agora.month-1}.json')
 
     try:
         with open(caminho_arquivo, 'r', encoding='utf-8') as arquivo_json:
@@ -312,7 +326,7 @@ async def extrair_dados_mensais_shine(pagina_usina: Page, nome_usina: str) -> st
     """
     logger.info(f'Extraindo dados mensais da usina Shine - {nome_usina}')
 
-    data_procurada = f'{DATA_ATUAL.year}-0{DATA_ATUAL.month-1}' if DATA_ATUAL.month < 10 else f'{DATA_ATUAL.year}-{DATA_ATUAL.month-1}'
+    data_procurada = f'{RELOGIO.data.year}-0{RELOGIO.data.month-1}' if RELOGIO.data.month < 10 else f'{RELOGIO.data.year}-{RELOGIO.data.month-1}'
 
     await pagina_usina.get_by_role('link', name='Energia Ano').click()
 
@@ -329,11 +343,14 @@ async def extrair_dados_mensais_shine(pagina_usina: Page, nome_usina: str) -> st
 
     passo = 89 # Tamanho de cada barra do gráfico
 
+    tooltip = pagina_usina.locator('div#yearContainer div.echarts-tooltip.zr-element')
+    texto_tooltip = None
+
     for x in range(0, int(canvas_width), passo):
         await pagina_usina.mouse.move(canvas_x + x, canvas_y + canvas_height / 2)
-        await asyncio.sleep(0.3)
 
-        tooltip = pagina_usina.locator('div#yearContainer div.echarts-tooltip.zr-element')
+        # O tooltip é reaproveitado entre as barras, então a barra nova está pronta quando o texto dele mudar
+        await aguardar_texto_mudar(tooltip, texto_tooltip, teto=0.3)
 
         if await tooltip.is_visible():
             texto_tooltip = await tooltip.text_content()
@@ -359,7 +376,7 @@ def processar_dados_mensais_shine(geracao_mensal: str, nome_usina: str, geracao_
         'Rendimento total': geracao_total                  
     }
 
-    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Shine', f'dados das usinas Shine mês {AGORA.month-1}.json')
+    caminho_arquivo = Path(CAMINHO_PASTA_DADOS_MENSAIS, 'Shine', f'dados das usinas Shine mês {RELOGIO.agora.month-1}.json')
 
     try:
         with open(caminho_arquivo, 'r', encoding='utf-8') as arquivo_json:
@@ -0,0 +1,239 @@
+""" Este módulo contém o diário de uma execução do monitoramento, usado para retomar uma execução interrompida.
+
+O diário é um arquivo JSON Lines que só recebe linhas novas: o início da execução, cada etapa concluída de cada usina (com os prints gerados e o resultado parcial da usina), cada usina concluída e o fim da execução.
+Com python main.py --resume a última execução do dia que não chegou ao fim é retomada: as usinas concluídas são puladas e as suas informações voltam para RESULTADOS, e nas outras não são repetidas as etapas com efeitos fora do navegador (emails, linhas dos dados mensais).
+
+No modo fila (--fila) o diário não é usado, as tarefas da fila já guardam o que foi concluído."""
+
+import json
+import logging
+import os
+from typing import Optional
+from config import *
+from resultados import RESULTADOS
+
+
+logger = logging.getLogger('Diário de execução')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'diario_execucao.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+class DiarioExecucao:
+    """ Diário da execução atual. Enquanto nenhum diário estiver aberto (iniciar, retomar ou continuar) os métodos de registro não fazem nada. """
+
+    def __init__(self):
+        self.caminho: Optional[Path] = None
+
+        self._etapas: dict[tuple[str, str], set] = {}
+        self._resultados_parciais: dict[tuple[str, str], dict] = {}
+        self._usinas_concluidas: dict[tuple[str, str], dict] = {}
+
+
+    @property
+    def ativo(self) -> bool:
+        return self.caminho is not None
+
+
+    def iniciar(self) -> Path:
+        """ Começa um diário novo para a execução que começou em RELOGIO.agora. """
+        self._limpar_estado()
+
+        pasta = DIARIO_EXECUCAO['pasta']
+        pasta.mkdir(parents=True, exist_ok=True)
+
+        self.caminho = Path(pasta, f'execucao {RELOGIO.agora:%Y-%m-%d %H-%M-%S}.jsonl')
+        self._escrever({'tipo': 'inicio', 'inicio': RELOGIO.agora.isoformat()})
+
+        self._apagar_diarios_antigos()
+
+        return self.caminho
+
+
+    def retomar(self) -> bool:
+        """ Reabre o diário mais recente de hoje que não foi finalizado e volta o relógio para o início daquela execução, assim os prints já gravados continuam valendo.
+
+        Returns:
+            bool: False caso não exista execução de hoje para retomar.
+
+        """
+        for caminho in sorted(DIARIO_EXECUCAO['pasta'].glob('execucao *.jsonl'), reverse=True):
+            entradas = _ler_entradas(caminho)
+
+            if not entradas or entradas[0].get('tipo') != 'inicio':
+                continue
+
+            inicio = datetime.fromisoformat(entradas[0]['inicio'])
+
+            if inicio.date() != RELOGIO.data:
+                break
+
+            if any(entrada.get('tipo') == 'fim' for entrada in entradas):
+                break # a execução mais recente de hoje terminou, não há o que retomar
+
+            RELOGIO.atualizar(inicio)
+            self._carregar(caminho, entradas)
+
+            logger.info(f'Retomando a execução iniciada em {inicio:%d/%m/%Y %H:%M:%S}: {len(self._usinas_concluidas)} usinas já concluídas')
+            return True
+
+        logger.info('Nenhuma execução de hoje para retomar, iniciando uma nova')
+        return False
+
+
+    def continuar(self, caminho: Path):
+        """ Abre um diário já iniciado por outro processo, usado pelos processos dos grupos de sites (processos_sites.py). """
+        self._carregar(Path(caminho), _ler_entradas(Path(caminho)))
+
+
+    def finalizar(self):
+        if not self.ativo:
+            return
+
+        self._escrever({'tipo': 'fim'})
+
+        self.caminho = None
+        self._limpar_estado()
+
+
+    def etapa_concluida(self, site: str, usina: str, etapa: str) -> bool:
+        return etapa in self._etapas.get((site, usina), set())
+
+
+    def usina_concluida(self, site: str, usina: str) -> bool:
+        return (site, usina) in self._usinas_concluidas
+
+
+    def restaurar_resultado(self, site: str, usina: str):
+        """ Devolve para RESULTADOS o resultado registrado da usina (completo ou parcial), caso exista. """
+        resultado = self._usinas_concluidas.get((site, usina)) or self._resultados_parciais.get((site, usina))
+
+        if resultado:
+            RESULTADOS.registrar_resultado_usina(site, resultado)
+
+
+    def registrar_etapa(self, site: str, usina: str, etapa: str, inicio_etapa: float):
+        """ Registra a etapa concluída, os prints da usina gravados desde inicio_etapa (timestamp) e o resultado parcial da usina.
+
+        Args:
+            site (str): o nome do site.
+
+            usina (str): o nome da usina.
+
+            etapa (str): o nome da etapa do adaptador.
+
+            inicio_etapa (float): o timestamp do início da etapa.
+
+        """
+        if not self.ativo:
+            return
+
+        resultado = RESULTADOS.resultado_da_usina(site, usina)
+
+        self._etapas.setdefault((site, usina), set()).add(etapa)
+        self._resultados_parciais[(site, usina)] = resultado
+
+        self._escrever({
+            'tipo': 'etapa',
+            'site': site,
+            'usina': usina,
+            'etapa': etapa,
+            'artefatos': _prints_desde(site, usina, inicio_etapa),
+            'resultado': resultado
+        })
+
+
+    def registrar_usina(self, site: str, usina: str):
+        if not self.ativo:
+            return
+
+        resultado = RESULTADOS.resultado_da_usina(site, usina)
+        self._usinas_concluidas[(site, usina)] = resultado
+
+        self._escrever({'tipo': 'usina', 'site': site, 'usina': usina, 'resultado': resultado})
+
+
+    def _carregar(self, caminho: Path, entradas: list[dict]):
+        self._limpar_estado()
+        self.caminho = caminho
+
+        for entrada in entradas:
+            chave = (entrada.get('site'), entrada.get('usina'))
+
+            if entrada['tipo'] == 'etapa':
+                self._etapas.setdefault(chave, set()).add(entrada['etapa'])
+                self._resultados_parciais[chave] = entrada['resultado']
+
+            elif entrada['tipo'] == 'usina':
+                self._usinas_concluidas[chave] = entrada['resultado']
+
+
+    def _limpar_estado(self):
+        self._etapas.clear()
+        self._resultados_parciais.clear()
+        self._usinas_concluidas.clear()
+
+
+    def _escrever(self, entrada: dict):
+        entrada['horario'] = datetime.now().isoformat(timespec='seconds')
+
+        try:
+            # Uma linha por escrita em modo append, assim os processos dos grupos de sites podem escrever no mesmo diário
+            with open(self.caminho, 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+
+        except OSError as e:
+            logger.error(f'Não foi possível escrever no diário {self.caminho}: {e}')
+
+
+    def _apagar_diarios_antigos(self):
+        diarios = sorted(DIARIO_EXECUCAO['pasta'].glob('execucao *.jsonl'), reverse=True)
+
+        for caminho in diarios[DIARIO_EXECUCAO['manter']:]:
+            caminho.unlink(missing_ok=True)
+
+
+
+def _ler_entradas(caminho: Path) -> list[dict]:
+    entradas = []
+
+    try:
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                try:
+                    entradas.append(json.loads(linha))
+
+                except json.JSONDecodeError:
+                    logger.warning(f'Linha incompleta ignorada no diário {caminho}') # a última linha pode ter sido cortada pela interrupção
+
+    except OSError as e:
+        logger.error(f'Não foi possível ler o diário {caminho}: {e}')
+
+    return entradas
+
+
+
+def _prints_desde(site: str, usina: str, inicio: float) -> list[str]:
+    """ Os prints da usina registrados em RESULTADOS que foram tirados a partir de inicio. A data de modificação dos arquivos não serve, já que os prints idênticos dividem o mesmo conteúdo do armazém (armazem_prints.py). """
+    resultado = RESULTADOS.resultado_da_usina(site, usina)
+
+    if not resultado:
+        return []
+
+    return sorted(
+        dados['caminho'] for dados in resultado['prints'].values()
+        if dados.get('caminho') and (dados.get('capturado_em') or 0) >= inicio
+    )
+
+
+
+DIARIO = DiarioExecucao()
@@ -0,0 +1,392 @@
+""" Este módulo contém o escalonador adaptativo que controla quantos sites e quantas usinas são monitorados ao mesmo tempo.
+
+O limite de concorrência não é fixo: a cada intervalo o escalonador mede o uso de CPU, a memória livre, a quantidade de processos renderizadores do Chromium e a latência recente de cada etapa, aumentando ou reduzindo as vagas durante a execução.
+A referência de latência de cada etapa é guardada em LIMITES_ESCALONADOR['caminho_latencias'] e atualizada no fim de cada ciclo, assim o sinal de latência já vale desde as primeiras usinas do ciclo seguinte, mesmo nas contas com poucas usinas.
+Todas as decisões ficam registradas para que seja possível entender por que uma execução foi limitada."""
+
+import asyncio
+import json
+import logging
+import os
+import statistics
+from collections import deque
+from datetime import datetime
+from time import perf_counter
+from typing import Optional
+from config import *
+from trava_arquivo import arquivo_travado
+
+try:
+    import psutil
+
+except ImportError:
+    psutil = None # Sem o psutil as medições são feitas a partir do /proc e do os.getloadavg
+
+
+logger = logging.getLogger('Escalonador')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'escalonador.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+class VagasAdaptativas:
+    """ Semáforo assíncrono cujo limite de vagas pode ser alterado durante a execução.
+
+    Pode ser usado com 'async with' da mesma forma que um asyncio.Semaphore.
+    """
+
+    def __init__(self, nome: str, limite_inicial: int, limite_minimo: int, limite_maximo: int):
+        self.nome = nome
+        self.limite = limite_inicial
+        self.limite_minimo = limite_minimo
+        self.limite_maximo = limite_maximo
+
+        self.em_uso = 0
+        self.aguardando = 0
+
+        self._condicao = asyncio.Condition()
+
+
+    async def __aenter__(self):
+        async with self._condicao:
+            self.aguardando += 1
+
+            try:
+                await self._condicao.wait_for(lambda: self.em_uso < self.limite)
+
+            finally:
+                self.aguardando -= 1
+
+            self.em_uso += 1
+
+
+    async def __aexit__(self, *args):
+        async with self._condicao:
+            self.em_uso -= 1
+            self._condicao.notify_all()
+
+
+    async def ajustar_limite(self, novo_limite: int) -> int:
+        """ Altera o limite de vagas respeitando o mínimo e o máximo configurados e libera quem estiver aguardando.
+
+        Returns:
+            int: o limite efetivamente aplicado.
+        """
+        async with self._condicao:
+            self.limite = max(self.limite_minimo, min(novo_limite, self.limite_maximo))
+            self._condicao.notify_all()
+
+        return self.limite
+
+
+
+class EscalonadorAdaptativo:
+    """ Controla a admissão dos sites e das usinas a partir de sinais medidos da máquina e do navegador.
+
+    O próprio escalonador é usado com 'async with' para ocupar a vaga de um site, enquanto vaga_usina() devolve a vaga de uma usina.
+    As vagas de sites e de usinas são independentes, assim um site que aguarda suas usinas não impede outro site de ser admitido.
+    """
+
+    def __init__(self, configuracao: dict = LIMITES_ESCALONADOR):
+        self.configuracao = configuracao
+
+        self.vagas_sites = VagasAdaptativas('sites', **configuracao['sites'])
+        self.vagas_usinas = VagasAdaptativas('usinas', **configuracao['usinas'])
+
+        self.latencias: dict[str, deque] = {}
+        self.latencias_base: dict[str, float] = _carregar_latencias_base(configuracao['caminho_latencias'])
+
+        self.decisoes = []
+
+        self._tarefa_ajuste: Optional[asyncio.Task] = None
+        self._inicio = perf_counter()
+
+
+    async def __aenter__(self):
+        await self.vagas_sites.__aenter__()
+
+
+    async def __aexit__(self, *args):
+        await self.vagas_sites.__aexit__(*args)
+
+
+    def vaga_usina(self) -> VagasAdaptativas:
+        return self.vagas_usinas
+
+
+    def registrar_latencia(self, etapa: str, segundos: float):
+        """ Registra quanto tempo uma etapa levou. Caso a etapa ainda não tenha referência guardada, a mediana das primeiras medições vira a referência dela.
+
+        Args:
+            etapa (str): identificação da etapa, por exemplo 'usina Solis'.
+
+            segundos (float): a duração medida.
+
+        """
+        amostras = self.latencias.setdefault(etapa, deque(maxlen=self.configuracao['amostras_latencia']))
+        amostras.append(segundos)
+
+        if etapa not in self.latencias_base and len(amostras) >= self.configuracao['amostras_base']:
+            self.latencias_base[etapa] = statistics.median(amostras)
+
+
+    def iniciar(self):
+        """ Inicia a tarefa em segundo plano que reavalia os limites periodicamente. """
+        if psutil:
+            psutil.cpu_percent(interval=None) # A primeira leitura do psutil sempre retorna 0, ela apenas inicia a medição
+
+        self._tarefa_ajuste = asyncio.create_task(self._ciclo_de_ajuste())
+
+
+    async def encerrar(self):
+        """ Interrompe a reavaliação dos limites, guarda as referências de latência e salva as métricas das decisões tomadas. """
+        if self._tarefa_ajuste:
+            self._tarefa_ajuste.cancel()
+
+            try:
+                await self._tarefa_ajuste
+
+            except asyncio.CancelledError:
+                pass
+
+        self.guardar_latencias_base()
+        self.salvar_metricas()
+
+
+    async def _ciclo_de_ajuste(self):
+        while True:
+            await asyncio.sleep(self.configuracao['intervalo_ajuste'])
+
+            try:
+                await self.reavaliar()
+
+            except Exception as e:
+                logger.error(f'Erro ao reavaliar os limites de concorrência: {e}')
+
+
+    async def medir_sinais(self) -> dict:
+        """ Mede os sinais usados nas decisões do escalonador.
+
+        Returns:
+            dict: uso de CPU (%), memória livre (MB), quantidade de renderizadores do Chromium e as etapas cuja latência recente está degradada.
+        """
+        # A varredura dos processos da máquina pode levar centenas de milissegundos, então as medições do sistema rodam fora do loop de eventos
+        cpu, memoria_livre, renderizadores = await asyncio.to_thread(lambda: (_medir_cpu(), _medir_memoria_livre(), _contar_renderizadores_chromium()))
+
+        etapas_lentas = []
+
+        for etapa, amostras in self.latencias.items():
+            base = self.latencias_base.get(etapa)
+
+            if base and statistics.mean(amostras) > base * self.configuracao['fator_latencia']:
+                etapas_lentas.append(etapa)
+
+        return {
+            'cpu': cpu,
+            'memoria_livre_mb': memoria_livre,
+            'renderizadores': renderizadores,
+            'etapas_lentas': etapas_lentas
+        }
+
+
+    async def reavaliar(self):
+        """ Mede os sinais e aumenta ou reduz uma vaga de sites e de usinas conforme a situação.
+
+        A concorrência é reduzida quando qualquer sinal passa do seu limite e só é aumentada quando todos estão folgados e há trabalho aguardando vaga.
+        """
+        sinais = await self.medir_sinais()
+        config = self.configuracao
+
+        motivos = []
+
+        if sinais['cpu'] is not None and sinais['cpu'] > config['cpu_maximo']:
+            motivos.append(f"CPU em {sinais['cpu']:.0f}%")
+
+        if sinais['memoria_livre_mb'] is not None and sinais['memoria_livre_mb'] < config['memoria_livre_minima_mb']:
+            motivos.append(f"memória livre em {sinais['memoria_livre_mb']:.0f} MB")
+
+        if sinais['renderizadores'] is not None and sinais['renderizadores'] > config['renderizadores_maximo']:
+            motivos.append(f"{sinais['renderizadores']} renderizadores do Chromium")
+
+        if sinais['etapas_lentas']:
+            motivos.append(f"latência degradada em {', '.join(sinais['etapas_lentas'])}")
+
+        folgado = (
+            not motivos
+            and (sinais['cpu'] is None or sinais['cpu'] < config['cpu_maximo'] * 0.6)
+            and (sinais['memoria_livre_mb'] is None or sinais['memoria_livre_mb'] > config['memoria_livre_minima_mb'] * 2)
+        )
+
+        if motivos:
+            acao = 'reduzir'
+            variacao = -1
+
+        elif folgado and (self.vagas_sites.aguardando or self.vagas_usinas.aguardando):
+            acao = 'aumentar'
+            variacao = 1
+            motivos.append('recursos folgados e trabalho aguardando vaga')
+
+        else:
+            acao = 'manter'
+            variacao = 0
+
+        limite_sites_anterior = self.vagas_sites.limite
+        limite_usinas_anterior = self.vagas_usinas.limite
+
+        if variacao:
+            if self.vagas_sites.aguardando or variacao < 0:
+                await self.vagas_sites.ajustar_limite(self.vagas_sites.limite + variacao)
+
+            if self.vagas_usinas.aguardando or variacao < 0:
+                await self.vagas_usinas.ajustar_limite(self.vagas_usinas.limite + variacao)
+
+        decisao = {
+            'horario': datetime.now().isoformat(timespec='seconds'),
+            'segundos_desde_inicio': round(perf_counter() - self._inicio, 1),
+            'acao': acao,
+            'motivo': '; '.join(motivos),
+            'sinais': sinais,
+            'limite_sites': self.vagas_sites.limite,
+            'limite_usinas': self.vagas_usinas.limite,
+            'sites_em_uso': self.vagas_sites.em_uso,
+            'sites_aguardando': self.vagas_sites.aguardando,
+            'usinas_em_uso': self.vagas_usinas.em_uso,
+            'usinas_aguardando': self.vagas_usinas.aguardando
+        }
+
+        self.decisoes.append(decisao)
+
+        if (limite_sites_anterior, limite_usinas_anterior) != (self.vagas_sites.limite, self.vagas_usinas.limite):
+            logger.info(
+                f'Limites alterados: sites {limite_sites_anterior} -> {self.vagas_sites.limite}, '
+                f'usinas {limite_usinas_anterior} -> {self.vagas_usinas.limite}. Motivo: {decisao["motivo"]}'
+            )
+
+
+    def guardar_latencias_base(self):
+        """ Atualiza as referências guardadas com a mediana das latências deste ciclo, pesada por LIMITES_ESCALONADOR['peso_base_nova'].
+
+        O arquivo é relido com a trava, assim os processos dos sites (processos_sites.py) só alteram as etapas que mediram.
+        """
+        if not self.latencias:
+            return
+
+        caminho = self.configuracao['caminho_latencias']
+        peso = self.configuracao['peso_base_nova']
+
+        try:
+            with arquivo_travado(caminho):
+                guardadas = _carregar_latencias_base(caminho)
+
+                for etapa, amostras in self.latencias.items():
+                    mediana = statistics.median(amostras)
+                    guardadas[etapa] = guardadas[etapa] * (1 - peso) + mediana * peso if etapa in guardadas else mediana
+
+                caminho_temporario = caminho.with_suffix(caminho.suffix + f'.{os.getpid()}.tmp')
+
+                with open(caminho_temporario, 'w', encoding='utf-8') as arquivo_json:
+                    json.dump(guardadas, arquivo_json, ensure_ascii=False, indent=4)
+
+                os.replace(caminho_temporario, caminho)
+
+        except OSError as e:
+            logger.error(f'Não foi possível guardar as referências de latência do escalonador: {e}')
+
+
+    def salvar_metricas(self):
+        """ Salva as decisões do escalonador em um json na pasta de logs, um arquivo por execução. """
+        caminho_arquivo = Path(CAMINHO_PASTA_LOGS, f'escalonador {datetime.now():%Y-%m-%d %H-%M-%S}.json')
+
+        metricas = {
+            'configuracao': self.configuracao,
+            'latencias_base': self.latencias_base,
+            'decisoes': self.decisoes
+        }
+
+        try:
+            with open(caminho_arquivo, 'w', encoding='utf-8') as arquivo_json:
+                json.dump(metricas, arquivo_json, ensure_ascii=False, indent=4, default=str)
+
+        except OSError as e:
+            logger.error(f'Não foi possível salvar as métricas do escalonador: {e}')
+
+
+
+def _carregar_latencias_base(caminho: Path) -> dict[str, float]:
+    try:
+        with open(caminho, 'r', encoding='utf-8') as arquivo_json:
+            return json.load(arquivo_json)
+
+    except FileNotFoundError:
+        return {}
+
+    except (OSError, ValueError) as e:
+        logger.warning(f'Não foi possível ler as referências de latência do escalonador, elas serão recriadas: {e}')
+        return {}
+
+
+
+def _medir_cpu() -> Optional[float]:
+    if psutil:
+        return psutil.cpu_percent(interval=None)
+
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+
+    except (AttributeError, OSError):
+        return None
+
+
+
+def _medir_memoria_livre() -> Optional[float]:
+    if psutil:
+        return psutil.virtual_memory().available / 1024 ** 2
+
+    try:
+        with open('/proc/meminfo', encoding='utf-8') as meminfo:
+            for linha in meminfo:
+                if linha.startswith('MemAvailable:'):
+                    return int(linha.split()[1]) / 1024
+
+    except OSError:
+        return None
+
+
+
+def _contar_renderizadores_chromium() -> Optional[int]:
+    if psutil:
+        contador = 0
+
+        for processo in psutil.process_iter(['cmdline']):
+            try:
+                if '--type=renderer' in (processo.info['cmdline'] or []):
+                    contador += 1
+
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        return contador
+
+    pasta_proc = Path('/proc')
+
+    if not pasta_proc.exists():
+        return None
+
+    contador = 0
+
+    for caminho_cmdline in pasta_proc.glob('[0-9]*/cmdline'):
+        try:
+            if b'--type=renderer' in caminho_cmdline.read_bytes():
+                contador += 1
+
+        except OSError:
+            continue
+
+    return contador
@@ -0,0 +1,75 @@
+""" Este módulo contém a camada de extração em lote do DOM usada pelas funções de análise dos inversores.
+
+Em vez de buscar os elementos com locator.all() e depois ler o texto de cada linha ou card separadamente (uma ida e volta ao navegador por elemento), toda a tabela ou conjunto de cards é lido em uma única chamada evaluate_all e devolvido como linhas tipadas."""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+from playwright.async_api import Locator
+from config import *
+
+
+logger = logging.getLogger('Extração DOM')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'extracao_dom.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+# Para cada elemento: textContent, innerText, o texto das células (td/th) e o texto visível de todos os elementos de cada sub-seletor
+_SCRIPT_EXTRAIR_LINHAS = """
+(elementos, campos) => elementos.map(elemento => ({
+    texto: elemento.textContent || '',
+    texto_visivel: elemento.innerText || '',
+    celulas: Array.from(elemento.querySelectorAll(':scope > td, :scope > th')).map(celula => celula.innerText || ''),
+    campos: Object.fromEntries(Object.entries(campos).map(([nome, seletor]) => [
+        nome,
+        Array.from(elemento.querySelectorAll(seletor)).map(filho => filho.innerText || '')
+    ]))
+}))
+"""
+
+
+
+@dataclass
+class LinhaExtraida:
+    """ Uma linha de tabela ou card lido do DOM.
+
+    Attributes:
+        texto (str): o textContent do elemento, equivalente ao locator.text_content().
+
+        texto_visivel (str): o innerText do elemento, equivalente ao locator.inner_text().
+
+        celulas (list[str]): o texto visível de cada célula td/th filha direta, vazio para elementos que não são linhas de tabela.
+
+        campos (dict[str, list[str]]): para cada sub-seletor pedido, o texto visível de todos os elementos encontrados dentro do elemento, na ordem do documento.
+    """
+    texto: str
+    texto_visivel: str
+    celulas: list[str] = field(default_factory=list)
+    campos: dict[str, list[str]] = field(default_factory=dict)
+
+
+
+async def extrair_linhas(locator: Locator, campos: Optional[dict[str, str]] = None) -> list[LinhaExtraida]:
+    """ Lê todos os elementos do locator em uma única ida e volta ao navegador.
+
+    Args:
+        locator (Locator): o locator que corresponde às linhas ou cards (por exemplo 'tbody > tr').
+
+        campos (dict[str, str]): sub-seletores que devem ser lidos dentro de cada elemento, no formato {nome do campo: seletor css}.
+
+    Returns:
+        list[LinhaExtraida]: uma linha para cada elemento encontrado, na ordem do documento. Lista vazia caso nenhum elemento exista.
+
+    """
+    dados = await locator.evaluate_all(_SCRIPT_EXTRAIR_LINHAS, campos or {})
+
+    logger.info(f'{len(dados)} elementos de "{locator}" extraídos em 1 ida e volta')
+
+    return [LinhaExtraida(**dado) for dado in dados]
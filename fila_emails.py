@@ -0,0 +1,201 @@
+""" Este módulo contém a fila dos emails de aviso, enviados em segundo plano por uma única sessão SMTP.
+
+enviar_email (monitoramento.py) apenas monta a mensagem e a coloca na fila, assim um aviso nunca bloqueia o loop de eventos (e todos os sites) durante o handshake TLS e o envio.
+Uma thread trabalhadora retira as mensagens da fila e as envia reaproveitando a mesma conexão autenticada. Caso o envio falhe a conexão é refeita com espera exponencial, até NOTIFICACOES_EMAIL['tentativas'] vezes por mensagem, e uma conexão parada por mais de NOTIFICACOES_EMAIL['ociosidade'] segundos é fechada antes de o servidor derrubá-la.
+Os prints anexados são recortados, reduzidos e recodificados pela própria thread antes do envio (anexos_email.py).
+A thread é usada, e não uma tarefa do asyncio, porque enviar_email também é chamada fora do loop (organização dos prints, processos dos sites) e o yagmail é síncrono.
+
+Os emails pendentes são enviados antes de o processo terminar (FILA_EMAILS.encerrar em main.py e no atexit, FILA_EMAILS.esvaziar no fim de cada processo dos sites)."""
+
+import atexit
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from time import perf_counter, sleep
+from typing import Any, Callable, Optional, Union
+import yagmail
+from config import *
+from anexos_email import limpar_anexos_antigos, preparar_anexos
+
+
+logger = logging.getLogger('Fila de emails')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'fila_emails.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+@dataclass
+class Email:
+    destinatario: str
+    assunto: str
+    # O yagmail aceita uma lista com textos e imagens inline (yagmail.inline). Uma função é chamada pela thread no momento do envio, para montar o corpo fora do loop de eventos
+    corpo: Union[str, list, Callable[[], list]]
+    anexos: Union[Path, list, None] = None
+    enfileirado_em: float = field(default_factory=perf_counter)
+
+
+
+def conectar_smtp() -> Any:
+    """ Abre a sessão SMTP autenticada com as credenciais do config. O objeto retornado precisa ter send(to, subject, contents, attachments) e close(), como o yagmail.SMTP. """
+    return yagmail.SMTP(user=remetente, password=senha_de_app, host=host, port=porta)
+
+
+
+class FilaEmails:
+    """ Fila dos emails enviados em segundo plano por uma thread com uma única sessão SMTP.
+
+    Args:
+        conectar (Callable): cria a sessão SMTP, por padrão conectar_smtp. Os benchmarks usam uma sessão com um servidor SMTP local.
+
+    """
+
+    def __init__(self, conectar: Callable[[], Any] = conectar_smtp):
+        self.conectar = conectar
+        self.enviados = 0
+        self.descartados = 0
+
+        self._fila: queue.Queue[Optional[Email]] = queue.Queue()
+        self._sessao = None
+        self._thread: Optional[threading.Thread] = None
+        self._trava = threading.Lock()
+
+
+    def enfileirar(self, destinatario: str, assunto: str, corpo: Union[str, list, Callable[[], list]], anexos: Union[Path, list, None] = None):
+        """ Coloca o email na fila e retorna imediatamente, iniciando a thread trabalhadora caso ela ainda não exista. """
+        self._iniciar()
+        self._fila.put_nowait(Email(destinatario, assunto, corpo, anexos))
+
+
+    def esvaziar(self, teto: float = NOTIFICACOES_EMAIL['tempo_encerramento']) -> bool:
+        """ Aguarda os emails pendentes serem enviados (ou descartados) sem parar a thread.
+
+        Args:
+            teto (float): o tempo máximo de espera em segundos.
+
+        Returns:
+            bool: True caso a fila tenha esvaziado antes do teto.
+
+        """
+        limite = perf_counter() + teto
+
+        while self._fila.unfinished_tasks:
+            if perf_counter() >= limite or not (self._thread and self._thread.is_alive()):
+                logger.error(f'{self._fila.unfinished_tasks} emails não foram enviados antes do encerramento')
+                return False
+
+            sleep(0.05)
+
+        return True
+
+
+    def encerrar(self, teto: float = NOTIFICACOES_EMAIL['tempo_encerramento']):
+        """ Envia os emails pendentes, para a thread e fecha a sessão SMTP. """
+        with self._trava:
+            thread = self._thread
+
+            if thread is None:
+                return
+
+            self._thread = None
+
+        self._fila.put_nowait(None)
+        thread.join(teto)
+
+        if thread.is_alive():
+            logger.error(f'A thread da fila de emails não terminou em {teto}s, {self._fila.qsize()} emails pendentes foram perdidos')
+
+        logger.info(f'Fila de emails encerrada: {self.enviados} enviados, {self.descartados} descartados')
+
+
+    def _iniciar(self):
+        with self._trava:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._trabalhar, name='fila-emails', daemon=True)
+                self._thread.start()
+
+
+    def _trabalhar(self):
+        limpar_anexos_antigos()
+
+        while True:
+            try:
+                email = self._fila.get(timeout=NOTIFICACOES_EMAIL['ociosidade'])
+
+            except queue.Empty:
+                self._fechar_sessao()
+                continue
+
+            try:
+                if email is None:
+                    return
+
+                self._enviar(email)
+
+            finally:
+                self._fila.task_done()
+
+                if email is None:
+                    self._fechar_sessao()
+
+
+    def _enviar(self, email: Email):
+        espera = NOTIFICACOES_EMAIL['espera_inicial']
+
+        try:
+            corpo = email.corpo() if callable(email.corpo) else email.corpo
+            anexos = preparar_anexos(email.anexos) if email.anexos else None
+
+        except Exception as e:
+            logger.error(f'Erro ao preparar o email "{email.assunto}", ele será enviado com os prints originais: {e}')
+            corpo = email.assunto if callable(email.corpo) else email.corpo
+            anexos = email.anexos
+
+        for tentativa in range(1, NOTIFICACOES_EMAIL['tentativas'] + 1):
+            try:
+                if self._sessao is None:
+                    self._sessao = self.conectar()
+
+                self._sessao.send(to=email.destinatario, subject=email.assunto, contents=corpo, attachments=anexos)
+
+            except Exception as e:
+                logger.warning(f'Falha no envio do email "{email.assunto}" (tentativa {tentativa}): {e}')
+                self._fechar_sessao()
+
+                if tentativa < NOTIFICACOES_EMAIL['tentativas']:
+                    sleep(espera)
+                    espera = min(espera * 2, NOTIFICACOES_EMAIL['espera_maxima'])
+
+            else:
+                self.enviados += 1
+                logger.info(f'Email "{email.assunto}" enviado para {email.destinatario} ({perf_counter() - email.enfileirado_em:.1f}s na fila)')
+                return
+
+        self.descartados += 1
+        logger.error(f'Email "{email.assunto}" descartado após {NOTIFICACOES_EMAIL["tentativas"]} tentativas')
+
+
+    def _fechar_sessao(self):
+        if self._sessao is None:
+            return
+
+        try:
+            self._sessao.close()
+
+        except Exception as e:
+            logger.warning(f'Erro ao fechar a sessão SMTP: {e}')
+
+        self._sessao = None
+
+
+
+FILA_EMAILS = FilaEmails()
+
+atexit.register(FILA_EMAILS.encerrar)
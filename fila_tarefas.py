@@ -0,0 +1,445 @@
+""" Este módulo contém a fila de tarefas que permite dividir o monitoramento das usinas entre várias máquinas.
+
+Cada tarefa é uma unidade (site, conta, usina, fase) de um ciclo. Qualquer quantidade de trabalhadores pode arrendar tarefas: o arrendamento tem um prazo de visibilidade e, se o trabalhador cair sem concluir, a tarefa volta a ficar disponível quando o prazo vencer.
+A conclusão é idempotente, então uma tarefa concluída duas vezes (por exemplo por um trabalhador cujo prazo venceu e outro que a arrendou de novo) fica com apenas um registro de conclusão.
+Ao enfileirar um novo ciclo as tarefas não terminadas dos ciclos anteriores são expiradas, para não serem executadas junto com as do novo ciclo.
+
+O backend padrão é um arquivo SQLite local (FilaSQLite). Para várias máquinas a mesma fila pode ser exposta por HTTP com criar_servidor_fila e acessada pelos trabalhadores com FilaHTTP, que tem a mesma interface. Fora de 127.0.0.1 o servidor exige FILA_TAREFAS['token']."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Protocol
+from urllib.request import Request, urlopen
+from config import *
+
+
+logger = logging.getLogger('Fila de tarefas')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'fila_tarefas.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+@dataclass
+class Tarefa:
+    id: str
+    ciclo: str
+    site: str
+    conta: str
+    usina: str
+    fase: str
+    tentativas: int = 0
+    trabalhador: Optional[str] = None
+    expira_em: Optional[float] = None
+
+
+
+def criar_tarefa(ciclo: str, site: str, conta: str, usina: str, fase: str = 'monitoramento') -> Tarefa:
+    """ Cria a tarefa com um id determinístico, assim enfileirar a mesma unidade duas vezes no mesmo ciclo não cria uma tarefa repetida.
+
+    Args:
+        ciclo (str): a identificação do ciclo, por exemplo a data '2025-07-01'.
+
+        site (str): o nome do site.
+
+        conta (str): o login usado para acessar a usina.
+
+        usina (str): o nome da usina.
+
+        fase (str): a etapa do monitoramento que a tarefa representa.
+
+    Returns:
+        Tarefa: a tarefa ainda não enfileirada.
+
+    """
+    chave = '|'.join((ciclo, site, conta or '', usina, fase))
+    id_tarefa = hashlib.sha256(chave.encode('utf-8')).hexdigest()[:16]
+
+    return Tarefa(id_tarefa, ciclo, site, conta or '', usina, fase)
+
+
+
+class BackendFila(Protocol):
+    """ Interface comum aos backends da fila. """
+
+    def enfileirar(self, tarefas: list[Tarefa]) -> int: ...
+
+    def arrendar(self, trabalhador: str, quantidade: int = 1, visibilidade: Optional[float] = None) -> list[Tarefa]: ...
+
+    def renovar(self, id_tarefa: str, trabalhador: str, visibilidade: Optional[float] = None) -> bool: ...
+
+    def concluir(self, id_tarefa: str, trabalhador: str, resultado: Optional[dict] = None) -> bool: ...
+
+    def devolver(self, id_tarefa: str, trabalhador: str) -> bool: ...
+
+    def resumo(self, ciclo: str) -> dict: ...
+
+    def resultados(self, ciclo: str) -> list[dict]: ...
+
+
+
+class FilaSQLite:
+    """ Fila de tarefas guardada em um arquivo SQLite. Segura para vários processos na mesma máquina (ou em um disco compartilhado com travas confiáveis). """
+
+    def __init__(self, caminho: Optional[Path] = None, visibilidade: Optional[float] = None, tentativas_maximas: Optional[int] = None):
+        self.caminho = Path(caminho or FILA_TAREFAS['caminho'])
+        self.visibilidade = visibilidade or FILA_TAREFAS['visibilidade']
+        self.tentativas_maximas = tentativas_maximas or FILA_TAREFAS['tentativas_maximas']
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        conexao = sqlite3.connect(self.caminho, timeout=30)
+
+        try:
+            conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS tarefas (
+                    id TEXT PRIMARY KEY,
+                    ciclo TEXT NOT NULL,
+                    site TEXT NOT NULL,
+                    conta TEXT NOT NULL,
+                    usina TEXT NOT NULL,
+                    fase TEXT NOT NULL,
+                    estado TEXT NOT NULL DEFAULT 'pendente',
+                    tentativas INTEGER NOT NULL DEFAULT 0,
+                    trabalhador TEXT,
+                    expira_em REAL,
+                    criada_em REAL NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS tarefas_disponiveis ON tarefas (estado, expira_em, criada_em);
+
+                CREATE TABLE IF NOT EXISTS conclusoes (
+                    id_tarefa TEXT PRIMARY KEY REFERENCES tarefas (id),
+                    trabalhador TEXT NOT NULL,
+                    concluida_em REAL NOT NULL,
+                    resultado TEXT
+                );
+            """)
+
+        finally:
+            conexao.close()
+
+
+    def _conectar(self) -> '_ConexaoTransacional':
+        conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        conexao.execute('PRAGMA journal_mode=WAL')
+
+        return _ConexaoTransacional(conexao)
+
+
+    def enfileirar(self, tarefas: list[Tarefa]) -> int:
+        """ Adiciona as tarefas que ainda não existem na fila e retorna quantas foram adicionadas.
+
+        As tarefas pendentes ou arrendadas de outros ciclos (de um coordenador que caiu ou foi interrompido) passam a 'expirada' e não são mais arrendadas,
+        assim o novo ciclo não monitora de novo as mesmas usinas nem repete os avisos delas.
+
+        """
+        agora = datetime.now().timestamp()
+        ciclos = sorted({tarefa.ciclo for tarefa in tarefas})
+
+        with self._conectar() as conexao:
+            antes = conexao.total_changes
+
+            conexao.executemany(
+                'INSERT OR IGNORE INTO tarefas (id, ciclo, site, conta, usina, fase, criada_em) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(t.id, t.ciclo, t.site, t.conta, t.usina, t.fase, agora) for t in tarefas]
+            )
+
+            adicionadas = conexao.total_changes - antes
+
+            expiradas = conexao.execute(
+                f"""UPDATE tarefas SET estado = 'expirada', trabalhador = NULL, expira_em = NULL
+                    WHERE estado IN ('pendente', 'arrendada') AND ciclo NOT IN ({', '.join('?' * len(ciclos))})""",
+                ciclos
+            ).rowcount if ciclos else 0
+
+        if expiradas:
+            logger.warning(f'{expiradas} tarefas de ciclos anteriores não terminadas foram expiradas')
+
+        logger.info(f'{adicionadas} de {len(tarefas)} tarefas adicionadas à fila')
+        return adicionadas
+
+
+    def arrendar(self, trabalhador: str, quantidade: int = 1, visibilidade: Optional[float] = None) -> list[Tarefa]:
+        """ Arrenda as próximas tarefas pendentes, ou arrendadas com o prazo vencido, para o trabalhador. """
+        agora = datetime.now().timestamp()
+        expira_em = agora + (visibilidade or self.visibilidade)
+
+        with self._conectar() as conexao:
+            # Tarefas que venceram o prazo, ou foram devolvidas, já no limite de tentativas não voltam para a fila
+            conexao.execute(
+                """UPDATE tarefas SET estado = 'falhou', trabalhador = NULL, expira_em = NULL
+                   WHERE (estado = 'pendente' OR (estado = 'arrendada' AND expira_em < ?)) AND tentativas >= ?""",
+                (agora, self.tentativas_maximas)
+            )
+
+            linhas = conexao.execute(
+                """SELECT id FROM tarefas
+                   WHERE estado = 'pendente' OR (estado = 'arrendada' AND expira_em < ?)
+                   ORDER BY criada_em, site, usina LIMIT ?""",
+                (agora, quantidade)
+            ).fetchall()
+
+            ids = [linha[0] for linha in linhas]
+
+            conexao.executemany(
+                "UPDATE tarefas SET estado = 'arrendada', trabalhador = ?, expira_em = ?, tentativas = tentativas + 1 WHERE id = ?",
+                [(trabalhador, expira_em, id_tarefa) for id_tarefa in ids]
+            )
+
+            tarefas = [self._tarefa(conexao, id_tarefa) for id_tarefa in ids]
+
+        if tarefas:
+            logger.info(f'{len(tarefas)} tarefas arrendadas para {trabalhador} até {datetime.fromtimestamp(expira_em):%H:%M:%S}')
+
+        return tarefas
+
+
+    def renovar(self, id_tarefa: str, trabalhador: str, visibilidade: Optional[float] = None) -> bool:
+        """ Estende o prazo do arrendamento. Retorna False caso a tarefa não esteja mais arrendada para o trabalhador. """
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "UPDATE tarefas SET expira_em = ? WHERE id = ? AND trabalhador = ? AND estado = 'arrendada'",
+                (datetime.now().timestamp() + (visibilidade or self.visibilidade), id_tarefa, trabalhador)
+            )
+
+            return cursor.rowcount == 1
+
+
+    def concluir(self, id_tarefa: str, trabalhador: str, resultado: Optional[dict] = None) -> bool:
+        """ Registra a conclusão da tarefa. Retorna True apenas na primeira conclusão, as seguintes são ignoradas. """
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                'INSERT OR IGNORE INTO conclusoes (id_tarefa, trabalhador, concluida_em, resultado) VALUES (?, ?, ?, ?)',
+                (id_tarefa, trabalhador, datetime.now().timestamp(), json.dumps(resultado, ensure_ascii=False) if resultado is not None else None)
+            )
+
+            primeira = cursor.rowcount == 1
+
+            conexao.execute("UPDATE tarefas SET estado = 'concluida', expira_em = NULL WHERE id = ?", (id_tarefa,))
+
+        if not primeira:
+            logger.info(f'Tarefa {id_tarefa} já estava concluída, conclusão repetida de {trabalhador} ignorada')
+
+        return primeira
+
+
+    def devolver(self, id_tarefa: str, trabalhador: str) -> bool:
+        """ Devolve uma tarefa arrendada para a fila antes do prazo, por exemplo quando o lote falhou. Uma tarefa que já chegou ao limite de tentativas é marcada como falhou, assim um lote que sempre falha não é arrendado para sempre. """
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                """UPDATE tarefas SET estado = CASE WHEN tentativas >= ? THEN 'falhou' ELSE 'pendente' END, trabalhador = NULL, expira_em = NULL
+                   WHERE id = ? AND trabalhador = ? AND estado = 'arrendada'""",
+                (self.tentativas_maximas, id_tarefa, trabalhador)
+            )
+
+            return cursor.rowcount == 1
+
+
+    def resumo(self, ciclo: str) -> dict:
+        """ Retorna a quantidade de tarefas do ciclo em cada estado. """
+        with self._conectar() as conexao:
+            linhas = conexao.execute('SELECT estado, COUNT(*) FROM tarefas WHERE ciclo = ? GROUP BY estado', (ciclo,)).fetchall()
+
+        return {estado: quantidade for estado, quantidade in linhas}
+
+
+    def resultados(self, ciclo: str) -> list[dict]:
+        """ Retorna a tarefa e o resultado de cada conclusão do ciclo. """
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                """SELECT t.id, t.site, t.usina, t.fase, c.trabalhador, c.resultado FROM conclusoes c
+                   JOIN tarefas t ON t.id = c.id_tarefa WHERE t.ciclo = ?""",
+                (ciclo,)
+            ).fetchall()
+
+        return [
+            {'id': id_tarefa, 'site': site, 'usina': usina, 'fase': fase, 'trabalhador': trabalhador, 'resultado': json.loads(resultado) if resultado else None}
+            for id_tarefa, site, usina, fase, trabalhador, resultado in linhas
+        ]
+
+
+    def _tarefa(self, conexao: sqlite3.Connection, id_tarefa: str) -> Tarefa:
+        linha = conexao.execute(
+            'SELECT id, ciclo, site, conta, usina, fase, tentativas, trabalhador, expira_em FROM tarefas WHERE id = ?', (id_tarefa,)
+        ).fetchone()
+
+        return Tarefa(*linha)
+
+
+
+class _ConexaoTransacional:
+    """ Envolve a conexão SQLite para que cada bloco 'with' seja uma transação BEGIN IMMEDIATE, evitando que dois trabalhadores arrendem a mesma tarefa. """
+
+    def __init__(self, conexao: sqlite3.Connection):
+        self._conexao = conexao
+
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+
+    def __enter__(self):
+        self._conexao.execute('BEGIN IMMEDIATE')
+        return self._conexao
+
+
+    def __exit__(self, tipo_excecao, *_):
+        try:
+            self._conexao.execute('ROLLBACK' if tipo_excecao else 'COMMIT')
+
+        finally:
+            self._conexao.close()
+
+
+
+class FilaHTTP:
+    """ Cliente da fila exposta por criar_servidor_fila em outra máquina. Tem a mesma interface da FilaSQLite. """
+
+    def __init__(self, url_base: Optional[str] = None, timeout: float = 30):
+        self.url_base = (url_base or FILA_TAREFAS['url']).rstrip('/')
+        self.timeout = timeout
+
+
+    def _chamar(self, operacao: str, **dados):
+        requisicao = Request(
+            f'{self.url_base}/{operacao}',
+            data=json.dumps(dados, ensure_ascii=False).encode('utf-8'),
+            headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {FILA_TAREFAS["token"]}'},
+            method='POST'
+        )
+
+        with urlopen(requisicao, timeout=self.timeout) as resposta:
+            return json.loads(resposta.read().decode('utf-8'))
+
+
+    def enfileirar(self, tarefas: list[Tarefa]) -> int:
+        return self._chamar('enfileirar', tarefas=[asdict(tarefa) for tarefa in tarefas])
+
+
+    def arrendar(self, trabalhador: str, quantidade: int = 1, visibilidade: Optional[float] = None) -> list[Tarefa]:
+        return [Tarefa(**tarefa) for tarefa in self._chamar('arrendar', trabalhador=trabalhador, quantidade=quantidade, visibilidade=visibilidade)]
+
+
+    def renovar(self, id_tarefa: str, trabalhador: str, visibilidade: Optional[float] = None) -> bool:
+        return self._chamar('renovar', id_tarefa=id_tarefa, trabalhador=trabalhador, visibilidade=visibilidade)
+
+
+    def concluir(self, id_tarefa: str, trabalhador: str, resultado: Optional[dict] = None) -> bool:
+        return self._chamar('concluir', id_tarefa=id_tarefa, trabalhador=trabalhador, resultado=resultado)
+
+
+    def devolver(self, id_tarefa: str, trabalhador: str) -> bool:
+        return self._chamar('devolver', id_tarefa=id_tarefa, trabalhador=trabalhador)
+
+
+    def resumo(self, ciclo: str) -> dict:
+        return self._chamar('resumo', ciclo=ciclo)
+
+
+    def resultados(self, ciclo: str) -> list[dict]:
+        return self._chamar('resultados', ciclo=ciclo)
+
+
+
+def criar_servidor_fila(backend: BackendFila, host: str = FILA_TAREFAS['host'], porta: int = 8765) -> ThreadingHTTPServer:
+    """ Cria o servidor HTTP que expõe um backend (normalmente a FilaSQLite da máquina principal) para os trabalhadores das outras máquinas.
+
+    Cada operação é um POST em /<operacao> com os argumentos em JSON. O servidor também serve de substituto local da fila remota, bastando apontar uma FilaHTTP para ele.
+
+    Exemplo:
+        servidor = criar_servidor_fila(FilaSQLite(), porta=8765)
+        servidor.serve_forever()
+
+    Args:
+        backend (BackendFila): o backend que executa as operações.
+
+        host (str): o endereço em que o servidor escuta.
+
+        porta (int): a porta do servidor. 0 escolhe uma porta livre, disponível depois em servidor.server_address.
+
+    Returns:
+        ThreadingHTTPServer: o servidor, ainda não iniciado.
+
+    Raises:
+        ValueError: caso o servidor seja exposto na rede (host diferente de 127.0.0.1) sem FILA_TAREFAS['token'], o que deixaria qualquer máquina da rede enfileirar, arrendar e concluir tarefas.
+
+    """
+    if not FILA_TAREFAS['token'] and host not in ('127.0.0.1', 'localhost', '::1'):
+        raise ValueError(f'A fila não pode ser exposta em {host} sem token: defina FILA_TAREFAS_TOKEN ou use FILA_TAREFAS_HOST=127.0.0.1')
+
+    trava = threading.Lock()
+
+    operacoes = {
+        'enfileirar': lambda dados: backend.enfileirar([Tarefa(**tarefa) for tarefa in dados['tarefas']]),
+        'arrendar': lambda dados: [asdict(tarefa) for tarefa in backend.arrendar(dados['trabalhador'], dados.get('quantidade', 1), dados.get('visibilidade'))],
+        'renovar': lambda dados: backend.renovar(dados['id_tarefa'], dados['trabalhador'], dados.get('visibilidade')),
+        'concluir': lambda dados: backend.concluir(dados['id_tarefa'], dados['trabalhador'], dados.get('resultado')),
+        'devolver': lambda dados: backend.devolver(dados['id_tarefa'], dados['trabalhador']),
+        'resumo': lambda dados: backend.resumo(dados['ciclo']),
+        'resultados': lambda dados: backend.resultados(dados['ciclo'])
+    }
+
+    class ManipuladorFila(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if FILA_TAREFAS['token'] and self.headers.get('Authorization') != f'Bearer {FILA_TAREFAS["token"]}':
+                self._responder(401, {'erro': 'não autorizado'})
+                return
+
+            operacao = operacoes.get(self.path.strip('/'))
+
+            if not operacao:
+                self._responder(404, {'erro': f'operação {self.path} desconhecida'})
+                return
+
+            try:
+                tamanho = int(self.headers.get('Content-Length', 0))
+                dados = json.loads(self.rfile.read(tamanho).decode('utf-8') or '{}')
+
+                with trava:
+                    resposta = operacao(dados)
+
+            except Exception as e:
+                logger.error(f'Erro na operação {self.path} da fila: {e}')
+                self._responder(500, {'erro': str(e)})
+
+            else:
+                self._responder(200, resposta)
+
+
+        def _responder(self, codigo: int, corpo):
+            conteudo = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+
+            self.send_response(codigo)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(conteudo)))
+            self.end_headers()
+
+            self.wfile.write(conteudo)
+
+
+        def log_message(self, formato, *args):
+            logger.info(f'{self.address_string()} - {formato % args}')
+
+    return ThreadingHTTPServer((host, porta), ManipuladorFila)
+
+
+
+def abrir_fila() -> BackendFila:
+    """ Abre o backend configurado em FILA_TAREFAS['backend'] ('sqlite' ou 'http'). """
+    if FILA_TAREFAS['backend'] == 'http':
+        return FilaHTTP()
+
+    return FilaSQLite()
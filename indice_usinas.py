@@ -0,0 +1,306 @@
+""" Este módulo contém o índice das usinas de cada conta nos sites.
+
+Uma descoberta percorre todas as páginas da lista de usinas da conta (seletores em INDICE_USINAS['listas']) e guarda em que página cada usina aparece, conferindo também a lista do site com o registro de usinas.
+Na primeira vez que uma usina é aberta o link direto dela (e o id da usina no site, quando o link tiver) é guardado, e a partir daí a usina é aberta pelo link, sem depender da lista.
+O índice fica em INDICE_USINAS['caminho'] e cada conta é descoberta de novo depois de INDICE_USINAS['validade'] segundos.
+Os processos dos sites (processos_sites.py) dividem o mesmo índice: antes de salvar o índice do disco é relido e juntado com as alterações do processo, com o arquivo travado, ficando a entrada mais recente de cada usina."""
+
+import json
+import logging
+import os
+import re
+from typing import Optional
+from playwright.async_api import Page
+from config import *
+from prontidao import aguardar_texto_mudar
+from registro_usinas import REGISTRO
+from trava_arquivo import arquivo_travado
+
+
+logger = logging.getLogger('Índice de usinas')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'indice_usinas.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+def _na_lista(usina: str, nomes_lista) -> bool:
+    """ Mesmo critério do filter(has_text=usina) dos adaptadores: a usina está na lista se o nome dela aparece em algum dos nomes. """
+    return any(usina in nome for nome in nomes_lista)
+
+
+
+def _juntar_indices(no_disco: dict, do_processo: dict) -> dict:
+    """ Junta os dois índices, ficando com a descoberta mais recente de cada conta e a entrada mais recente (atualizado_em) de cada usina.
+
+    Quando a descoberta do processo é a mais recente, as usinas do disco que ela não encontrou (e que não foram atualizadas depois dela) são descartadas.
+    """
+    for site, contas in do_processo.items():
+        for conta, dados_conta in contas.items():
+            dados_disco = no_disco.setdefault(site, {}).setdefault(conta, {'descoberto_em': 0, 'usinas': {}})
+
+            if dados_conta['descoberto_em'] > dados_disco['descoberto_em']:
+                dados_disco['usinas'] = {
+                    usina: entrada for usina, entrada in dados_disco['usinas'].items()
+                    if _na_lista(usina, dados_conta['usinas']) or entrada.get('atualizado_em', 0) > dados_conta['descoberto_em']
+                }
+                dados_disco['descoberto_em'] = dados_conta['descoberto_em']
+
+            if dados_conta.get('ids_repetidos'):
+                dados_disco['ids_repetidos'] = sorted(set(dados_disco.get('ids_repetidos', [])) | set(dados_conta['ids_repetidos']))
+
+            for usina, entrada in dados_conta['usinas'].items():
+                entrada_disco = dados_disco['usinas'].get(usina)
+
+                if entrada_disco is None or entrada.get('atualizado_em', 0) >= entrada_disco.get('atualizado_em', 0):
+                    dados_disco['usinas'][usina] = entrada
+
+    return no_disco
+
+
+
+class IndiceUsinas:
+    """ Índice {site: {conta: {'descoberto_em': timestamp, 'ids_repetidos': [id], 'usinas': {usina: {'pagina', 'url', 'id', 'atualizado_em'}}}}}. """
+
+    def __init__(self, caminho: Path = INDICE_USINAS['caminho']):
+        self.caminho = caminho
+        self.sites: dict = self._carregar()
+
+
+    def _carregar(self) -> dict:
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as arquivo_json:
+                return json.load(arquivo_json)
+
+        except FileNotFoundError:
+            return {}
+
+        except (OSError, ValueError) as e:
+            logger.warning(f'Não foi possível ler o índice das usinas, ele será recriado: {e}')
+            return {}
+
+
+    def _conta(self, site: str, conta: str) -> dict:
+        return self.sites.setdefault(site, {}).setdefault(conta, {'descoberto_em': 0, 'usinas': {}})
+
+
+    def precisa_descobrir(self, site: str, conta: str) -> bool:
+        if site not in INDICE_USINAS['listas']:
+            return False
+
+        return datetime.now().timestamp() - self._conta(site, conta)['descoberto_em'] > INDICE_USINAS['validade']
+
+
+    def entrada(self, site: str, conta: str, usina: str) -> Optional[dict]:
+        """ Retorna a entrada da usina no índice, caso ela ainda esteja dentro da validade. """
+        entrada = self._conta(site, conta)['usinas'].get(usina)
+
+        if not entrada or datetime.now().timestamp() - entrada.get('atualizado_em', 0) > INDICE_USINAS['validade']:
+            return None
+
+        return entrada
+
+
+    def registrar_descoberta(self, site: str, conta: str, paginas_usinas: dict[str, int]):
+        """ Guarda a página de cada usina encontrada na lista, descarta as usinas que saíram da conta e confere a lista do site com as usinas registradas para a conta.
+
+        Args:
+            site (str): o nome do site.
+
+            conta (str): a conta do registro de usinas.
+
+            paginas_usinas (dict): o nome de cada usina encontrada e a página da lista onde ela aparece (começando em 1).
+
+        """
+        agora = datetime.now().timestamp()
+        dados_conta = self._conta(site, conta)
+
+        # Uma descoberta vazia é mais provavelmente uma lista que não carregou do que uma conta sem usinas, então nada é descartado
+        if paginas_usinas:
+            removidas = [usina for usina in dados_conta['usinas'] if not _na_lista(usina, paginas_usinas)]
+
+            for usina in removidas:
+                del dados_conta['usinas'][usina]
+
+            if removidas:
+                logger.warning(f'Usinas que saíram da lista da conta {conta} no site {site} e foram retiradas do índice: {sorted(removidas)}')
+
+        for usina, pagina in paginas_usinas.items():
+            entrada = dados_conta['usinas'].setdefault(usina, {})
+            entrada.update(pagina=pagina, atualizado_em=agora)
+
+        dados_conta['descoberto_em'] = agora
+
+        registradas = {usina.usina for usina in REGISTRO.usinas(site=site, conta=conta, apenas_ativas=False)}
+        encontradas = set(paginas_usinas)
+
+        if registradas - encontradas:
+            logger.warning(f'Usinas registradas na conta {conta} que não aparecem na lista do site {site}: {sorted(registradas - encontradas)}')
+
+        if encontradas - registradas:
+            logger.info(f'Usinas da conta {conta} no site {site} que não estão no registro: {sorted(encontradas - registradas)}')
+
+        logger.info(f'Descoberta da conta {conta} no site {site}: {len(encontradas)} usinas em {max(paginas_usinas.values(), default=0)} páginas')
+
+        self.salvar()
+
+
+    def registrar_link(self, site: str, conta: str, usina: str, url: str) -> bool:
+        """ Guarda o link direto da usina e o id dela no site, caso o link siga INDICE_USINAS['listas'][site]['padrao_id'].
+
+        Um link sem o id da usina, ou com o mesmo id de outra usina da conta, não identifica a usina (sites que guardam a usina escolhida na sessão ou que navegam dentro da própria lista) e não é guardado.
+
+        Returns:
+            bool: True caso o link tenha sido guardado.
+
+        """
+        padrao_id = INDICE_USINAS['listas'].get(site, {}).get('padrao_id')
+        correspondencia = re.search(padrao_id, url) if padrao_id else None
+
+        if not correspondencia:
+            logger.info(f'O link da usina {site} - {usina} não tem o id da usina e não foi guardado: {url}')
+            return False
+
+        id_usina = correspondencia.group(1)
+        dados_conta = self._conta(site, conta)
+        usinas_conta = dados_conta['usinas']
+        repetidos = dados_conta.setdefault('ids_repetidos', [])
+
+        repetidas = [outra for outra, entrada in usinas_conta.items() if outra != usina and entrada.get('id') == id_usina]
+
+        if repetidas or id_usina in repetidos:
+            # O mesmo id em duas usinas não identifica nenhuma delas: o link das outras também é descartado e o id não é mais aceito na conta
+            if id_usina not in repetidos:
+                repetidos.append(id_usina)
+
+            for outra in repetidas:
+                self.invalidar_link(site, conta, outra)
+
+            logger.warning(f'O link da usina {site} - {usina} tem o mesmo id de outra usina da conta ({id_usina}) e não foi guardado: {url}')
+            self.salvar()
+
+            return False
+
+        entrada = usinas_conta.setdefault(usina, {'pagina': 1})
+        entrada.update(url=url, id=id_usina, atualizado_em=datetime.now().timestamp())
+
+        self.salvar()
+
+        return True
+
+
+    def invalidar_link(self, site: str, conta: str, usina: str):
+        entrada = self._conta(site, conta)['usinas'].get(usina)
+
+        if entrada and entrada.pop('url', None):
+            entrada.pop('id', None)
+
+            # A entrada sem o link fica mais recente que a do disco, senão o link seria restaurado ao juntar os índices
+            entrada['atualizado_em'] = datetime.now().timestamp()
+
+            logger.warning(f'Link direto da usina {site} - {usina} descartado')
+            self.salvar()
+
+
+    def salvar(self):
+        """ Junta o índice do disco com o deste processo e grava o resultado, que passa a ser o índice deste processo também. """
+        try:
+            with arquivo_travado(self.caminho):
+                self.sites = _juntar_indices(self._carregar(), self.sites)
+
+                # Grava em um arquivo temporário e substitui, para que uma leitura nunca encontre o arquivo pela metade
+                caminho_temporario = self.caminho.with_suffix(self.caminho.suffix + f'.{os.getpid()}.tmp')
+
+                with open(caminho_temporario, 'w', encoding='utf-8') as arquivo_json:
+                    json.dump(self.sites, arquivo_json, indent=4, ensure_ascii=False)
+
+                os.replace(caminho_temporario, self.caminho)
+
+        except OSError as e:
+            logger.error(f'Não foi possível salvar o índice das usinas: {e}')
+
+
+
+async def descobrir_usinas(pagina_lista: Page, site: str) -> Optional[dict[str, int]]:
+    """ Percorre todas as páginas da lista de usinas em uma página nova do mesmo contexto, sem mexer na página da lista.
+
+    Args:
+        pagina_lista (Page): a página logada na lista de usinas, a url dela é aberta na página nova.
+
+        site (str): o nome do site.
+
+    Returns:
+        dict: o nome de cada usina e a página onde ela aparece. None caso o site não tenha seletores em INDICE_USINAS['listas'] ou a descoberta falhe.
+
+    """
+    seletores = INDICE_USINAS['listas'].get(site)
+
+    if not seletores:
+        return None
+
+    pagina = await pagina_lista.context.new_page()
+    paginas_usinas = {}
+
+    try:
+        await pagina.goto(pagina_lista.url)
+
+        nomes = pagina.locator(seletores['nomes'])
+        await nomes.first.wait_for(state='visible')
+
+        for numero_pagina in range(1, INDICE_USINAS['paginas_maximas'] + 1):
+            textos = [texto.strip() for texto in await nomes.all_inner_texts()]
+
+            for texto in textos:
+                paginas_usinas.setdefault(texto, numero_pagina)
+
+            if not await _avancar_pagina(pagina, seletores['proxima'], nomes.first, textos[0] if textos else None):
+                break
+
+    except Exception as e:
+        logger.error(f'Erro durante a descoberta das usinas do site {site}: {e}')
+        return None
+
+    finally:
+        await pagina.close()
+
+    return paginas_usinas
+
+
+
+async def ir_para_pagina(pagina_lista: Page, site: str, numero_pagina: int):
+    """ Avança a lista de usinas até a página informada, a partir da primeira. """
+    seletores = INDICE_USINAS['listas'][site]
+    primeiro_nome = pagina_lista.locator(seletores['nomes']).first
+
+    for _ in range(numero_pagina - 1):
+        texto = await primeiro_nome.inner_text()
+
+        if not await _avancar_pagina(pagina_lista, seletores['proxima'], primeiro_nome, texto):
+            raise RuntimeError(f'A lista de usinas do site {site} terminou antes da página {numero_pagina}')
+
+
+
+async def _avancar_pagina(pagina: Page, seletor_proxima: str, primeiro_nome, texto_anterior: Optional[str]) -> bool:
+    botao = pagina.locator(seletor_proxima).first
+
+    if not await botao.count() or not await botao.is_visible():
+        return False
+
+    classes = await botao.get_attribute('class') or ''
+
+    if 'disabled' in classes or await botao.get_attribute('aria-disabled') == 'true' or await botao.is_disabled():
+        return False
+
+    await botao.click()
+
+    return await aguardar_texto_mudar(primeiro_nome, texto_anterior, teto=5)
+
+
+
+INDICE = IndiceUsinas()
@@ -0,0 +1,221 @@
+""" Este módulo contém o limitador dos emails de erro no código, que evita uma enxurrada de emails iguais quando um site sai do ar ou muda um seletor.
+
+Cada erro é identificado pelo site e por uma impressão da exceção (o tipo e a primeira linha da mensagem, sem números e sem o nome da usina), assim o mesmo erro em várias usinas cai na mesma chave.
+Cada chave tem um balde de fichas: cada email gasta uma ficha, o balde começa com LIMITE_EMAILS_ERRO['capacidade'] fichas e recupera LIMITE_EMAILS_ERRO['recarga_por_hora'] fichas por hora. Sem fichas o erro é suprimido, contando as repetições e guardando o primeiro e o último traceback.
+O próximo email liberado da chave (ou o relatório dos suprimidos no fim da execução) leva a quantidade de repetições e os dois tracebacks.
+O estado fica em LIMITE_EMAILS_ERRO['caminho'] e é relido antes de cada alteração, assim vale entre execuções e entre os processos dos sites.
+Cada leitura, alteração e gravação do estado é feita com o arquivo '.lock' ao lado dele travado, assim dois processos que registram o mesmo erro ao mesmo tempo não gastam a mesma ficha nem apagam as alterações um do outro."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import traceback
+from typing import Optional, Union
+from config import *
+from fila_emails import FILA_EMAILS
+from trava_arquivo import arquivo_travado
+
+
+logger = logging.getLogger('Limite dos emails de erro')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'limite_erros.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+def impressao_do_erro(erro: Union[BaseException, str, None], usina: Optional[str] = None) -> str:
+    """ Retorna a impressão do erro: o tipo e a primeira linha da mensagem, sem números, endereços e o nome da usina, que mudam entre as repetições do mesmo erro. """
+    linhas = str(erro).strip().splitlines()
+    mensagem = linhas[0] if linhas else ''
+
+    if usina:
+        mensagem = mensagem.replace(usina, '<usina>')
+
+    mensagem = re.sub(r'0x[0-9a-fA-F]+|\d+', '<n>', mensagem)
+
+    return hashlib.sha1(f'{type(erro).__name__}|{mensagem}'.encode()).hexdigest()[:12]
+
+
+
+def texto_traceback(erro: Union[BaseException, str, None]) -> str:
+    if isinstance(erro, BaseException):
+        return ''.join(traceback.format_exception(type(erro), erro, erro.__traceback__)).strip()
+
+    return str(erro)
+
+
+
+class LimitadorErros:
+    """ Baldes de fichas dos emails de erro, indexados por 'site|impressão do erro'. """
+
+    def __init__(self, caminho: Path = LIMITE_EMAILS_ERRO['caminho']):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+
+
+    def _carregar(self) -> dict:
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as arquivo_json:
+                return json.load(arquivo_json)
+
+        except FileNotFoundError:
+            return {}
+
+        except (OSError, ValueError) as e:
+            logger.warning(f'Não foi possível ler o estado do limite dos emails de erro, ele será recriado: {e}')
+            return {}
+
+
+    def _salvar(self, estado: dict):
+        agora = datetime.now().timestamp()
+
+        # As chaves sem erros há muito tempo e sem repetições pendentes são esquecidas
+        estado = {
+            chave: balde for chave, balde in estado.items()
+            if balde['suprimidos'] or agora - balde['ultimo_em'] < LIMITE_EMAILS_ERRO['esquecer_apos']
+        }
+
+        try:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            caminho_temporario = self.caminho.with_suffix(self.caminho.suffix + f'.{os.getpid()}.tmp')
+
+            with open(caminho_temporario, 'w', encoding='utf-8') as arquivo_json:
+                json.dump(estado, arquivo_json, indent=4, ensure_ascii=False)
+
+            os.replace(caminho_temporario, self.caminho)
+
+        except OSError as e:
+            logger.error(f'Não foi possível salvar o estado do limite dos emails de erro: {e}')
+
+
+    @staticmethod
+    def _recarregar(balde: dict, agora: float):
+        horas = (agora - balde['atualizado_em']) / 3600
+
+        balde['fichas'] = min(LIMITE_EMAILS_ERRO['capacidade'], balde['fichas'] + horas * LIMITE_EMAILS_ERRO['recarga_por_hora'])
+        balde['atualizado_em'] = agora
+
+
+    @staticmethod
+    def _resumo_suprimidos(balde: dict) -> str:
+        return (
+            f'\n\nEste erro se repetiu {balde["suprimidos"]} vezes sem email entre '
+            f'{datetime.fromtimestamp(balde["primeiro_suprimido_em"]):%d/%m/%Y %H:%M} e {datetime.fromtimestamp(balde["ultimo_em"]):%d/%m/%Y %H:%M}.'
+            f'\n\nPrimeiro traceback suprimido:\n{balde["primeiro_traceback"]}'
+            f'\n\nÚltimo traceback suprimido:\n{balde["ultimo_traceback"]}'
+        )
+
+
+    def registrar(self, site: Optional[str], erro: Union[BaseException, str, None], onde_ocorreu_erro: Optional[str] = None, usina: Optional[str] = None) -> Optional[str]:
+        """ Registra uma ocorrência do erro e decide se ela pode gerar um email.
+
+        Args:
+            site (str): o site onde o erro ocorreu, None para os erros gerais.
+
+            erro (Exception | str): o erro capturado.
+
+            onde_ocorreu_erro (str): a descrição de onde o erro ocorreu, guardada para o relatório dos suprimidos.
+
+            usina (str): a usina onde o erro ocorreu, retirada da mensagem antes de calcular a impressão.
+
+        Returns:
+            str: None caso o erro deva ser suprimido. Caso contrário o texto que deve ser acrescentado ao email, com o traceback e, se houver, as repetições suprimidas desde o último email.
+
+        """
+        agora = datetime.now().timestamp()
+        chave = f'{site or "geral"}|{impressao_do_erro(erro, usina)}'
+        detalhes = texto_traceback(erro)
+
+        with self._trava, arquivo_travado(self.caminho):
+            estado = self._carregar()
+
+            balde = estado.setdefault(chave, {
+                'site': site, 'onde_ocorreu_erro': onde_ocorreu_erro, 'mensagem': str(erro).strip()[:300],
+                'fichas': LIMITE_EMAILS_ERRO['capacidade'], 'atualizado_em': agora, 'ultimo_em': agora,
+                'suprimidos': 0, 'primeiro_suprimido_em': None, 'primeiro_traceback': None, 'ultimo_traceback': None
+            })
+
+            self._recarregar(balde, agora)
+            balde['ultimo_em'] = agora
+
+            if balde['fichas'] < 1:
+                if not balde['suprimidos']:
+                    balde['primeiro_suprimido_em'] = agora
+                    balde['primeiro_traceback'] = detalhes
+
+                balde['suprimidos'] += 1
+                balde['ultimo_traceback'] = detalhes
+
+                self._salvar(estado)
+
+                logger.warning(f'Email do erro {chave} ({onde_ocorreu_erro}) suprimido, {balde["suprimidos"]} repetições desde o último email')
+                return None
+
+            balde['fichas'] -= 1
+            extra = f'\n\nTraceback:\n{detalhes}'
+
+            if balde['suprimidos']:
+                extra += self._resumo_suprimidos(balde)
+                balde['suprimidos'] = 0
+
+            self._salvar(estado)
+
+        return extra
+
+
+    def relatar_suprimidos(self) -> list[tuple[str, str]]:
+        """ Retira as repetições suprimidas das chaves que já recuperaram uma ficha, para serem enviadas em um único email por chave.
+
+        Returns:
+            list[tuple[str, str]]: o assunto e o corpo de cada email. As chaves ainda sem fichas continuam acumulando para a próxima execução.
+
+        """
+        agora = datetime.now().timestamp()
+        relatorios = []
+
+        with self._trava, arquivo_travado(self.caminho):
+            estado = self._carregar()
+
+            for chave, balde in estado.items():
+                if not balde['suprimidos']:
+                    continue
+
+                self._recarregar(balde, agora)
+
+                if balde['fichas'] < 1:
+                    continue
+
+                balde['fichas'] -= 1
+
+                assunto = f'Erro repetido {balde["suprimidos"]} vezes ({balde["site"] or "geral"})'
+                corpo = f'O erro abaixo, ocorrido durante o(a) {balde["onde_ocorreu_erro"]}, teve os emails suprimidos.\n{balde["mensagem"]}' + self._resumo_suprimidos(balde)
+
+                relatorios.append((assunto, corpo))
+                balde['suprimidos'] = 0
+
+            if relatorios:
+                self._salvar(estado)
+
+        return relatorios
+
+
+
+def enviar_erros_suprimidos():
+    """ Coloca na fila de emails o relatório das repetições suprimidas que já podem ser enviadas. Chamada no fim da execução. """
+    for assunto, corpo in LIMITADOR_ERROS.relatar_suprimidos():
+        FILA_EMAILS.enfileirar(destinatario, assunto, corpo)
+
+        logger.info(f'Relatório "{assunto}" enfileirado')
+
+
+
+LIMITADOR_ERROS = LimitadorErros()
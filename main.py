@@ -1,11 +1,28 @@
-from playwright.async_api import async_playwright
+from playwright.async_api import Browser, async_playwright
 from time import perf_counter
+from contextlib import AsyncExitStack
+import argparse
 import asyncio
 import logging
 import sys
 from config import *
 from organizacao_prints import *
 from monitoramento import *
+from adaptadores import monitorar_sites
+from escalonador import EscalonadorAdaptativo
+from navegador import GerenciadorNavegador
+from processos_sites import executar_sites_em_processos
+from resultados import RESULTADOS
+from armazem_prints import coletar_lixo as coletar_lixo_armazem
+from diario_execucao import DIARIO
+from fila_emails import FILA_EMAILS
+from limite_erros import enviar_erros_suprimidos
+from resumo_alertas import RESUMO
+from sondagem_status import AgendaSondagens, executar_sondagem
+from registro_usinas import REGISTRO
+from fila_tarefas import BackendFila, FilaSQLite, abrir_fila, criar_servidor_fila
+from trabalhador_fila import executar_ciclo_pela_fila, executar_trabalhador
+from typing import Optional
 from pathlib import Path
 
 logger = logging.getLogger('Main')
@@ -31,62 +48,87 @@ logger.addHandler(console_handler)
 
 
 
-async def main():
-    inicio = perf_counter()
+async def executar_ciclo(chrome: Optional[Browser], mapeamento_site_usinas: dict, inserir_prints: bool, fila: Optional[BackendFila] = None, retomar: bool = False):
+    """ Executa um ciclo completo do monitoramento e salva os resultados estruturados do ciclo.
 
-    logger.info('MONITORAMENTO INICIADO')
+    Args:
+        chrome (Browser): o navegador usado por todos os sites no ciclo. Caso seja None os sites são monitorados em processos separados (ver processos_sites.py), cada um com o seu navegador.
 
-    print('----- Monitoramento iniciado... -----')
+        mapeamento_site_usinas (dict): os sites como chave e a lista de usinas de cada site como valor.
 
-    mapeamento_site_usinas = {
-        'Solis': ['Usina 1', 'Usina 2', 'Usina 3'],
+        inserir_prints (bool): se os prints do ciclo devem ser organizados e inseridos nos arquivos docx ao final.
 
-        'Sungrow': ['Usina 4', 'Usina 5'],
+        fila (BackendFila): caso informada, as usinas são distribuídas pela fila de tarefas entre esta e as outras máquinas (ver trabalhador_fila.py).
 
-        'Growatt': ['Usina 6', 'Usina 7'],
+        retomar (bool): se a última execução de hoje que foi interrompida deve ser retomada a partir do seu diário (ver diario_execucao.py), em vez de começar uma nova.
 
-        'PHB': ['Usina 8, Usina 9'],
+    """
+    if fila is None and not (retomar and DIARIO.retomar()):
+        DIARIO.iniciar()
 
-        'Solplanet': ['Usina 10', 'Usina 11'],
+    # No modo manifesto o docx só é criado quando o mês é montado (ver organizacao_prints.py)
+    if DOCX_MENSAL['modo'] == 'diario' and RELOGIO.data.day == 1 and RELOGIO.horario.hour >= 6:
+        gerar_docx_em_paralelo(
+            [
+                (site, usina, criar_docx_monitoramentos, (usina, site))
+                for site, usinas in mapeamento_site_usinas.items()
+                for usina in usinas
+                if not Path(CAMINHO_PASTA_RAIZ, 'Histórico de monitoramentos', site, f'{usina} - mês {RELOGIO.data.month}.docx').exists()
+            ],
+            'criação do docx do mês'
+        )
 
-        'Shine': ['Usina 12']
-    }
+    RESULTADOS.limpar()
 
-    semaphore = asyncio.Semaphore(2)
+    if fila is not None:
+        await executar_ciclo_pela_fila(chrome, fila, mapeamento_site_usinas)
 
-    try:
-        if DATA_ATUAL.day == 1 and HORARIO_ATUAL.hour == 6:
-            for site in mapeamento_site_usinas.keys():
-                for usina in mapeamento_site_usinas[site]:
-                    caminho_docx = Path(CAMINHO_PASTA_RAIZ, 'Histórico de monitoramentos', site, f'{usina} - mês {DATA_ATUAL.month}.docx')
+    elif chrome is None:
+        await asyncio.to_thread(executar_sites_em_processos, mapeamento_site_usinas)
+
+    else:
+        escalonador = EscalonadorAdaptativo()
+        escalonador.iniciar()
+
+        try:
+            await monitorar_sites(chrome, mapeamento_site_usinas, escalonador)
+
+        finally:
+            await escalonador.encerrar()
 
-                    if not caminho_docx.exists():
-                        criar_docx_monitoramentos(nome_usina=usina, site=site)
+    RESULTADOS.salvar()
 
+    if inserir_prints:
+        screenshots = organizar_screenshots(mapeamento_site_usinas)
+        inserir_prints_docx(mapeamento_site_usinas, screenshots)
 
-        async with async_playwright() as pw:
-            chrome = await pw.chromium.launch(headless=False)
+        if DOCX_MENSAL['modo'] == 'manifesto':
+            montar_docx_pendentes()
 
-            tasks = [
-                asyncio.create_task(monitoramento_solis(chrome, mapeamento_site_usinas['Solis'], semaphore)),
+    coletar_lixo_armazem()
 
-                asyncio.create_task(monitoramento_solplanet(chrome, mapeamento_site_usinas['Solplanet'], semaphore)),
+    DIARIO.finalizar()
 
-                asyncio.create_task(monitoramento_phb(chrome, mapeamento_site_usinas['PHB'], semaphore)),
 
-                asyncio.create_task(monitoramento_growatt(chrome, mapeamento_site_usinas['Growatt'], semaphore)),
 
-                asyncio.create_task(monitoramento_shine(chrome, mapeamento_site_usinas['Shine'], semaphore)),
+async def main(usar_processos: bool = False, usar_fila: bool = False, retomar: bool = False):
+    inicio = perf_counter()
+
+    RELOGIO.atualizar()
+
+    logger.info('MONITORAMENTO INICIADO')
 
-                asyncio.create_task(monitoramento_sungrow(chrome, mapeamento_site_usinas['Sungrow'], semaphore))
-            ]
+    print('----- Monitoramento iniciado... -----')
 
-            await asyncio.gather(*tasks)      
+    inserir_prints = RELOGIO.horario >= HORARIO_PARA_INSERIR_PRINTS
 
+    try:
+        if usar_processos and not usar_fila:
+            await executar_ciclo(None, REGISTRO.mapeamento_site_usinas(), inserir_prints, retomar=retomar)
 
-        if HORARIO_ATUAL >= HORARIO_PARA_INSERIR_PRINTS:
-            screenshots = organizar_screenshots(mapeamento_site_usinas)
-            inserir_prints_docx(mapeamento_site_usinas, screenshots)
+        else:
+            async with async_playwright() as pw, GerenciadorNavegador(pw, inicio) as chrome:
+                await executar_ciclo(chrome, REGISTRO.mapeamento_site_usinas(), inserir_prints, fila=abrir_fila() if usar_fila else None, retomar=retomar)
 
     except KeyboardInterrupt:
         print('Execução interrompida pelo usuário')
@@ -108,5 +150,147 @@ async def main():
         logger.info(f'MONITORAMENTO FINALIZADO COM SUCESSO EM {tempo:.4f} SEGUNDOS')
 
 
+
+async def main_daemon():
+    """ Mantém o interpretador, o driver do Playwright e o navegador abertos, executando um ciclo de monitoramento a cada DAEMON['intervalo_ciclos'] segundos dentro da janela do dia.
+
+    O relógio é atualizado no início de cada ciclo, os prints são inseridos nos docx apenas no primeiro ciclo após HORARIO_PARA_INSERIR_PRINTS de cada dia, e o navegador é reaberto caso tenha se desconectado ou após SERVIDOR_NAVEGADOR['execucoes_maximas'] ciclos.
+    """
+    logger.info('MODO DAEMON INICIADO')
+
+    print('----- Monitoramento em modo daemon, pressione Ctrl+C para encerrar -----')
+
+    dia_prints_inseridos = None
+
+    async with async_playwright() as pw:
+        pilha_navegador = AsyncExitStack()
+        chrome = None
+        ciclos_no_navegador = 0
+
+        try:
+            while True:
+                RELOGIO.atualizar()
+                inicio = perf_counter()
+
+                if not DAEMON['horario_inicio'] <= RELOGIO.horario <= DAEMON['horario_fim']:
+                    await asyncio.sleep(min(DAEMON['intervalo_ciclos'], 300))
+                    continue
+
+                logger.info(f'CICLO INICIADO ({RELOGIO.agora:%d/%m/%Y %H:%M})')
+
+                try:
+                    if chrome is None or not chrome.is_connected() or ciclos_no_navegador >= SERVIDOR_NAVEGADOR['execucoes_maximas']:
+                        await pilha_navegador.aclose()
+
+                        pilha_navegador = AsyncExitStack()
+                        chrome = await pilha_navegador.enter_async_context(GerenciadorNavegador(pw, inicio))
+                        ciclos_no_navegador = 0
+
+                    inserir_prints = RELOGIO.horario >= HORARIO_PARA_INSERIR_PRINTS and dia_prints_inseridos != RELOGIO.data
+
+                    await executar_ciclo(chrome, REGISTRO.mapeamento_site_usinas(), inserir_prints)
+
+                    if inserir_prints:
+                        dia_prints_inseridos = RELOGIO.data
+
+                except Exception as e:
+                    logger.critical(f'Erro inesperado capturado no ciclo do daemon: {e}')
+                    enviar_email(config_do_email='erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='erro inesperado capturado no ciclo do daemon')
+
+                ciclos_no_navegador += 1
+
+                tempo = perf_counter() - inicio
+                logger.info(f'CICLO FINALIZADO EM {tempo:.4f} SEGUNDOS')
+
+                await asyncio.sleep(max(0, DAEMON['intervalo_ciclos'] - tempo))
+
+        finally:
+            await pilha_navegador.aclose()
+
+            logger.info('MODO DAEMON ENCERRADO')
+
+
+
+async def main_sondagem():
+    """ Mantém o navegador aberto sondando apenas os status dos inversores e o histórico de falhas das usinas, cada uma no seu intervalo adaptativo (ver sondagem_status.py), dentro da janela do dia de DAEMON.
+
+    Pode rodar junto com o monitoramento completo, já que não tira prints, não extrai dados mensais e não mexe nos docx.
+    """
+    logger.info('MODO SONDAGEM INICIADO')
+
+    print('----- Sondagem dos status em andamento, pressione Ctrl+C para encerrar -----')
+
+    agenda = AgendaSondagens()
+
+    async with async_playwright() as pw:
+        pilha_navegador = AsyncExitStack()
+        chrome = None
+        sondagens_no_navegador = 0
+
+        try:
+            while True:
+                RELOGIO.atualizar()
+
+                if DAEMON['horario_inicio'] <= RELOGIO.horario <= DAEMON['horario_fim']:
+                    try:
+                        if chrome is None or not chrome.is_connected() or sondagens_no_navegador >= SERVIDOR_NAVEGADOR['execucoes_maximas']:
+                            await pilha_navegador.aclose()
+
+                            pilha_navegador = AsyncExitStack()
+                            chrome = await pilha_navegador.enter_async_context(GerenciadorNavegador(pw, perf_counter()))
+                            sondagens_no_navegador = 0
+
+                        if await executar_sondagem(chrome, agenda, REGISTRO.mapeamento_site_usinas()):
+                            sondagens_no_navegador += 1
+
+                    except Exception as e:
+                        logger.critical(f'Erro inesperado capturado na sondagem dos status: {e}')
+                        enviar_email(config_do_email='erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='erro inesperado capturado na sondagem dos status')
+
+                await asyncio.sleep(SONDAGEM_STATUS['tique'])
+
+        finally:
+            await pilha_navegador.aclose()
+
+            logger.info('MODO SONDAGEM ENCERRADO')
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description='Monitoramento das usinas solares')
+    parser.add_argument('--daemon', action='store_true', help='mantém o processo aberto executando um ciclo de monitoramento a cada intervalo configurado em DAEMON')
+    parser.add_argument('--sondagem', action='store_true', help='mantém o processo aberto verificando apenas os status dos inversores e as falhas, com um intervalo adaptativo por usina')
+    parser.add_argument('--processos', action='store_true', help='monitora cada grupo de sites de PROCESSOS_SITES em um processo separado')
+    parser.add_argument('--fila', action='store_true', help='coordena o ciclo pela fila de tarefas, dividindo as usinas com os trabalhadores de outras máquinas')
+    parser.add_argument('--trabalhador', action='store_true', help='apenas executa as tarefas da fila configurada em FILA_TAREFAS, sem encerrar')
+    parser.add_argument('--resume', action='store_true', help='retoma a última execução de hoje que foi interrompida, pulando as usinas e etapas já concluídas')
+    parser.add_argument('--servidor-fila', type=int, metavar='PORTA', help='expõe a fila SQLite local por HTTP na porta informada para os trabalhadores das outras máquinas')
+    parser.add_argument('--montar-docx', action='store_true', help='monta os docx dos manifestos com prints novos, incluindo o parcial do mês atual, sem executar o monitoramento')
+
+    argumentos = parser.parse_args()
+
+    try:
+        if argumentos.servidor_fila:
+            criar_servidor_fila(FilaSQLite(), porta=argumentos.servidor_fila).serve_forever()
+
+        elif argumentos.montar_docx:
+            montar_docx_pendentes(incluir_mes_atual=True)
+
+        elif argumentos.trabalhador:
+            asyncio.run(executar_trabalhador(abrir_fila()))
+
+        elif argumentos.daemon:
+            asyncio.run(main_daemon())
+
+        elif argumentos.sondagem:
+            asyncio.run(main_sondagem())
+
+        else:
+            asyncio.run(main(argumentos.processos or PROCESSOS_SITES['ativo'], argumentos.fila, argumentos.resume))
+
+    except KeyboardInterrupt:
+        print('Execução interrompida pelo usuário')
+
+    finally:
+        RESUMO.enviar()
+        enviar_erros_suprimidos()
+        FILA_EMAILS.encerrar()
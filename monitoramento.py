@@ -1,17 +1,27 @@
 """ Módulo com as funções que realizam o processo diário do monitoramento.
 
-Inclui as funções que fazem o login e tiram os prints (visão geral, inversores, e gráfico de inversores caso haja) de cada usina de cada site.
-Tambem inclui a função que manda email informativo em caso de algo fora do normal ser detectado em alguma usina."""
+Inclui as funções que analisam os inversores e o histórico de falhas de cada site e a que distribui as usinas de um site entre várias páginas. O login e os prints de cada site ficam nos adaptadores (pacote adaptadores).
+Tambem inclui a função que monta o email informativo em caso de algo fora do normal ser detectado em alguma usina e o coloca na fila de envio (fila_emails.py) ou no resumo dos alertas (resumo_alertas.py)."""
 
-from playwright.async_api import Browser, Page, expect
+from playwright.async_api import Page, expect
 from config import *
-import yagmail
 import asyncio
-from typing import Literal, Optional
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Literal, Optional
 import random
+from time import perf_counter
 import logging
 import sys
 from dados_mensais import *
+from escalonador import EscalonadorAdaptativo
+from fila_emails import FILA_EMAILS
+from limite_erros import LIMITADOR_ERROS
+from codificacao_prints import salvar_print
+from coletor_rede import alarmes_coletados, contar_inversores_offline, inversores_coletados
+from extracao_dom import extrair_linhas
+from prontidao import aguardando_respostas, aguardar_carregamento_sumir, aguardar_seletor
+from resultados import RESULTADOS
+from resumo_alertas import RESUMO, gravidade_do_alerta
 from config import *
 
 
@@ -36,6 +46,10 @@ console_handler.setFormatter(console_formatter)
 logger.addHandler(console_handler)
 
 
+# Durante a sondagem dos status (sondagem_status.py) os alertas das usinas ficam retidos aqui, indexados por (site, usina), e só são enviados quando o estado da usina muda
+ALERTAS_RETIDOS: ContextVar[Optional[dict]] = ContextVar('alertas_retidos', default=None)
+
+
 
 def enviar_email(
     config_do_email: Literal['inversor_offline', 'historico_de_falhas', 'erro_no_codigo', ],
@@ -44,14 +58,15 @@ def enviar_email(
     qtd_inversores: Optional[int] = None, 
     erro_capturado: Optional[str] = None,
     onde_ocorreu_erro: Optional[str] = None,
-    tipo_da_falha: Optional[Literal['pendente', 'resolvida', 'aviso']] = 'não especificado'
+    tipo_da_falha: Optional[Literal['pendente', 'resolvida', 'aviso']] = 'não especificado',
+    sondagem: bool = False
 ):
-    """ Envia um email de aviso para os destinatários, o conteúdo depende da configuração escolhida.
+    """ Monta um email de aviso para os destinatários e o coloca na fila de envio (fila_emails.py), ou no resumo dos alertas (resumo_alertas.py) caso a gravidade não seja imediata. O conteúdo depende da configuração escolhida.
     
     As configurações do email incluem 3 opções: inversor_offline, erro_no_código, histórico_de_falhas.
 
     A primeira monta a mensagem de aviso de inversores offline a partir dos parâmetros de site, usina e qtd_inversores.
-    A segunda informa que houve uma exceção inesperada, montando a mensagem a partir dos parâmetros de erro_capturado e onde_ocorreu_erro.
+    A segunda informa que houve uma exceção inesperada, montando a mensagem a partir dos parâmetros de erro_capturado e onde_ocorreu_erro. As repetições do mesmo erro passam pelo limitador (limite_erros.py) e podem não gerar email.
     A terceira deve ser utilizada após a leitura do histórico de falhas da usina para montar a mensagem com base nos parâmetros de site, usina, falha_identificada, codigo_falha, momento_falha e tipo_falha.
     
     Args:
@@ -68,6 +83,8 @@ def enviar_email(
         onde_ocorreu_erro (str): uma breve descrição de onde o erro foi levantado, que será usada para montar o corpo do email.
 
         tipo_falha (str): informação sobre o tipo da falha que pode ser pendente, resolvida ou por padrão 'não especificado'.
+
+        sondagem (bool): o alerta vem da sondagem dos status, que não tira prints. O email vai sem anexo, avisando que os prints ficam para o próximo monitoramento completo.
         
     Raises:
         FileNotFoundError: erro levantado caso o caminho para os prints dos inversores (que é anexado junto ao email para maior detalhamento) de determinada usina não for encontrado. Só se aplica na configuração 'inversores_offline'.
@@ -75,10 +92,20 @@ def enviar_email(
         ValueError: erro levantado caso a configuração especificada não seja igual a nenhuma das aceitas (inversores_offline, historico_de_falhas, erro_no_codigo)
 
     """ 
+    # Os alertas da sondagem já foram registrados quando ficaram retidos
+    if not sondagem:
+        RESULTADOS.registrar_alerta(config_do_email, site, usina)
+
+    retidos = ALERTAS_RETIDOS.get()
+
+    if retidos is not None and config_do_email != 'erro_no_codigo':
+        retidos.setdefault((site, usina), []).append({'config_do_email': config_do_email, 'qtd_inversores': qtd_inversores, 'tipo_da_falha': tipo_da_falha})
+        return
+
     if config_do_email == 'inversor_offline':
         assunto = 'Inversor(es) offline'
 
-        corpo_email = f'Aviso! Foi verificado que na usina {site} {usina} há {qtd_inversores} inversores que não estão online.\nMomento da verificação: {DATA_ATUAL} às {HORARIO_ATUAL.hour}:{HORARIO_ATUAL.minute}'
+        corpo_email = f'Aviso! Foi verificado que na usina {site} {usina} há {qtd_inversores} inversores que não estão online.\nMomento da verificação: {RELOGIO.data} às {RELOGIO.horario.hour}:{RELOGIO.horario.minute}'
 
         try:
 
@@ -98,15 +125,21 @@ def enviar_email(
     elif config_do_email == 'historico_de_falhas':
         assunto = 'Falha encontrada no histórico da usina'
 
-        corpo_email = f'Aviso! Foi encontra uma falha no histórico da usina {site} - {usina}.\nFalha {tipo_da_falha}\nMomento da ocorrêcia: {AGORA}'
+        corpo_email = f'Aviso! Foi encontra uma falha no histórico da usina {site} - {usina}.\nFalha {tipo_da_falha}\nMomento da ocorrêcia: {RELOGIO.agora}'
 
-        anexo = Path(CAMINHO_PASTA_PRINTS, site, 'Falhas', f'falha {usina} - {AGORA.date()}.png').resolve()
+        anexo = Path(CAMINHO_PASTA_PRINTS, site, 'Falhas', f'falha {usina} - {RELOGIO.data}.png').resolve()
 
 
     elif config_do_email == 'erro_no_codigo':
         assunto = 'Erro durante a execução do código'
 
-        corpo_email = f'Aviso! O código do monitoramento apresentou o erro abaixo às {HORARIO_ATUAL.hour}:{HORARIO_ATUAL.minute}\n {erro_capturado}\n\nO erro ocorreu durante a execução do(a): {onde_ocorreu_erro}.'
+        # As repetições do mesmo erro (um site fora do ar falha em todas as usinas) são suprimidas e resumidas no próximo email liberado
+        complemento = LIMITADOR_ERROS.registrar(site, erro_capturado, onde_ocorreu_erro, usina)
+
+        if complemento is None:
+            return
+
+        corpo_email = f'Aviso! O código do monitoramento apresentou o erro abaixo às {RELOGIO.horario.hour}:{RELOGIO.horario.minute}\n {erro_capturado}\n\nO erro ocorreu durante a execução do(a): {onde_ocorreu_erro}.' + complemento
 
 
     else:
@@ -114,30 +147,24 @@ def enviar_email(
         raise ValueError
 
 
-    logger.info('Enviando email...')
-    try:
-        yag = yagmail.SMTP(user=remetente, password=senha_de_app, host=host, port=porta)
+    if sondagem and config_do_email != 'erro_no_codigo':
+        # Os prints em CAMINHO_PASTA_PRINTS são do último monitoramento completo, anexá-los mostraria um estado antigo da usina
+        corpo_email += '\n\nAviso gerado pela sondagem dos status, que não tira prints. Os prints da usina serão atualizados no próximo monitoramento completo.'
+        anexo = None
 
-        if config_do_email == 'erro_no_codigo':
-            yag.send(
-                to=destinatario,
-                subject=assunto,
-                contents=corpo_email,      
-            )
+    anexos = None if config_do_email == 'erro_no_codigo' else anexo
+    gravidade = gravidade_do_alerta(config_do_email, tipo_da_falha)
 
-        else:
-            yag.send(
-                to=destinatario,
-                subject=assunto,
-                contents=corpo_email,
-                attachments=anexo
-            )
+    if gravidade in RESUMO_ALERTAS['imediatas']:
+        # O envio fica com a thread da fila de emails, assim o aviso não bloqueia o loop de eventos
+        FILA_EMAILS.enfileirar(destinatario, assunto, corpo_email, anexos=anexos)
 
-    except Exception as e:
-        logger.error(f'Erro durante o envio de email: {e}')
+        logger.info(f'Email "{assunto}" enfileirado para o destinatário {destinatario}')
 
     else:
-        logger.info(f'Email enviado com sucesso para o destinatário {destinatario}')
+        RESUMO.adicionar(destinatario, site, usina, gravidade, assunto, corpo_email, anexos)
+
+        logger.info(f'Alerta "{assunto}" ({gravidade}) da usina {site} - {usina} guardado para o resumo')
 
 
 
@@ -270,21 +297,27 @@ async def analisar_status_inversores_solis(pagina: Page, nome_usina: str):
     """
     logger.info(f'Iniciando análise dos status dos inversores da usina Solis - {nome_usina}')
 
-    infos_inversores = await pagina.locator('tbody > tr').all()
+    registros = await inversores_coletados(pagina)
 
-    contador = 0
-    for inversor in infos_inversores:
-        info_inversor = await inversor.text_content()
+    if registros is not None:
+        contador = contar_inversores_offline(registros, 'Solis', nome_usina)
 
-        info_inversor = info_inversor.replace('  ', ' ').lower().strip().split(' ')
-        status = info_inversor[0]
+    else:
+        infos_inversores = await extrair_linhas(pagina.locator('tbody > tr'))
 
-        if status != 'on-line':
-            logger.warning(f'O inversor de SN número {info_inversor[2]} da usina Solis - {nome_usina} não está online! Status atual: {status}')
-            contador += 1
+        contador = 0
+        for inversor in infos_inversores:
+            info_inversor = inversor.texto.replace('  ', ' ').lower().strip().split(' ')
+            status = info_inversor[0]
+
+            if status != 'on-line':
+                logger.warning(f'O inversor de SN número {info_inversor[2]} da usina Solis - {nome_usina} não está online! Status atual: {status}')
+                contador += 1
 
     logger.info(f'Análise dos status dos inversores da usina Solis - {nome_usina} concluída')
 
+    RESULTADOS.registrar_status('Solis', nome_usina, contador)
+
     if contador == 0:
         logger.info(f'Todos os inversores estão online!\n')
 
@@ -305,19 +338,30 @@ async def analisar_status_inversores_solplanet(pagina: Page, nome_usina: str):
     """ 
     logger.info(f'Iniciando análise dos status dos inversores da usina Solplanet - {nome_usina}')
 
-    contador = 0
+    registros = await inversores_coletados(pagina)
 
-    inversores = await pagina.locator('#rc-tabs-1-panel-item-1 div.ant-collapse.ant-collapse-icon-position-start.ant-collapse-ghost').all()
+    if registros is not None:
+        contador = contar_inversores_offline(registros, 'Solplanet', nome_usina)
 
-    for inversor in inversores:
-        texto_linha = await inversor.locator('tr').last.inner_text()
+    else:
+        contador = 0
 
-        if 'normal' not in texto_linha.lower():
-            logger.warning(f'Há um inversor offline na usina Solplanet - {nome_usina}')
-            contador += 1
+        inversores = await extrair_linhas(
+            pagina.locator('#rc-tabs-1-panel-item-1 div.ant-collapse.ant-collapse-icon-position-start.ant-collapse-ghost'),
+            campos={'linhas': 'tr'}
+        )
+
+        for inversor in inversores:
+            texto_linha = inversor.campos['linhas'][-1] if inversor.campos['linhas'] else ''
+
+            if 'normal' not in texto_linha.lower():
+                logger.warning(f'Há um inversor offline na usina Solplanet - {nome_usina}')
+                contador += 1
 
     logger.info(f'Análise do status dos inversores  da usina Solplanet - {nome_usina} concluída')
 
+    RESULTADOS.registrar_status('Solplanet', nome_usina, contador)
+
     if contador == 0:
         logger.info(f'Todos os inversores da usina Solplanet - {nome_usina} estão online')
 
@@ -337,18 +381,26 @@ async def analisar_status_inversores_sungrow(pagina: Page, nome_usina: str):
     """ 
     logger.info(f'Iniciando análise dos status dos inversores da usina Sungrow {nome_usina}')
 
-    div_cards = await pagina.locator('div.card-container div.container').all()
+    registros = await inversores_coletados(pagina)
 
-    contador = 0
-    for card in div_cards:
-        status = await card.locator('div.isc-tag').text_content()
+    if registros is not None:
+        contador = contar_inversores_offline(registros, 'Sungrow', nome_usina)
 
-        if status.lower().replace(' ', '') != 'normal':
-            logger.warning(f'Há um inversor que não está online usina Sungrow {nome_usina}!  Status: {status}')
-            contador += 1
+    else:
+        div_cards = await extrair_linhas(pagina.locator('div.card-container div.container'), campos={'status': 'div.isc-tag'})
+
+        contador = 0
+        for card in div_cards:
+            status = card.campos['status'][0] if card.campos['status'] else ''
+
+            if status.lower().replace(' ', '').strip() != 'normal':
+                logger.warning(f'Há um inversor que não está online usina Sungrow {nome_usina}!  Status: {status}')
+                contador += 1
 
     logger.info(f'Análise dos status dos inversores da usina Sungrow {nome_usina} concluída')
 
+    RESULTADOS.registrar_status('Sungrow', nome_usina, contador)
+
     if contador == 0:
         logger.info('Todos os inversores estão online!')
 
@@ -369,18 +421,26 @@ async def analisar_status_inversores_phb(pagina: Page, nome_usina: str):
     """
     logger.info(f'Iniciando análise dos status dos inversores da usina Sungrow - {nome_usina}')
 
-    status = await pagina.locator('div.device-status').all()
+    registros = await inversores_coletados(pagina)
+
+    if registros is not None:
+        contador = contar_inversores_offline(registros, 'PHB', nome_usina)
+
+    else:
+        status = await extrair_linhas(pagina.locator('div.device-status'))
 
-    contador = 0
-    for item in status:
-        texto_status = await item.inner_text()
+        contador = 0
+        for item in status:
+            texto_status = item.texto_visivel
 
-        if texto_status.lower().strip() not in ('trabalhando', 'working'):
-            contador += 1
-            logger.warning(f'Há um inversor que não está online na usina PHB - {nome_usina}. Status: {item}')
+            if texto_status.lower().strip() not in ('trabalhando', 'working'):
+                contador += 1
+                logger.warning(f'Há um inversor que não está online na usina PHB - {nome_usina}. Status: {texto_status}')
 
     logger.info(f'Análise do status dos inversores PHB - {nome_usina} concluído')
 
+    RESULTADOS.registrar_status('PHB', nome_usina, contador)
+
     if contador == 0:
         logger.info('Todos os inversores estão online')
 
@@ -401,18 +461,26 @@ async def analisar_status_inversores_growatt(pagina: Page, nome_usina: str):
     """
     logger.info(f'Iniciando análise dos status dos inversores da usina Growatt - {nome_usina}')
 
-    tabela = await pagina.locator('tbody#inverterRefreshData > tr').all()
-    contador = 0
+    registros = await inversores_coletados(pagina)
+
+    if registros is not None:
+        contador = contar_inversores_offline(registros, 'Growatt', nome_usina)
+
+    else:
+        tabela = await extrair_linhas(pagina.locator('tbody#inverterRefreshData > tr'))
+        contador = 0
 
-    for linha in tabela:
-        texto_linha = await linha.text_content()
+        for linha in tabela:
+            texto_linha = linha.texto
 
-        if 'online' not in texto_linha.lower():
-            contador += 1
-            logger.warning(f'Há um inversor que não está online na usina Growatt - {nome_usina}')
+            if 'online' not in texto_linha.lower():
+                contador += 1
+                logger.warning(f'Há um inversor que não está online na usina Growatt - {nome_usina}')
 
     logger.info(f'Análise dos status dos inversores da usina Growatt - {nome_usina} concluída')
 
+    RESULTADOS.registrar_status('Growatt', nome_usina, contador)
+
     if contador == 0:
         logger.info(f'Todos os inversores estão online!')
 
@@ -433,18 +501,26 @@ async def analisar_status_inversores_shine(pagina: Page, nome_usina):
     """
     logger.info('Iniciando análise dos status dos inversores')
 
-    div_inversores = await pagina.locator('div#basicInfo div.basic_box_bottom').all()
+    registros = await inversores_coletados(pagina)
+
+    if registros is not None:
+        contador = contar_inversores_offline(registros, 'Shine', nome_usina)
+
+    else:
+        div_inversores = await extrair_linhas(pagina.locator('div#basicInfo div.basic_box_bottom'))
 
-    contador = 0
-    for inversor in div_inversores:
-        status_inversor = await inversor.inner_text()
+        contador = 0
+        for inversor in div_inversores:
+            status_inversor = inversor.texto_visivel
 
-        if 'normal' not in status_inversor.lower().strip():
-            contador += 1
-            logger.warning(f'Há um inversor que não está online na usina Shine - {nome_usina}. Status: {status_inversor}')
+            if 'normal' not in status_inversor.lower().strip():
+                contador += 1
+                logger.warning(f'Há um inversor que não está online na usina Shine - {nome_usina}. Status: {status_inversor}')
 
     logger.info(f'Análise dos status dos inversores da usina Shine - {nome_usina} concluída')
 
+    RESULTADOS.registrar_status('Shine', nome_usina, contador)
+
     if contador == 0:
         logger.info('Todos os inversores estão online')
 
@@ -466,19 +542,23 @@ async def analisar_historico_de_falhas_solis(pagina: Page, nome_usina: str):
     logger.info('Iniciando leitura do histórico de falhas')
 
     try:
-        await pagina.locator('a').filter(has_text='Alarme').click()
-        await pagina.wait_for_load_state('networkidle')
-        await asyncio.sleep(2.5)
+        async with aguardando_respostas(pagina, 'Solis', 'falhas'):
+            await pagina.locator('a').filter(has_text='Alarme').click()
 
-        if await pagina.locator('div.no-data-content').count() > 0:
+        await aguardar_carregamento_sumir(pagina, 'Solis')
+        await aguardar_seletor(pagina, 'div.no-data-content, div.gl-table-box tbody tr', teto=SINAIS_PRONTIDAO['Solis']['teto'])
+
+        if not await alarmes_coletados(pagina) and await pagina.locator('div.no-data-content').count() > 0:
             logger.info(f'Sem falhas pendentes no histórico da usina {nome_usina}')
 
         else:
             logger.warning(f'Falha encontrada na usina Solis - {nome_usina}')
 
-            await pagina.locator('div.gl-table-box').screenshot(
-                type='png',
-                path=Path(CAMINHO_PASTA_PRINTS, 'Solis', 'Falhas', f'falha {nome_usina} - {AGORA.date()}.png')
+            await salvar_print(
+                pagina.locator('div.gl-table-box'),
+                Path(CAMINHO_PASTA_PRINTS, 'Solis', 'Falhas', f'falha {nome_usina} - {RELOGIO.data}.png'),
+                'Solis', nome_usina,
+                aguardar=True # o print é anexado ao email logo em seguida
             )
 
             enviar_email(
@@ -505,20 +585,24 @@ async def analisar_historico_falhas_solplanet(pagina: Page, nome_usina: str):
     """
     logger.info(f'Iniciando análise do histórico de falhas da usina Solplanet - {nome_usina}')
 
-    await pagina.get_by_role('tab', name='Fault information').click()
-    await pagina.wait_for_load_state('networkidle')
-    await asyncio.sleep(2.5)
+    async with aguardando_respostas(pagina, 'Solplanet', 'falhas'):
+        await pagina.get_by_role('tab', name='Fault information').click()
+
+    await aguardar_carregamento_sumir(pagina, 'Solplanet')
+    await aguardar_seletor(pagina, 'div.ant-empty-description, div#rc-tabs-2-panel-plantDetailError tbody tr', teto=SINAIS_PRONTIDAO['Solplanet']['teto'])
 
-    if await pagina.locator('div.ant-empty-description').count() > 0:
+    if not await alarmes_coletados(pagina) and await pagina.locator('div.ant-empty-description').count() > 0:
         logger.info(f'Sem avisos pendentes na usina Solplanet - {nome_usina}')
 
     else:
         logger.warning(f'Falha encontrada na usina Solplanet - {nome_usina}')
 
-        await pagina.locator('div#rc-tabs-2-panel-plantDetailError').screenshot(
-            type='png', 
-            path=Path(CAMINHO_PASTA_PRINTS, 'Solplanet', 'Falhas', f'falha {nome_usina} - {AGORA.date()}.png').resolve()
-            )
+        await salvar_print(
+            pagina.locator('div#rc-tabs-2-panel-plantDetailError'),
+            Path(CAMINHO_PASTA_PRINTS, 'Solplanet', 'Falhas', f'falha {nome_usina} - {RELOGIO.data}.png').resolve(),
+            'Solplanet', nome_usina,
+            aguardar=True # o print é anexado ao email logo em seguida
+        )
 
         enviar_email(
             config_do_email='historico_de_falhas', 
@@ -541,20 +625,24 @@ async def analisar_historico_de_falhas_sungrow(pagina: Page, nome_usina: str):
         nome_usina (str): o nome da usina que está sendo analisada, será usado em caso de localização de alguma falha nos inversores.
 
     """
-    await pagina.locator('span.menu-item-text').filter(has_text='Falha').click()
-    await pagina.wait_for_load_state('networkidle')
-    await asyncio.sleep(2.5)
+    async with aguardando_respostas(pagina, 'Sungrow', 'falhas'):
+        await pagina.locator('span.menu-item-text').filter(has_text='Falha').click()
+
+    await aguardar_carregamento_sumir(pagina, 'Sungrow')
+    await aguardar_seletor(pagina, 'div.empty-container, div#plant-detail-overview-mount-loading-node tbody tr', teto=SINAIS_PRONTIDAO['Sungrow']['teto'])
 
-    if await pagina.locator('div.empty-container').count() > 0:
+    if not await alarmes_coletados(pagina) and await pagina.locator('div.empty-container').count() > 0:
         logger.info(f'Sem falhas pendentes no histórico para a usina Sungrow - {nome_usina}')
 
     else:
         try:
             logger.warning(f'Falha encontrada na usina Sungrow - {nome_usina}')
 
-            await pagina.locator('div#plant-detail-overview-mount-loading-node').screenshot(
-                type='png', 
-                path=Path(CAMINHO_PASTA_PRINTS, 'Sungrow', 'Falhas', f'falha {nome_usina} - {AGORA.date()}.png')
+            await salvar_print(
+                pagina.locator('div#plant-detail-overview-mount-loading-node'),
+                Path(CAMINHO_PASTA_PRINTS, 'Sungrow', 'Falhas', f'falha {nome_usina} - {RELOGIO.data}.png'),
+                'Sungrow', nome_usina,
+                aguardar=True # o print é anexado ao email logo em seguida
             )
 
             enviar_email(
@@ -581,22 +669,26 @@ async def analisar_historico_de_falhas_shine(pagina: Page, nome_usina: str):
     """
     logger.info(f'Analisando histórico de falhas da usina Shine {nome_usina}')
 
-    await pagina.get_by_role('link', name='Alerta').click()
-    await pagina.wait_for_load_state('networkidle')
-    await asyncio.sleep(2.5)
+    async with aguardando_respostas(pagina, 'Shine', 'falhas'):
+        await pagina.get_by_role('link', name='Alerta').click()
 
     tabela_falhas = pagina.locator('tbody#pltWarnsTbody')
     await tabela_falhas.wait_for(state='visible')
 
-    if await tabela_falhas.get_by_role('cell', name='No alarm for equipment').count() > 0:
+    await aguardar_carregamento_sumir(pagina, 'Shine')
+    await aguardar_seletor(pagina, 'tbody#pltWarnsTbody > tr', teto=SINAIS_PRONTIDAO['Shine']['teto'])
+
+    if not await alarmes_coletados(pagina) and await tabela_falhas.get_by_role('cell', name='No alarm for equipment').count() > 0:
         logger.info(f'Sem falhas pendentes no histórico da usina {nome_usina}')
 
     else:
         logger.warning(f'Falha encontrada na usina Shine - {nome_usina}')
 
-        await pagina.locator('div#plantAlarm').screenshot(
-            type='png', 
-            path=Path(CAMINHO_PASTA_PRINTS, 'Shine', 'Falhas', f'falha {nome_usina} - {AGORA.date()}.png').resolve()
+        await salvar_print(
+            pagina.locator('div#plantAlarm'),
+            Path(CAMINHO_PASTA_PRINTS, 'Shine', 'Falhas', f'falha {nome_usina} - {RELOGIO.data}.png').resolve(),
+            'Shine', nome_usina,
+            aguardar=True # o print é anexado ao email logo em seguida
         )
 
         enviar_email(
@@ -608,521 +700,69 @@ async def analisar_historico_de_falhas_shine(pagina: Page, nome_usina: str):
 
 
 
-async def monitoramento_solis(browser: Browser, lista_usinas: list, semaforo: asyncio.Semaphore):
-    """ Realiza o monitoramento das usinas do site SolisCloud.
-    
-    Args:
-        browser (Browser): a instância do navegador que será utilizado
-
-        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas no site.
-
-    """
-    async with semaforo:
-        logger.info('Iniciando monitoramento Solis...')
-        info_solis = sites['Solis']
-
-        async with await browser.new_context(viewport=VIEWPORT_PADRAO) as context:
-            pagina_inicial = await context.new_page()
-
-            await pagina_inicial.goto(info_solis['url'])
-
-            print(f'Página inicial Solis aberta')
-
-            try:
-                await pagina_inicial.get_by_role('textbox', name='Username/Email').fill(info_solis['login'])
-                await pagina_inicial.get_by_role('textbox', name='Palavra-passe').fill(info_solis['senha'])
-
-                await pagina_inicial.locator('label.el-checkbox.el-checkbox--default.el-tooltip__trigger').click()
-
-                await pagina_inicial.get_by_role('button', name="Login").click()
-
-                await pagina_inicial.wait_for_load_state('domcontentloaded')
-
-            except Exception as e:
-                logger.critical(f'Erro durante o login da Solis: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='login do site Solis')
-
-            else:
-                logger.info('Login na Solis realizado com sucesso, monitorando as usinas...')
-
-            try:
-                for usina in lista_usinas:
-                    try:
-                        async with pagina_inicial.context.expect_page() as nova_pag:
-                            await pagina_inicial.locator('div.station-name', has_text=usina).first.click()
-
-                    except Exception:
-                        logger.error(f'Não foi possível encontrar a usina {usina}, continuando para a próxima...')
-                        continue
-
-                    pag_usina = await nova_pag.value
-
-                    await pag_usina.wait_for_load_state('networkidle')
-
-                    await pag_usina.screenshot(
-                        full_page=True, 
-                        type='png', 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Solis', f'{usina} - visão geral.png')
-                    )
-
-                    if DATA_ATUAL.day == 1:
-                        dados_extraidos = await extrair_dados_mensais_solis(pag_usina, usina)
-                        processar_dados_mensais_solis(dados_extraidos, usina)
-
-                    await pag_usina.locator('a').filter(has_text='Dispositivo').click()
-                    await asyncio.sleep(2)
-
-                    area_inversores = pag_usina.locator('div#equipment.equipment')
-                    await area_inversores.wait_for(state='visible')
-
-                    await asyncio.sleep(1.5)
-
-                    await area_inversores.screenshot(
-                        type='png', 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Solis', f'{usina} - inversores.png')
-                    )
-
-                    await analisar_status_inversores_solis(pag_usina, usina)
-                    await asyncio.sleep(2)
-
-                    await analisar_historico_de_falhas_solis(pag_usina, usina)
-
-                    await pag_usina.close()
-
-            except Exception as e:
-                logger.error(f'Erro inesperado durante o monitoramento Solis: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'monitoramento da usina {usina}')
-
-        logger.info('Monitoramento Solis concluído')
-
-
-
-async def monitoramento_solplanet(browser: Browser, lista_usinas: list, semaforo: asyncio.Semaphore):
-    """ Realiza o monitoramento das usinas do site SoltPlanet.
-    
-    Args:
-        browser (Browser): a instância do navegador que será utilizado
-
-        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas no site. 
-
-    """
-    async with semaforo:
-        logger.info('Iniciando monitoramento SoltPlanet...')
-
-        info_soltplanet = sites['Solplanet']
-
-        async with await browser.new_context(viewport=VIEWPORT_PADRAO) as contexto:
-            pag_inicial = await contexto.new_page()
-
-            await pag_inicial.goto(info_soltplanet['url'])
-
-            print(f'Página inicial Solplanet aberta')
-
-            try:
-                await pag_inicial.get_by_placeholder('Please enter your email address or phone number').fill(info_soltplanet['login'])
-                await pag_inicial.get_by_placeholder('Please enter your password').fill(info_soltplanet['senha'])
-
-                await pag_inicial.get_by_role('checkbox').check()
-
-                await pag_inicial.get_by_role('button', name="login").click()
-                await asyncio.sleep(0.5)
-
-            except Exception as e:
-                logger.critical(f'Erro durante o login da SolPlanet: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='login do site Solplanet')
-
-            else:
-                logger.info('Login realizado, resolvendo o recaptcha...')
-
-            captcha_resolvido = await gerenciar_tentativas_captcha_solplanet(pag_inicial)
-            await asyncio.sleep(1)
-
-            if not captcha_resolvido:
-                return # o erro já é registrado dentro da função que gerencia as tentativas por isso não é preciso registrar de novo
-
-            try:
-                for usina in lista_usinas:
-                    async with pag_inicial.context.expect_page() as nova_pag:
-                        await pag_inicial.get_by_text(usina).click()
-
-                    pag_usina = await nova_pag.value
-
-                    imagem = pag_usina.get_by_role('img', name='avatar').last
-                    await imagem.wait_for(state='visible')
-
-                    await asyncio.sleep(8.5)
-
-                    limitador = pag_usina.locator('div.ant-card-head-title').filter(has_text='Energy flow diagram')
-
-                    area_limite = await limitador.bounding_box()
-                    limite_altura = area_limite['y'] - 20 # <- reduzindo 20px para não pegar a borda desse locator
-
-                    await pag_usina.screenshot(
-                        type='png', 
-                        clip={'x': 0, 'y': 0, 'width': 1920, 'height': limite_altura},
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Solplanet', f'{usina} - visão geral.png')
-                    )
-
-                    grafico = pag_usina.locator('div#rc-tabs-0-panel-power')
-                    await asyncio.sleep(1)
-
-                    await grafico.screenshot(
-                        type='png', 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Solplanet', f'{usina} - gráfico.png')
-                    )
-
-                    area_inversores = pag_usina.locator('#rc-tabs-1-panel-item-1')
-                    await asyncio.sleep(1)
-
-                    await area_inversores.screenshot(
-                        type='png', 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Solplanet', f'{usina} - inversores.png')
-                    )
-
-                    await analisar_status_inversores_solplanet(pag_usina, usina)
-                    await asyncio.sleep(2)
+async def distribuir_usinas_entre_paginas(pagina_inicial: Page, lista_usinas: list, monitorar_usina: Callable[[Page, str], Awaitable[None]], site: str, escalonador: EscalonadorAdaptativo):
+    """ Distribui as usinas de um site entre várias páginas do mesmo contexto já logado, monitorando-as em paralelo.
 
-                    await analisar_historico_falhas_solplanet(pag_usina, usina)
+    Cada página funciona como um trabalhador que retira a próxima usina da fila e chama monitorar_usina para ela, assim o tempo total do site passa a depender de ceil(usinas / páginas) e não do número de usinas.
+    A quantidade de páginas é definida por site em PAGINAS_POR_SITE. Uma falha em uma usina é registrada e notificada sem interromper as demais, e a página daquele trabalhador volta para a lista de usinas antes de seguir.
 
-                    await pag_usina.close()
-
-            except Exception as e:
-                logger.error(f'Erro inesperado durante o monitoramento da usina Solplanet - {usina}: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'monitoramento da usina {usina}')
-
-        logger.info('Monitoramento SoltPlanet concluído com sucesso')
-
-
-
-async def monitoramento_sungrow(browser: Browser, lista_usinas: list, semaforo: asyncio.Semaphore):
-    """ Realiza o monitoramento das usinas do site ISolarCloud (Sungrow).
-    
     Args:
-        browser (Browser): a instância do navegador que será utilizado
-
-        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas no site. 
-
-    """
-    async with semaforo:
-        logger.info('Iniciando monitoramento Sungrow...')
-        info_sungrow = sites['Sungrow']
-
-        async with await browser.new_context(viewport=VIEWPORT_PADRAO) as context:
-            pag_inicial = await context.new_page()
-
-            await pag_inicial.goto(info_sungrow['url'])
-
-            print(f'Página inicial Sungrow aberta')
-
-            try:
-                await pag_inicial.get_by_placeholder('Conta').fill(info_sungrow['login'])
-                await pag_inicial.get_by_placeholder('Senha').fill(info_sungrow['senha'])
-                await pag_inicial.get_by_role('button').filter(has_text='Entrar').click()
-
-                await pag_inicial.locator('div.menu-item').filter(has_text='Estação de energia').click()
-
-            except Exception as e:
-                logger.critical(f'Erro durante o login da Sungrow: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='login no site Sungrow')
-
-            else:
-                logger.info('Login na Sungrow realizado com sucesso, monitorando as usinas...')
-
-            try:
-                for usina in lista_usinas:
-                    await pag_inicial.wait_for_load_state('domcontentloaded')
-
-                    await pag_inicial.locator('div.plant-name').filter(has_text=usina).click()
-
-                    await pag_inicial.wait_for_load_state('networkidle')
-                    await asyncio.sleep(4.5)
-
-                    await pag_inicial.screenshot(
-                        type='png', 
-                        full_page=False, 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Sungrow', f'{usina} - visão geral.png')
-                    )
-
-                    canvas = pag_inicial.locator('canvas')
-                    await asyncio.sleep(2)
-
-                    await canvas.screenshot(
-                        type='png', 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Sungrow', f'{usina} - gráfico.png')
-                    )
-
-                    if DATA_ATUAL.day == 1:
-                        dados_do_mes = await extrair_dados_mensais_sungrow(pag_inicial, usina)
-                        processar_dados_mensais_sungrow(dados_do_mes, usina)
-
-                    await pag_inicial.locator('span.menu-item-text').filter(has_text='Dispositivos').click()
-                    await pag_inicial.wait_for_load_state('networkidle')
-
-                    area_inversores = pag_inicial.locator('div.card-container')
-                    await area_inversores.wait_for(state='visible')
-                    await asyncio.sleep(1)
-
-                    await area_inversores.screenshot(
-                        type='png', 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Sungrow', f'{usina} - inversores.png')
-                    )
-
-                    await analisar_status_inversores_sungrow(pag_inicial, usina)
-                    await asyncio.sleep(2)
-
-                    await analisar_historico_de_falhas_sungrow(pag_inicial, usina)
-
-                    await pag_inicial.get_by_text('Estação de energia').nth(1).click()
-
-            except Exception as e:
-                logger.error(f'Erro inesperado durante o monitoramento da usina Sungrow - {usina}: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'monitoramento da usina {e}')
-
-        logger.info('Monitoramento Sungrow concluído com sucesso!')
+        pagina_inicial (Page): a página já logada que está na lista de usinas do site. Ela é usada como o primeiro trabalhador e sua url serve de ponto de partida para as outras páginas.
 
+        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas no site.
 
+        monitorar_usina (Callable): a função que monitora uma única usina a partir de uma página na lista de usinas.
 
-async def monitoramento_growatt(browser: Browser, lista_usinas: list, semaforo: asyncio.Semaphore):
-    """ Realiza o monitoramento das usinas do site Growatt.
-    
-    Args:
-        browser (Browser): a instância do navegador que será utilizado
+        site (str): o nome do site, usado para buscar a quantidade de páginas e identificar os erros.
 
-        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas no site. 
+        escalonador (EscalonadorAdaptativo): cada usina só começa quando o escalonador libera uma vaga de usina, e sua duração é registrada como latência da etapa.
 
     """
-    async with semaforo:
-        logger.info('Iniciando monitoramento Growatt...')
-        info_growatt = sites['Growatt']
+    fila_usinas = asyncio.Queue()
 
-        async with await browser.new_context(viewport=VIEWPORT_PADRAO) as context:
-            pag_inicial = await context.new_page()
+    for usina in lista_usinas:
+        fila_usinas.put_nowait(usina)
 
-            await pag_inicial.goto(info_growatt['url'])
-
-            print(f'Página inicial Growatt aberta')
-
-            try:
-                await pag_inicial.get_by_placeholder('Usuário').fill(info_growatt['login'])
-                await pag_inicial.get_by_placeholder('Senha').fill(info_growatt['senha'])
-                await pag_inicial.get_by_role('button', name='Entrar').click()
+    url_lista_usinas = pagina_inicial.url
+    qtd_paginas = max(1, min(PAGINAS_POR_SITE.get(site, 1), len(lista_usinas)))
 
-            except Exception as e:
-                logger.critical(f'Erro durante o Login da Growatt: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='login no site Growatt')
+    logger.info(f'Monitorando {len(lista_usinas)} usinas do site {site} em {qtd_paginas} páginas')
 
-            else:
-                logger.info('Login na Growatt realizado com sucesso, monitorando as usinas...')
+    async def trabalhador(pagina: Page):
+        while not fila_usinas.empty():
+            usina = fila_usinas.get_nowait()
 
             try:
-                for usina in lista_usinas:
-                    async with pag_inicial.context.expect_page() as nova_pag:
-                        await pag_inicial.locator('tbody#tbl_data_plant td.plantName').filter(has_text=usina).click(click_count=2, delay=120)
-
-                    pag_usina = await nova_pag.value
-
-                    await pag_usina.wait_for_load_state('networkidle')
-                    await asyncio.sleep(2)
-
-                    area_limite = await pag_usina.locator('span').filter(has_text='Device List').bounding_box()
-                    limite_altura = area_limite['y'] - 20 # <- reduzindo 20px para não pegar a borda desse locator
-
-                    await pag_usina.screenshot(
-                        type='png', 
-                        clip={'x': 0, 'y': 0, 'width': 1920, 'height': limite_altura}, 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Growatt', f'{usina} - visão geral.png')
-                    )
-
-                    inversores = pag_usina.locator('tbody#inverterRefreshData')
-                    await inversores.screenshot(
-                        type='png', 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'Growatt', f'{usina} - inversores.png')
-                    )
+                async with escalonador.vaga_usina():
+                    inicio = perf_counter()
 
-                    await analisar_status_inversores_growatt(pag_usina, usina)
+                    await monitorar_usina(pagina, usina)
 
-                    if DATA_ATUAL.day == 1:
-                        await extrair_dados_mensais_growatt(pag_usina, usina)
-                        processar_dados_mensais_growatt(usina)
-
-                    await pag_usina.close()
+                    escalonador.registrar_latencia(f'usina {site}', perf_counter() - inicio)
+                    RESULTADOS.registrar_duracao_usina(site, usina, perf_counter() - inicio)
 
             except Exception as e:
-                logger.error(f'Erro inesperado durante o monitoramento da usina Growatt - {usina}: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'monitoramento da usina {usina}')
-
-        logger.info('Monitoramento Growatt concluído com sucesso!')
-
-
-
-async def monitoramento_phb(browser: Browser, lista_usinas: list, semaforo: asyncio.Semaphore):
-    """ Realiza o monitoramento das usinas do site Solar Portal (PHB).
-    
-    Args:
-        browser (Browser): a instância do navegador que será utilizado
-
-        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas no site. 
-
-    """
-    async with semaforo:
-        logger.info('Iniciando monitoramento PHB...')
-        info_phb = sites['PHB']
-
-        async with await browser.new_context(viewport=VIEWPORT_PADRAO) as context:
-            pag_inicial = await context.new_page()
-
-            await pag_inicial.goto(info_phb['url'])
-
-            print(f'Página inicial PHB aberta')
-
-            for usina in lista_usinas:
-                try:
-                    await pag_inicial.get_by_role("textbox", name="Endereço de e-mail").fill(info_phb['login_'+ usina], timeout=5000) 
-                    await pag_inicial.get_by_role('textbox', name='Por favor, digite sua senha').fill(info_phb['senha_' + usina], timeout=5000)
-
-                    await pag_inicial.locator('input#readStatement').check()
-
-                    await pag_inicial.get_by_role('button', name='Login').click()
-
-                except Exception:
-                    try:
-                        # Em caso de não haver correspondencia dos locators devido a linguagem, o código tenta executar com os nomes em ingles
-                        await pag_inicial.get_by_role("textbox", name="Email Address").fill(info_phb['login_'+ usina], timeout=5000) 
-                        await pag_inicial.get_by_role('textbox', name='Please enter your password').fill(info_phb['senha_' + usina], timeout=5000)
-
-                        await pag_inicial.locator('input#readStatement').check()
-                        await pag_inicial.get_by_role('button', name='Log In').click()
-
-                    except Exception as e:
-                        logger.critical(f'Erro durante o login PHB: {e}')                             
-                        enviar_email(config_do_email='erro_no_codigo', site='PHB', erro_capturado=e, onde_ocorreu_erro='login no site PHB')
-                        return
-
-                    else:
-                        logger.info(f'Login na PHB realizado com sucesso, monitorando as usinas...')
-
-                await pag_inicial.wait_for_load_state('networkidle')
+                logger.error(f'Erro inesperado durante o monitoramento da usina {site} - {usina}: {e}')
+                enviar_email('erro_no_codigo', site, usina, erro_capturado=e, onde_ocorreu_erro=f'monitoramento da usina {usina}')
 
                 try:
-                    grafico = pag_inicial.locator('canvas').last
-                    await grafico.wait_for(state='visible', timeout=15000)
-                    await asyncio.sleep(2) # Aguardando o gráfico de geração estar visível e acabar as animações
-
-                    div_inversores = pag_inicial.locator('div.row.foot-row')
-                    area_inversores = await div_inversores.bounding_box()
-
-                    await pag_inicial.screenshot(
-                        type='png', 
-                        clip= {'x': 0,'y': 0,'width': 1920,'height': area_inversores['y']}, 
-                        path=Path(CAMINHO_PASTA_PRINTS, 'PHB', f'{usina} - visão geral.png')
-                    )
-
-                    await div_inversores.wait_for(state='attached')
-
-                    for n in range(1, 5):
-                        await asyncio.sleep(0.8)
-
-                        await div_inversores.screenshot(
-                            type='png', 
-                            path=Path(CAMINHO_PASTA_PRINTS, 'PHB', f'{usina} - inversor {n}.png')
-                        )
-
-                        await div_inversores.hover()
-
-                        await pag_inicial.locator('div#data_carousel i.el-icon-arrow-right').click(force=True)
-                        await asyncio.sleep(0.8)
-
-                    await analisar_status_inversores_phb(pag_inicial, usina)
-
-                    if DATA_ATUAL.day == 1:
-                        dados = await extrair_dados_mensais_phb(pag_inicial, usina)
-                        processar_dados_mensais_phb(dados, usina)
-
-                    await pag_inicial.get_by_role('link', name='Sair').click()
-
-                    botao_confirmar = pag_inicial.get_by_role('button', name='Cofirmar')
-
-                    await expect(botao_confirmar).to_be_visible()
-                    await botao_confirmar.click()
+                    await pagina.goto(url_lista_usinas)
 
                 except Exception as e:
-                    logger.error(f'Erro durante o monitoramento da usina PHB {usina}: {e}')              
-                    enviar_email(config_do_email='erro_no_codigo', erro_capturado=e, site='PHB', usina=usina, onde_ocorreu_erro=f'monitoramento da usina {usina}')
+                    logger.error(f'Não foi possível voltar para a lista de usinas {site}: {e}')
+                    return
 
-        logger.info('Monitoramento PHB concluído com sucesso!')
+    paginas = [pagina_inicial]
 
+    for _ in range(qtd_paginas - 1):
+        nova_pagina = await pagina_inicial.context.new_page()
+        await nova_pagina.goto(url_lista_usinas)
 
+        paginas.append(nova_pagina)
 
-async def monitoramento_shine(browser: Browser, lista_usinas: list, semaforo: asyncio.Semaphore):
-    """ Realiza o monitoramento das usinas do site ShineMonitor.
-    
-    Args:
-        browser (Browser): a instância do navegador que será utilizado
-
-        lista_usinas (list): a lista contendo o nome das usinas que serão monitoradas no site.
-
-    """
-    async with semaforo:
-        logger.info('Iniciando monitoramento Shine...')
-        info_shine = sites['Shine']
-
-        async with await browser.new_context(viewport=VIEWPORT_PADRAO, ignore_https_errors=True) as context:
-            pag_inicial = await context.new_page()
-
-            await pag_inicial.goto(info_shine['url'])
-
-            print(f'Página inicial Shine aberta!')
-
-            try:
-                await pag_inicial.get_by_placeholder('Digite o nome do usuário').fill(info_shine['login'])
-                await pag_inicial.get_by_placeholder('Por favor, digite sua senha').fill(info_shine['senha'])
-                await pag_inicial.locator('div#loginbtn').filter(has_text='Login').click()
-
-                await pag_inicial.wait_for_load_state('networkidle')
-
-            except Exception as e:
-                logger.critical(f'Erro durante o login da Shine: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro='login no site Shine')
-
-            else:
-                logger.info('Login na Shine realizado com sucesso, monitorando as usinas...')
-
-            try:
-                await pag_inicial.wait_for_load_state('networkidle')
-                await asyncio.sleep(1)
-
-                await pag_inicial.screenshot(
-                    type='png', 
-                    full_page=True, 
-                    path=Path(CAMINHO_PASTA_PRINTS, 'Shine', 'UFV - Faz Fundão - visão geral.png')
-                )
-
-                geracao_total = await pag_inicial.locator('strong#stats03').text_content()
-
-                await pag_inicial.get_by_text('Visão Geral da Geração de Energia').click()
-                await pag_inicial.get_by_role('link', name='Energia Mês').click()
-
-                grafico = pag_inicial.locator('div#MonthContainer')
-
-                await grafico.wait_for(state='visible')
-                await asyncio.sleep(2)
-
-                await grafico.screenshot(
-                    type='png', 
-                    path=Path(CAMINHO_PASTA_PRINTS, 'Shine', 'UFV - Faz Fundão - inversores.png')
-                )
-
-                await analisar_status_inversores_shine(pag_inicial, 'UFV - Faz Fundão')
-                await asyncio.sleep(2)
-
-                if DATA_ATUAL.day == 1:
-                    dados = await extrair_dados_mensais_shine(pag_inicial, 'UFV - Faz Fundão')
-                    processar_dados_mensais_shine(dados, 'UFV - Faz Fundão', geracao_total)
-
-                await analisar_historico_de_falhas_shine(pag_inicial, 'UFV - Faz Fundão')
-
-            except Exception as e:
-                logger.error(f'Erro inesperado durante o monitoramento Shine: {e}')
-                enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'monitoramento da usina UFV - Faz Fundão')
+    try:
+        await asyncio.gather(*(trabalhador(pagina) for pagina in paginas))
 
-        logger.info('Monitoramento Shine concluído com sucesso!')
+    finally:
+        for pagina in paginas[1:]:
+            await pagina.close()
@@ -0,0 +1,444 @@
+""" Este módulo contém o gerenciador do navegador usado em cada execução do monitoramento.
+
+No modo padrão o Chromium é aberto e fechado a cada execução, como antes. Com o servidor ativo (SERVIDOR_NAVEGADOR['ativo']) um Chromium de longa duração fica aberto entre as execuções do agendador e cada execução apenas se conecta a ele, evitando a inicialização a frio do navegador.
+O servidor é verificado antes de cada uso e reiniciado caso tenha caído, e é reciclado depois de um número de execuções ou quando a memória usada por ele passa do limite.
+O pid salvo só é medido, conectado ou encerrado depois de confirmar que o processo ainda é o Chromium do servidor (executável, porta e perfil na linha de comando, e o momento de criação), já que após uma reinicialização o pid pode ser de outro processo.
+O tempo entre o início da execução e a primeira navegação concluída é registrado em Logs/navegador.jsonl para comparar os dois modos."""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import subprocess
+from datetime import datetime
+from time import perf_counter
+from typing import Optional
+from urllib.error import URLError
+from urllib.request import urlopen
+from playwright.async_api import Browser, Playwright
+from config import *
+
+try:
+    import psutil
+
+except ImportError:
+    psutil = None # Sem o psutil a memória do servidor é lida a partir do /proc
+
+
+logger = logging.getLogger('Navegador')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'navegador.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+CAMINHO_ESTADO_SERVIDOR = Path(CAMINHO_PASTA_CACHE, 'servidor_navegador.json')
+
+CAMINHO_PERFIL_SERVIDOR = Path(CAMINHO_PASTA_CACHE, 'Perfil do navegador')
+
+
+
+class GerenciadorNavegador:
+    """ Gerenciador de contexto assíncrono que entrega o navegador da execução.
+
+    Exemplo:
+        async with GerenciadorNavegador(pw, inicio) as chrome:
+            await monitorar_sites(chrome, ...)
+
+    Ao sair, no modo servidor a conexão é apenas desfeita (o Chromium continua aberto para a próxima execução), e no modo padrão o navegador é fechado.
+    """
+
+    def __init__(self, pw: Playwright, inicio_execucao: Optional[float] = None, usar_servidor: bool = True):
+        """
+        Args:
+            pw (Playwright): a instância do Playwright da execução.
+
+            inicio_execucao (float): o perf_counter do início da execução, usado para medir o tempo até a primeira navegação. Por padrão é o momento da criação do gerenciador.
+
+            usar_servidor (bool): False força um navegador local mesmo com o servidor ativo na configuração.
+
+        """
+        self.pw = pw
+        self.inicio_execucao = inicio_execucao or perf_counter()
+
+        self.configuracao = SERVIDOR_NAVEGADOR
+        self.usar_servidor = usar_servidor and SERVIDOR_NAVEGADOR['ativo']
+        self.navegador: Optional[Browser] = None
+
+        self.modo = 'local'
+
+
+    async def __aenter__(self) -> Browser:
+        if self.usar_servidor:
+            # Na segunda tentativa o servidor que falhou na verificação já foi encerrado, então um novo é iniciado
+            for tentativa in range(2):
+                try:
+                    self.navegador = await self._conectar_servidor()
+                    await self._primeira_navegacao()
+                    break
+
+                except Exception as e:
+                    logger.warning(f'O servidor do navegador falhou na verificação (tentativa {tentativa + 1}/2): {e}')
+
+                    estado = _carregar_estado()
+
+                    if estado:
+                        if _processo_do_servidor(estado):
+                            _encerrar_processo(estado['pid'])
+
+                        CAMINHO_ESTADO_SERVIDOR.unlink(missing_ok=True)
+
+                    self.navegador = None
+
+            else:
+                logger.error('Não foi possível usar o servidor do navegador, abrindo um navegador local')
+
+        if not self.navegador:
+            self.modo = 'local'
+            self.navegador = await self.pw.chromium.launch(headless=self.configuracao['headless'])
+
+            await self._primeira_navegacao()
+
+        self._registrar_tempo_ate_primeira_navegacao()
+
+        return self.navegador
+
+
+    async def __aexit__(self, *exc):
+        try:
+            await self.navegador.close() # Para um navegador conectado por CDP isso apenas desfaz a conexão
+
+        except Exception as e:
+            logger.warning(f'Erro ao fechar o navegador: {e}')
+
+        if self.modo != 'local':
+            self._registrar_execucao()
+
+
+    async def _conectar_servidor(self) -> Browser:
+        estado = _carregar_estado()
+
+        if estado and not _processo_do_servidor(estado):
+            # O pid pode ter sido reaproveitado por outro processo, que não deve ser medido nem encerrado
+            logger.warning(f'O servidor do navegador (pid {estado["pid"]}) não está mais ativo, iniciando um novo')
+            CAMINHO_ESTADO_SERVIDOR.unlink(missing_ok=True)
+            estado = None
+
+        if estado and self._precisa_reciclar(estado):
+            _encerrar_processo(estado['pid'])
+            estado = None
+
+        if estado:
+            try:
+                navegador = await self.pw.chromium.connect_over_cdp(_url_servidor(estado['porta']), timeout=self.configuracao['timeout_conexao'] * 1000)
+
+            except Exception as e:
+                logger.warning(f'O servidor do navegador não respondeu à conexão, reiniciando: {e}')
+                _encerrar_processo(estado['pid'])
+
+            else:
+                self.modo = 'servidor reaproveitado'
+                logger.info(f'Conectado ao servidor do navegador já aberto (pid {estado["pid"]}, execução {estado["execucoes"] + 1})')
+                return navegador
+
+        estado = await self._iniciar_servidor()
+
+        self.modo = 'servidor novo'
+        return await self.pw.chromium.connect_over_cdp(_url_servidor(estado['porta']), timeout=self.configuracao['timeout_conexao'] * 1000)
+
+
+    def _precisa_reciclar(self, estado: dict) -> bool:
+        if estado['execucoes'] >= self.configuracao['execucoes_maximas']:
+            logger.info(f'Reciclando o servidor do navegador após {estado["execucoes"]} execuções')
+            return True
+
+        memoria = _memoria_processo_mb(estado['pid'])
+
+        if memoria is not None and memoria >= self.configuracao['memoria_maxima_mb']:
+            logger.info(f'Reciclando o servidor do navegador, usando {memoria:.0f} MB de memória')
+            return True
+
+        return False
+
+
+    async def _iniciar_servidor(self) -> dict:
+        """ Abre o Chromium do Playwright como um processo independente, com a porta de depuração remota, e aguarda ele aceitar conexões. """
+        porta = self.configuracao['porta']
+
+        CAMINHO_PERFIL_SERVIDOR.mkdir(parents=True, exist_ok=True)
+
+        argumentos = [
+            self.pw.chromium.executable_path,
+            f'--remote-debugging-port={porta}',
+            '--remote-debugging-address=127.0.0.1',
+            f'--user-data-dir={CAMINHO_PERFIL_SERVIDOR}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--disable-background-timer-throttling',
+            '--disable-renderer-backgrounding',
+            'about:blank'
+        ]
+
+        if self.configuracao['headless']:
+            argumentos.insert(1, '--headless=new')
+
+        # O processo é desvinculado do script, assim o navegador continua aberto quando a execução termina
+        if os.name == 'nt':
+            desvincular = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+
+        else:
+            desvincular = {'start_new_session': True}
+
+        processo = subprocess.Popen(argumentos, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **desvincular)
+
+        limite = perf_counter() + self.configuracao['timeout_conexao']
+
+        while perf_counter() < limite:
+            if processo.poll() is not None:
+                raise RuntimeError(f'O Chromium do servidor encerrou logo ao iniciar (código {processo.returncode})')
+
+            if _servidor_respondendo(porta):
+                break
+
+            await asyncio.sleep(0.1)
+
+        else:
+            _encerrar_processo(processo.pid)
+            raise TimeoutError(f'O servidor do navegador não respondeu na porta {porta} em {self.configuracao["timeout_conexao"]}s')
+
+        estado = {
+            'pid': processo.pid,
+            'porta': porta,
+            'executavel': argumentos[0],
+            'criado_em': _momento_criacao(processo.pid),
+            'execucoes': 0,
+            'iniciado_em': datetime.now().isoformat(timespec='seconds')
+        }
+
+        _salvar_estado(estado)
+
+        logger.info(f'Servidor do navegador iniciado (pid {processo.pid}, porta {porta})')
+        return estado
+
+
+    async def _primeira_navegacao(self):
+        """ Faz uma navegação curta em um contexto descartável, que também serve de verificação de que o navegador está funcionando. """
+        contexto = await self.navegador.new_context()
+
+        try:
+            pagina = await contexto.new_page()
+            await pagina.goto('about:blank', timeout=self.configuracao['timeout_conexao'] * 1000)
+
+        finally:
+            await contexto.close()
+
+
+    def _registrar_tempo_ate_primeira_navegacao(self):
+        tempo = perf_counter() - self.inicio_execucao
+
+        logger.info(f'Primeira navegação concluída {tempo:.3f}s após o início da execução (modo: {self.modo})')
+
+        registro = {
+            'horario': datetime.now().isoformat(timespec='seconds'),
+            'modo': self.modo,
+            'headless': self.configuracao['headless'],
+            'tempo_ate_primeira_navegacao': round(tempo, 4)
+        }
+
+        try:
+            with open(Path(CAMINHO_PASTA_LOGS, 'navegador.jsonl'), 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+        except OSError as e:
+            logger.error(f'Não foi possível salvar o tempo até a primeira navegação: {e}')
+
+
+    def _registrar_execucao(self):
+        estado = _carregar_estado()
+
+        if estado:
+            estado['execucoes'] += 1
+            _salvar_estado(estado)
+
+
+
+def encerrar_servidor_navegador():
+    """ Encerra o servidor do navegador, caso exista, e apaga o seu estado. Útil para manutenção ou antes de atualizar o Playwright. """
+    estado = _carregar_estado()
+
+    if estado and _processo_do_servidor(estado):
+        _encerrar_processo(estado['pid'])
+        logger.info(f'Servidor do navegador (pid {estado["pid"]}) encerrado')
+
+    CAMINHO_ESTADO_SERVIDOR.unlink(missing_ok=True)
+
+
+
+def _url_servidor(porta: int) -> str:
+    return f'http://127.0.0.1:{porta}'
+
+
+
+def _servidor_respondendo(porta: int) -> bool:
+    try:
+        with urlopen(f'{_url_servidor(porta)}/json/version', timeout=1) as resposta:
+            return resposta.status == 200
+
+    except (URLError, OSError):
+        return False
+
+
+
+def _carregar_estado() -> Optional[dict]:
+    try:
+        with open(CAMINHO_ESTADO_SERVIDOR, 'r', encoding='utf-8') as arquivo_json:
+            return json.load(arquivo_json)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+
+def _salvar_estado(estado: dict):
+    CAMINHO_ESTADO_SERVIDOR.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(CAMINHO_ESTADO_SERVIDOR, 'w', encoding='utf-8') as arquivo_json:
+        json.dump(estado, arquivo_json, indent=4)
+
+
+
+def _linha_de_comando(pid: int) -> Optional[list[str]]:
+    if psutil:
+        try:
+            return psutil.Process(pid).cmdline()
+
+        except psutil.Error:
+            return None
+
+    try:
+        with open(Path('/proc', str(pid), 'cmdline'), 'rb') as arquivo:
+            return [argumento.decode(errors='replace') for argumento in arquivo.read().split(b'\0') if argumento]
+
+    except OSError:
+        return None
+
+
+
+def _momento_criacao(pid: int) -> Optional[float]:
+    if not psutil:
+        return None
+
+    try:
+        return psutil.Process(pid).create_time()
+
+    except psutil.Error:
+        return None
+
+
+
+def _processo_do_servidor(estado: dict) -> bool:
+    """ Confere se o pid do estado ainda é o Chromium do servidor: ativo, com o executável, a porta e o perfil do servidor na linha de comando e, quando salvo, o mesmo momento de criação.
+
+    Sem como ler a linha de comando (Windows sem o psutil) o processo não é considerado do servidor, e o estado é descartado sem encerrar nada.
+    """
+    pid = estado['pid']
+
+    if psutil:
+        try:
+            if psutil.Process(pid).status() == psutil.STATUS_ZOMBIE:
+                return False
+
+        except psutil.Error:
+            return False
+
+    linha = _linha_de_comando(pid)
+
+    if not linha:
+        return False
+
+    argumentos_esperados = (f'--remote-debugging-port={estado["porta"]}', f'--user-data-dir={CAMINHO_PERFIL_SERVIDOR}')
+
+    if not all(argumento in linha for argumento in argumentos_esperados):
+        return False
+
+    # Os estados salvos antes destes campos existirem são conferidos só pela porta e pelo perfil
+    if estado.get('executavel') and Path(linha[0]).resolve() != Path(estado['executavel']).resolve():
+        return False
+
+    criado_em = _momento_criacao(pid)
+
+    if estado.get('criado_em') and criado_em is not None and abs(criado_em - estado['criado_em']) > 1:
+        return False
+
+    return True
+
+
+
+def _encerrar_processo(pid: int):
+    try:
+        if psutil:
+            processo = psutil.Process(pid)
+
+            for filho in processo.children(recursive=True):
+                filho.kill()
+
+            processo.kill()
+
+        else:
+            os.kill(pid, signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)
+
+    except Exception as e:
+        logger.warning(f'Não foi possível encerrar o processo {pid} do servidor do navegador: {e}')
+
+
+
+def _memoria_processo_mb(pid: int) -> Optional[float]:
+    """ Soma a memória residente do processo principal do Chromium e de todos os seus filhos (renderizadores, GPU, rede). """
+    if psutil:
+        try:
+            processo = psutil.Process(pid)
+            processos = [processo] + processo.children(recursive=True)
+
+            return sum(p.memory_info().rss for p in processos) / 1024 ** 2
+
+        except psutil.Error:
+            return None
+
+    pasta_proc = Path('/proc')
+
+    if not pasta_proc.exists():
+        return None
+
+    filhos_por_pai: dict[int, list[int]] = {}
+    memoria_por_pid: dict[int, int] = {}
+
+    for pasta in pasta_proc.iterdir():
+        if not pasta.name.isdigit():
+            continue
+
+        try:
+            with open(pasta / 'status', encoding='utf-8') as status:
+                campos = dict(linha.split(':', 1) for linha in status if ':' in linha)
+
+        except OSError:
+            continue
+
+        pai = int(campos.get('PPid', '0').strip())
+        filhos_por_pai.setdefault(pai, []).append(int(pasta.name))
+        memoria_por_pid[int(pasta.name)] = int(campos.get('VmRSS', '0 kB').split()[0])
+
+    total_kb = 0
+    pendentes = [pid]
+
+    while pendentes:
+        atual = pendentes.pop()
+        total_kb += memoria_por_pid.get(atual, 0)
+        pendentes.extend(filhos_por_pai.get(atual, []))
+
+    return total_kb / 1024
@@ -1,13 +1,31 @@
 """ Este módulo contém as funções para criação e formatação dos arquivos docx onde os prints diários do monitoramento são inseridos.
-Tambem inclui a função que organiza e a que insere os prints em seus respectivos arquivos."""
+Tambem inclui a função que organiza e a que insere os prints em seus respectivos arquivos.
+
+No modo manifesto (DOCX_MENSAL['modo']) o docx do mês não é mais aberto e salvo todos os dias: cada dia só fixa os prints da usina na pasta do manifesto (hard links, ver armazem_prints.py) e acrescenta o dia ao manifesto.json.
+O docx é montado em uma única passada por montar_docx_pendentes quando o mês termina, ou a qualquer momento com python main.py --montar-docx.
+Se o modo manifesto for ativado no meio do mês, o docx que já existia passa a ser a base do manifesto e os dias dele são mantidos.
+A criação, a inserção diária e a montagem dos docx são divididas em um pool de processos (gerar_docx_em_paralelo), com uma tarefa por docx de usina.
+Os prints são reduzidos para o tamanho em que aparecem impressos (IMAGENS_DOCX) antes de serem inseridos, em vez de guardados na resolução cheia da tela."""
 
 import docx
 from docx.document import Document
 from docx.shared import Cm, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from PIL import Image
+import io
+import json
 import locale
 import logging
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from functools import lru_cache
+from time import perf_counter
+from typing import Callable
 from monitoramento import enviar_email
+from armazem_prints import fixar_print
 from config import *
 
 
@@ -21,14 +39,21 @@ file_formatter = logging.Formatter(FORMATACAO_LOGGING)
 file_handler.setFormatter(file_formatter)
 
 logger.addHandler(file_handler)
-logger.addHandler(logging.StreamHandler)
+logger.addHandler(logging.StreamHandler())
 
 
 locale.setlocale(locale.LC_TIME, 'pt_BR.UTF-8')
 
 
 
-def criar_docx_monitoramentos(nome_usina: str, site: str) -> Document:
+@lru_cache(maxsize=None)
+def _ler_imagem_fixa(*partes: str) -> bytes:
+    """ Lê uma única vez em cada processo as imagens repetidas em todos os docx (cabeçalho, rodapé e logo), em vez de abrir os arquivos a cada docx criado. """
+    return Path(CAMINHO_PASTA_RAIZ, *partes).read_bytes()
+
+
+
+def criar_docx_monitoramentos(nome_usina: str, site: str, data_referencia: Optional[date] = None, salvar: bool = True) -> Document:
     """ Cria um novo docx, formatando a página incial.
     
     A função cria um novo arquivo docx, formata a primeira página com título, cabeçalho, rodapé, logo Apollo e informações do documento.
@@ -37,6 +62,12 @@ def criar_docx_monitoramentos(nome_usina: str, site: str) -> Document:
     Args:
         nome_usina (str): o nome da usina que será adicionado na primeira página
 
+        site (str): o site da usina, que define a pasta do docx.
+
+        data_referencia (date): o mês e o ano da primeira página, o dia atual caso não seja informada.
+
+        salvar (bool): se o docx deve ser salvo na pasta do site logo após ser criado.
+
     Returns:
         Document: o objeto do documento recém criado e formatado.
 
@@ -66,10 +97,10 @@ def criar_docx_monitoramentos(nome_usina: str, site: str) -> Document:
         run_header = paragraph_header.add_run()
         run_footer = paragraph_footer.add_run()
 
-        run_header.add_picture(Path(CAMINHO_PASTA_RAIZ, 'img', 'cabecalho.png'), width=Cm(16.43), height=Cm(0.29)) 
-        run_footer.add_picture(Path(CAMINHO_PASTA_RAIZ,'img', 'cabecalho.png'), width=Cm(16.43), height=Cm(0.29)) 
+        run_header.add_picture(io.BytesIO(_ler_imagem_fixa('img', 'cabecalho.png')), width=Cm(16.43), height=Cm(0.29)) 
+        run_footer.add_picture(io.BytesIO(_ler_imagem_fixa('img', 'cabecalho.png')), width=Cm(16.43), height=Cm(0.29)) 
 
-        novo_doc.add_picture(Path(CAMINHO_PASTA_RAIZ, 'logo_apollo.jpg'), width=Cm(17.1), height=Cm(8.5))
+        novo_doc.add_picture(io.BytesIO(_ler_imagem_fixa('logo_apollo.jpg')), width=Cm(17.1), height=Cm(8.5))
 
         ultimo_paragrafo = novo_doc.paragraphs[-1]
         ultimo_paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -86,8 +117,10 @@ def criar_docx_monitoramentos(nome_usina: str, site: str) -> Document:
         infos = novo_doc.add_paragraph()
         run_nome_usina = infos.add_run(f'\n\n\n\n\n\n{nome_usina}\n')
 
-        mes_atual = DATA_ATUAL.strftime('%B')
-        run_data_local = infos.add_run(f'ITAÚNA/MG\n{mes_atual} {DATA_ATUAL.year}')
+        data_referencia = data_referencia or RELOGIO.data
+
+        mes_atual = data_referencia.strftime('%B')
+        run_data_local = infos.add_run(f'ITAÚNA/MG\n{mes_atual} {data_referencia.year}')
 
         run_nome_usina.bold = True
         run_nome_usina.font.name = 'Calibri'
@@ -96,7 +129,8 @@ def criar_docx_monitoramentos(nome_usina: str, site: str) -> Document:
         run_data_local.font.name = 'Arial'
         run_data_local.font.size = Pt(14)
 
-        novo_doc.save(Path(CAMINHO_PASTA_RAIZ, 'Histórico de monitoramentos', site, f'{nome_usina} - mês {DATA_ATUAL.month}.docx'))
+        if salvar:
+            novo_doc.save(Path(CAMINHO_PASTA_RAIZ, 'Histórico de monitoramentos', site, f'{nome_usina} - mês {data_referencia.month}.docx'))
 
     except Exception as e:
         logger.error(f'Erro {e} durante a criação do arquivo docx para a usina {site} - {nome_usina}')
@@ -189,11 +223,105 @@ def organizar_screenshots(relacao_site_usina: dict) -> dict:
 
 
 
+def tamanho_print_docx(site: str) -> dict:
+    """ Retorna a largura e, se houver, a altura em centímetros dos prints do site no docx, de acordo com IMAGENS_DOCX['tamanhos']. """
+    return IMAGENS_DOCX['tamanhos'].get(site, IMAGENS_DOCX['tamanhos']['padrao'])
+
+
+
+def preparar_imagem_docx(screenshot: Path, tamanho: dict) -> tuple[io.BytesIO, int, int]:
+    """ Reduz o print para a quantidade de pixels que ele ocupa impresso no docx em IMAGENS_DOCX['dpi'] e o recodifica.
+
+    O add_picture só muda o tamanho de exibição, então sem essa redução o docx guardava cada print na resolução cheia da tela.
+
+    Args:
+        screenshot (Path): o print original.
+
+        tamanho (dict): a largura ('largura_cm') e a altura opcional ('altura_cm') do print no docx (tamanho_print_docx).
+
+    Returns:
+        tuple[io.BytesIO, int, int]: a imagem que deve ser inserida, o tamanho do print original e o tamanho da imagem em bytes. Caso a recodificação não diminua o print, o próprio print original é retornado.
+
+    """
+    original = Path(screenshot).read_bytes()
+
+    with Image.open(io.BytesIO(original)) as imagem:
+        largura = round(tamanho['largura_cm'] / 2.54 * IMAGENS_DOCX['dpi'])
+        altura = round(tamanho['altura_cm'] / 2.54 * IMAGENS_DOCX['dpi']) if tamanho.get('altura_cm') else round(imagem.height * largura / imagem.width)
+
+        # Só reduz: um print menor do que o tamanho impresso continua com os seus pixels
+        if largura < imagem.width or altura < imagem.height:
+            imagem = imagem.resize((min(largura, imagem.width), min(altura, imagem.height)), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+
+        if IMAGENS_DOCX['formato'] == 'JPEG':
+            # Sem subamostragem das cores, que borra os textos coloridos dos prints
+            imagem.convert('RGB').save(buffer, 'JPEG', quality=IMAGENS_DOCX['qualidade'], subsampling=0, optimize=True)
+
+        else:
+            imagem.save(buffer, 'PNG', optimize=True)
+
+    if buffer.tell() >= len(original):
+        return io.BytesIO(original), len(original), len(original)
+
+    buffer.seek(0)
+
+    return buffer, len(original), buffer.getbuffer().nbytes
+
+
+
+def _adicionar_dia(doc: Document, site: str, data_str: str, screenshots: list) -> tuple[int, int]:
+    """ Adiciona uma nova seção ao docx com a data e os prints de um dia, reduzidos e no tamanho usado para os prints de cada site. Retorna a soma dos tamanhos dos prints originais e das imagens inseridas. """
+    nova_section = doc.add_section()
+
+    nova_section.bottom_margin = Cm(2.5)
+    nova_section.top_margin = Cm(2.5)
+
+    nova_section.right_margin = Cm(0.4)
+    nova_section.left_margin = Cm(0.4)
+
+    data_cabecalho = doc.add_paragraph()
+    run_data = data_cabecalho.add_run(data_str)
+
+    data_cabecalho.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    run_data.font.name = 'Calibri'
+    run_data.font.size = Pt(20)
+    run_data.font.bold = True
+
+    tamanho = tamanho_print_docx(site)
+    bytes_originais = bytes_inseridos = 0
+
+    for screenshot in screenshots:
+        imagem, tamanho_original, tamanho_inserido = preparar_imagem_docx(screenshot, tamanho)
+
+        doc.add_picture(imagem, width=Cm(tamanho['largura_cm']), height=Cm(tamanho['altura_cm']) if tamanho.get('altura_cm') else None)
+
+        ultimo_paragrafo = doc.paragraphs[-1]
+        ultimo_paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+        bytes_originais += tamanho_original
+        bytes_inseridos += tamanho_inserido
+
+    return bytes_originais, bytes_inseridos
+
+
+
+def _relatar_reducao(descricao: str, bytes_originais: int, bytes_inseridos: int, caminho_doc: Path):
+    logger.info(
+        f'{descricao}: prints com {bytes_originais / 1024 ** 2:.1f} MB inseridos com {bytes_inseridos / 1024 ** 2:.1f} MB '
+        f'({(1 - bytes_inseridos / bytes_originais) * 100 if bytes_originais else 0:.0f}% menores), docx com {caminho_doc.stat().st_size / 1024 ** 2:.1f} MB'
+    )
+
+
+
 def inserir_prints_docx(relacao_site_usina: dict, screenshots_organizadas: dict):
     """ Insere os prints do monitoramento no seu respectivo arquivo docx.
     
     Essa função irá inserir o print fornecido como argumento no docx daquela usina naquele mês específico, adicionando uma nova página em cada chamada e inserindo os prints na ordem em que foram fornecidos na lista.
     O ajuste de tamanho para as imagens é feito na própria função baseado no tamanho dos prints que foram tirados no mês 07/2025.
+    No modo manifesto (DOCX_MENSAL['modo']) os prints são apenas registrados no manifesto do mês, e o docx é montado depois por montar_docx_pendentes.
 
     Args:
         relacao_site_usina (dict): um dicionário que contenha os sites como chave e uma lista com as usinas de cada site como valor.
@@ -202,68 +330,372 @@ def inserir_prints_docx(relacao_site_usina: dict, screenshots_organizadas: dict)
         FileNotFoundError: essa exceção será levantada caso o arquivo do docx ou o caminho para a imagem não for encontrado.
 
     """
+    if DOCX_MENSAL['modo'] == 'manifesto':
+        registrar_prints_manifestos(relacao_site_usina, screenshots_organizadas)
+        return
+
     logger.info('Iniciando inserção dos prints nos respectivos arquivos docx')
 
-    for site in relacao_site_usina.keys():
-        usinas = relacao_site_usina[site]
+    gerar_docx_em_paralelo(
+        [
+            (site, nome_usina, inserir_prints_usina, (nome_usina, site, screenshots_organizadas[site][nome_usina]))
+            for site, usinas in relacao_site_usina.items()
+            for nome_usina in usinas
+        ],
+        'inserção dos prints no docx'
+    )
 
-        for nome_usina in usinas:
-            caminho_doc = Path(CAMINHO_PASTA_DOCX, site, f'{nome_usina} - mês {DATA_ATUAL.month}.docx')
+    logger.info('Inserção dos prints nos arquivos docx concluído com sucesso!') 
 
-            if caminho_doc.exists:
-                doc = docx.Document(caminho_doc)
 
-            elif DATA_ATUAL.day == 1:
-                doc = criar_docx_monitoramentos(nome_usina, site)
 
-            else:
-                logger.error(f'Arquivo docx do monitoramento para a usina {nome_usina} não encontrado. Continuando para o próximo...')
-                continue
+def inserir_prints_usina(nome_usina: str, site: str, screenshots: list) -> bool:
+    """ Abre o docx do mês da usina, acrescenta os prints do dia e salva. Retorna se os prints foram inseridos. """
+    caminho_doc = Path(CAMINHO_PASTA_DOCX, site, f'{nome_usina} - mês {RELOGIO.data.month}.docx')
+
+    if caminho_doc.exists():
+        doc = docx.Document(caminho_doc)
+
+    elif RELOGIO.data.day == 1:
+        doc = criar_docx_monitoramentos(nome_usina, site)
+
+    else:
+        logger.error(f'Arquivo docx do monitoramento para a usina {nome_usina} não encontrado. Continuando para o próximo...')
+        return False
+
+    if doc is None:
+        return False
+
+    try:
+        bytes_originais, bytes_inseridos = _adicionar_dia(doc, site, RELOGIO.agora.strftime('%d/%m/%Y'), screenshots)
+
+    except Exception as e:
+        logger.error(f'Erro ao inserir as screenshots da usina {nome_usina} no docx: {e}')
+        return False
+
+    doc.save(caminho_doc)
+    logger.info(f'Prints da usina {nome_usina} inserido no docx com sucesso!')
+
+    _relatar_reducao(f'Docx da usina {nome_usina} ({site})', bytes_originais, bytes_inseridos, caminho_doc)
+
+    return True
+
+
+
+def _executar_tarefa_docx(funcao: Callable, momento_ciclo: datetime, argumentos: tuple) -> float:
+    """ Ponto de entrada dos processos do pool dos docx: executa a tarefa com o relógio do processo principal e devolve a duração. """
+    RELOGIO.atualizar(momento_ciclo)
+    inicio = perf_counter()
+
+    # As funções dos docx registram o erro no log e retornam False ou None quando não concluem
+    if not funcao(*argumentos):
+        raise RuntimeError(f'{funcao.__name__} não foi concluída, veja o organizacao_prints.log')
+
+    return perf_counter() - inicio
+
 
-            nova_section = doc.add_section()
 
-            nova_section.bottom_margin = Cm(2.5)
-            nova_section.top_margin = Cm(2.5)
+def gerar_docx_em_paralelo(tarefas: list[tuple[str, str, Callable, tuple]], descricao: str) -> dict:
+    """ Divide o trabalho dos docx em um pool de processos, com uma tarefa por docx de usina, e reúne os tempos e os erros no processo principal.
 
-            nova_section.right_margin = Cm(0.4)
-            nova_section.left_margin = Cm(0.4)
+    O python-docx gasta a maior parte do tempo montando XML e compactando o zip, então um único processo deixava os outros núcleos parados.
+    Com DOCX_MENSAL['processos'] igual a 1, ou uma única tarefa, tudo roda no próprio processo, sem o custo de iniciar o pool.
 
-            data_str = AGORA.strftime('%d/%m/%Y')
+    Args:
+        tarefas (list): tuplas (site, usina, funcao, argumentos). A função precisa estar no nível do módulo, para ser enviada aos processos, e retornar um valor verdadeiro quando concluir.
+
+        descricao (str): o que as tarefas fazem, usado no log e nos emails de erro.
+
+    Returns:
+        dict: a duração em segundos de cada (site, usina) concluída em 'tempos' e o erro de cada uma que falhou em 'erros'.
 
-            data_cabecalho = doc.add_paragraph()
-            run_data = data_cabecalho.add_run(data_str)
+    """
+    inicio = perf_counter()
+    tempos, erros = {}, {}
 
-            data_cabecalho.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    def registrar_erro(site: str, usina: str, erro: Exception):
+        erros[(site, usina)] = erro
 
-            run_data.font.name = 'Calibri'
-            run_data.font.size = Pt(20)
-            run_data.font.bold = True
+        logger.error(f'Erro na {descricao} da usina {usina} ({site}): {erro}')
+        enviar_email('erro_no_codigo', site, usina, erro_capturado=erro, onde_ocorreu_erro=f'{descricao} da usina {usina} ({site})')
 
+    if DOCX_MENSAL['processos'] <= 1 or len(tarefas) <= 1:
+        for site, usina, funcao, argumentos in tarefas:
             try:
-                for screenshot in screenshots_organizadas[site][nome_usina]:
-                    if site == 'Shine':
-                        doc.add_picture(screenshot, width=Cm(18.3), height=Cm(9.5))
+                tempos[(site, usina)] = _executar_tarefa_docx(funcao, RELOGIO.agora, argumentos)
+
+            except Exception as e:
+                registrar_erro(site, usina, e)
+
+    else:
+        # 'spawn' pelo mesmo motivo de processos_sites.py
+        with ProcessPoolExecutor(max_workers=min(DOCX_MENSAL['processos'], len(tarefas)), mp_context=multiprocessing.get_context('spawn')) as executor:
+            futuros = {
+                executor.submit(_executar_tarefa_docx, funcao, RELOGIO.agora, argumentos): (site, usina)
+                for site, usina, funcao, argumentos in tarefas
+            }
+
+            for futuro in as_completed(futuros):
+                site, usina = futuros[futuro]
+
+                try:
+                    tempos[(site, usina)] = futuro.result()
+
+                except Exception as e:
+                    registrar_erro(site, usina, e)
+
+    if tempos:
+        (site_lento, usina_lenta), mais_lento = max(tempos.items(), key=lambda item: item[1])
+
+        logger.info(
+            f'{descricao.capitalize()}: {len(tempos)} docx em {perf_counter() - inicio:.2f}s ({sum(tempos.values()):.2f}s somando as tarefas), '
+            f'{len(erros)} com erro, o mais lento foi {usina_lenta} ({site_lento}) com {mais_lento:.2f}s'
+        )
+
+    return {'tempos': tempos, 'erros': erros}
 
-                        ultimo_paragrafo = doc.paragraphs[-1]
-                        ultimo_paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-                    elif site == 'Sungrow':
-                        doc.add_picture(screenshot, width=Cm(18))
 
-                        ultimo_paragrafo = doc.paragraphs[-1]
-                        ultimo_paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+def pasta_manifesto(site: str, usina: str, data_referencia: date) -> Path:
+    return Path(DOCX_MENSAL['pasta_manifestos'], site, f'{usina} - {data_referencia:%Y-%m}')
+
+
+
+def _ler_manifesto(pasta: Path) -> Optional[dict]:
+    try:
+        with open(Path(pasta, 'manifesto.json'), 'r', encoding='utf-8') as arquivo_json:
+            return json.load(arquivo_json)
+
+    except FileNotFoundError:
+        return None
+
 
-                    else:
-                        doc.add_picture(screenshot, width=Cm(20))
 
-                        ultimo_paragrafo = doc.paragraphs[-1]
-                        ultimo_paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+def _salvar_manifesto(pasta: Path, manifesto: dict):
+    caminho = Path(pasta, 'manifesto.json')
+    caminho_temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+
+    with open(caminho_temporario, 'w', encoding='utf-8') as arquivo_json:
+        json.dump(manifesto, arquivo_json, indent=4, ensure_ascii=False)
+
+    os.replace(caminho_temporario, caminho)
+
+
+
+def caminho_docx_mensal(site: str, usina: str, mes: int) -> Path:
+    return Path(CAMINHO_PASTA_DOCX, site, f'{usina} - mês {mes}.docx')
+
+
+
+def _adotar_docx_existente(pasta: Path, manifesto: dict):
+    """ Guarda como base do manifesto o docx do mês que já existia quando o manifesto foi criado (modo manifesto ativado no meio do mês).
+
+    A montagem parte de uma cópia desse docx em vez de uma primeira página nova, assim os dias inseridos antes da troca de modo não se perdem.
+    É uma cópia e não um hard link porque o modo diário salva o docx no próprio arquivo, o que alteraria a base junto.
+    Um docx modificado em outro mês (o mesmo mês do ano anterior, já que o nome não tem o ano) não é adotado.
+
+    """
+    caminho_doc = caminho_docx_mensal(manifesto['site'], manifesto['usina'], manifesto['mes'])
+
+    if not caminho_doc.exists():
+        return
+
+    modificado_em = datetime.fromtimestamp(caminho_doc.stat().st_mtime)
+
+    if (modificado_em.year, modificado_em.month) != (manifesto['ano'], manifesto['mes']):
+        return
+
+    shutil.copy2(caminho_doc, Path(pasta, 'base.docx'))
+    manifesto['base'] = 'base.docx'
+
+    logger.info(f'Docx {caminho_doc.name} ({manifesto["site"]}) adotado como base do manifesto, os dias já inseridos nele serão mantidos')
+
+
+
+def registrar_no_manifesto(pasta: Path, site: str, usina: str, dia: date, screenshots: list) -> list[Path]:
+    """ Fixa os prints do dia na pasta do manifesto e acrescenta o dia ao manifesto, substituindo o registro anterior do mesmo dia.
+
+    Args:
+        pasta (Path): a pasta do manifesto da usina no mês (pasta_manifesto).
+
+        site (str): o site da usina.
+
+        usina (str): o nome da usina.
+
+        dia (date): o dia dos prints.
+
+        screenshots (list): os prints do dia, na ordem em que entram no docx. Os que não existirem são ignorados.
+
+    Returns:
+        list[Path]: os prints fixados na pasta do manifesto.
+
+    """
+    pasta.mkdir(parents=True, exist_ok=True)
+    fixados = []
+
+    for n, screenshot in enumerate(map(Path, screenshots), start=1):
+        if not screenshot.exists():
+            logger.warning(f'Print {screenshot} não encontrado, o dia {dia:%d/%m/%Y} da usina {usina} ({site}) seguirá sem ele')
+            continue
+
+        destino = Path(pasta, f'{dia:%d} - {n}{screenshot.suffix}')
+        fixar_print(screenshot, destino)
+        fixados.append(destino)
+
+    # Os prints de uma execução anterior do mesmo dia que não foram refeitos agora
+    for antigo in pasta.glob(f'{dia:%d} - *'):
+        if antigo not in fixados:
+            antigo.unlink()
+
+    manifesto = _ler_manifesto(pasta)
+
+    if manifesto is None:
+        manifesto = {'site': site, 'usina': usina, 'ano': dia.year, 'mes': dia.month, 'criado_em': datetime.now().timestamp(), 'dias': []}
+        _adotar_docx_existente(pasta, manifesto)
+
+    manifesto['dias'] = sorted(
+        [registro for registro in manifesto['dias'] if registro['data'] != dia.isoformat()] + [{'data': dia.isoformat(), 'prints': [fixado.name for fixado in fixados]}],
+        key=lambda registro: registro['data']
+    )
+
+    _salvar_manifesto(pasta, manifesto)
+
+    return fixados
+
+
+
+def registrar_prints_manifestos(relacao_site_usina: dict, screenshots_organizadas: dict):
+    """ Registra os prints do dia de cada usina no manifesto do mês e, caso DOCX_MENSAL['parcial_diario'], grava o docx parcial só com os prints do dia. """
+    logger.info('Iniciando registro dos prints nos manifestos dos docx')
+
+    for site, usinas in relacao_site_usina.items():
+        for nome_usina in usinas:
+            try:
+                fixados = registrar_no_manifesto(pasta_manifesto(site, nome_usina, RELOGIO.data), site, nome_usina, RELOGIO.data, screenshots_organizadas[site][nome_usina])
+
+                if DOCX_MENSAL['parcial_diario']:
+                    doc = docx.Document()
+                    _adicionar_dia(doc, site, RELOGIO.agora.strftime('%d/%m/%Y'), fixados)
+
+                    caminho_parcial = Path(CAMINHO_PASTA_DOCX, site, 'Parciais', f'{nome_usina} - parcial.docx')
+                    caminho_parcial.parent.mkdir(parents=True, exist_ok=True)
+                    doc.save(caminho_parcial)
 
             except Exception as e:
-                logger.error(f'Erro ao inserir as screenshots da usina {nome_usina} no docx: {e}')
+                logger.error(f'Erro ao registrar os prints da usina {nome_usina} ({site}) no manifesto: {e}')
 
             else:
-                doc.save(caminho_doc)
-                logger.info(f'Prints da usina {nome_usina} inserido no docx com sucesso!')
+                logger.info(f'Prints da usina {nome_usina} ({site}) registrados no manifesto com sucesso!')
 
-    logger.info('Inserção dos prints nos arquivos docx concluído com sucesso!') 
+    logger.info('Registro dos prints nos manifestos concluído')
+
+
+
+def montar_docx(pasta: Path, caminho_doc: Path) -> bool:
+    """ Monta o docx do mês a partir do manifesto, em uma única passada e com um único salvamento.
+
+    Caso o manifesto tenha adotado o docx que já existia no mês (_adotar_docx_existente), os dias do manifesto são acrescentados a uma cópia dele em vez de a uma primeira página nova.
+
+    Args:
+        pasta (Path): a pasta do manifesto da usina no mês.
+
+        caminho_doc (Path): onde o docx é salvo. O docx anterior só é substituído depois de o novo estar completo.
+
+    Returns:
+        bool: se o docx foi montado.
+
+    """
+    manifesto = _ler_manifesto(pasta)
+
+    if manifesto is None:
+        logger.error(f'Manifesto não encontrado em {pasta}')
+        return False
+
+    site, usina = manifesto['site'], manifesto['usina']
+
+    # Um docx anterior ao manifesto e que não foi adotado como base tem dias que o manifesto não cobre, e não pode ser substituído
+    # (nos manifestos sem 'criado_em' vale o primeiro dia registrado)
+    criado_em = manifesto.get('criado_em') or (datetime.fromisoformat(manifesto['dias'][0]['data']).timestamp() if manifesto['dias'] else 0)
+
+    if 'base' not in manifesto and caminho_doc.exists() and caminho_doc.stat().st_mtime < criado_em:
+        logger.error(f'O docx {caminho_doc} é anterior ao manifesto {pasta.name} e não foi adotado como base, ele não será substituído')
+        return False
+
+    if 'base' in manifesto:
+        doc = docx.Document(Path(pasta, manifesto['base']))
+
+    else:
+        doc = criar_docx_monitoramentos(usina, site, data_referencia=date(manifesto['ano'], manifesto['mes'], 1), salvar=False)
+
+    if doc is None:
+        return False
+
+    bytes_originais = bytes_inseridos = 0
+
+    for registro in manifesto['dias']:
+        try:
+            originais, inseridos = _adicionar_dia(doc, site, date.fromisoformat(registro['data']).strftime('%d/%m/%Y'), [Path(pasta, nome) for nome in registro['prints']])
+
+            bytes_originais += originais
+            bytes_inseridos += inseridos
+
+        except Exception as e:
+            logger.error(f'Erro ao inserir os prints do dia {registro["data"]} da usina {usina} ({site}) no docx: {e}')
+
+    caminho_doc.parent.mkdir(parents=True, exist_ok=True)
+    caminho_temporario = caminho_doc.with_name(f'{caminho_doc.stem}.{os.getpid()}.tmp')
+
+    doc.save(caminho_temporario)
+    os.replace(caminho_temporario, caminho_doc)
+
+    logger.info(f'Docx da usina {usina} ({site}) montado com {len(manifesto["dias"])} dias')
+
+    _relatar_reducao(f'Docx da usina {usina} ({site}) - mês {manifesto["mes"]}', bytes_originais, bytes_inseridos, caminho_doc)
+
+    return True
+
+
+
+def montar_docx_pendentes(incluir_mes_atual: bool = False):
+    """ Monta os docx dos meses encerrados (e do mês atual no último dia dele) cujo manifesto mudou desde a última montagem.
+
+    Os docx são montados em paralelo por gerar_docx_em_paralelo. Os manifestos dos meses anteriores a DOCX_MENSAL['manter_meses'] são apagados depois de o docx estar montado, liberando os prints fixados por eles.
+
+    Args:
+        incluir_mes_atual (bool): monta também o docx parcial do mês atual, para gerar o docx sob demanda.
+
+    """
+    hoje = RELOGIO.data
+    ultimo_dia_do_mes = (hoje + timedelta(days=1)).month != hoje.month
+
+    tarefas = []
+    antigos = []
+
+    for caminho_manifesto in Path(DOCX_MENSAL['pasta_manifestos']).glob('*/*/manifesto.json'):
+        pasta = caminho_manifesto.parent
+
+        try:
+            manifesto = _ler_manifesto(pasta)
+            meses_passados = (hoje.year * 12 + hoje.month) - (manifesto['ano'] * 12 + manifesto['mes'])
+
+            if meses_passados == 0 and not (incluir_mes_atual or ultimo_dia_do_mes):
+                continue
+
+            caminho_doc = caminho_docx_mensal(manifesto['site'], manifesto['usina'], manifesto['mes'])
+
+            if not caminho_doc.exists() or caminho_doc.stat().st_mtime < caminho_manifesto.stat().st_mtime:
+                tarefas.append((manifesto['site'], manifesto['usina'], montar_docx, (pasta, caminho_doc)))
+
+            if meses_passados > DOCX_MENSAL['manter_meses']:
+                antigos.append((manifesto['site'], manifesto['usina'], pasta))
+
+        except Exception as e:
+            logger.error(f'Erro ao ler o manifesto {pasta}: {e}')
+            enviar_email('erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'leitura do manifesto {pasta.name}')
+
+    erros = gerar_docx_em_paralelo(tarefas, 'montagem do docx mensal')['erros']
+
+    for site, usina, pasta in antigos:
+        if (site, usina) not in erros:
+            shutil.rmtree(pasta, ignore_errors=True)
+            logger.info(f'Manifesto {pasta.name} ({site}) apagado')
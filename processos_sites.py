@@ -0,0 +1,148 @@
+""" Este módulo contém o modo de execução em que os sites são divididos em grupos, cada um monitorado em um processo separado.
+
+No modo padrão os seis sites compartilham um único processo e um único event loop, então qualquer trabalho síncrono (gravação de prints, reescrita dos JSON mensais, leitura dos xls, envio de emails) trava todos os sites.
+Aqui cada grupo de PROCESSOS_SITES['grupos'] roda em um processo com a sua própria instância do Playwright, do navegador e do escalonador. Cada processo devolve os seus resultados estruturados, que são mesclados em RESULTADOS no processo principal."""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from time import perf_counter
+from playwright.async_api import async_playwright
+from config import *
+from codificacao_prints import encerrar_codificacao
+from diario_execucao import DIARIO
+from escalonador import EscalonadorAdaptativo
+from fila_emails import FILA_EMAILS
+from adaptadores import monitorar_sites
+from monitoramento import enviar_email
+from navegador import GerenciadorNavegador
+from resultados import RESULTADOS
+from limite_erros import enviar_erros_suprimidos
+from resumo_alertas import RESUMO
+
+
+logger = logging.getLogger('Processos dos sites')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'processos_sites.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+def agrupar_sites(mapeamento_site_usinas: dict) -> list[dict]:
+    """ Divide o mapeamento de acordo com PROCESSOS_SITES['grupos']. Sites do mapeamento que não estão em nenhum grupo ficam, cada um, em um grupo próprio.
+
+    Args:
+        mapeamento_site_usinas (dict): os sites como chave e a lista de usinas de cada site como valor.
+
+    Returns:
+        list[dict]: um mapeamento parcial para cada grupo, sem grupos vazios.
+
+    """
+    grupos = []
+    agrupados = set()
+
+    for grupo in PROCESSOS_SITES['grupos']:
+        parcial = {site: mapeamento_site_usinas[site] for site in grupo if site in mapeamento_site_usinas}
+        agrupados.update(parcial)
+
+        if parcial:
+            grupos.append(parcial)
+
+    grupos.extend({site: usinas} for site, usinas in mapeamento_site_usinas.items() if site not in agrupados)
+
+    return grupos
+
+
+
+def monitorar_grupo(mapeamento_grupo: dict, momento_ciclo: datetime, caminho_diario: Optional[Path] = None) -> dict:
+    """ Ponto de entrada do processo trabalhador: monitora os sites do grupo e devolve os resultados exportados.
+
+    Args:
+        mapeamento_grupo (dict): os sites do grupo e as suas usinas.
+
+        momento_ciclo (datetime): o momento de início do ciclo no processo principal, assim todos os processos usam o mesmo relógio.
+
+        caminho_diario (Path): o diário da execução aberto no processo principal, onde o processo registra as etapas concluídas.
+
+    Returns:
+        dict: os resultados do grupo no formato de RegistroResultados.exportar().
+
+    """
+    RELOGIO.atualizar(momento_ciclo)
+    RESULTADOS.limpar()
+
+    if caminho_diario:
+        DIARIO.continuar(caminho_diario)
+
+    try:
+        asyncio.run(_monitorar_grupo(mapeamento_grupo))
+
+    except Exception as e:
+        logger.critical(f'Erro inesperado no processo dos sites {list(mapeamento_grupo)}: {e}')
+        enviar_email(config_do_email='erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'processo dos sites {", ".join(mapeamento_grupo)}')
+
+    # Os processos do pool terminam sem passar pelo atexit, então os prints e os avisos do grupo são concluídos aqui
+    encerrar_codificacao()
+    RESUMO.enviar()
+    enviar_erros_suprimidos()
+    FILA_EMAILS.esvaziar()
+
+    return RESULTADOS.exportar()
+
+
+
+async def _monitorar_grupo(mapeamento_grupo: dict):
+    inicio = perf_counter()
+
+    # Os processos sempre abrem um navegador próprio, vários processos conectados ao mesmo servidor voltariam a disputar o mesmo Chromium
+    async with async_playwright() as pw, GerenciadorNavegador(pw, inicio, usar_servidor=False) as chrome:
+        escalonador = EscalonadorAdaptativo()
+        escalonador.iniciar()
+
+        try:
+            await monitorar_sites(chrome, mapeamento_grupo, escalonador)
+
+        finally:
+            await escalonador.encerrar()
+
+
+
+def executar_sites_em_processos(mapeamento_site_usinas: dict):
+    """ Monitora os grupos de sites em processos paralelos e mescla os resultados de cada um em RESULTADOS.
+
+    Um processo que falhe por completo é registrado e notificado, sem impedir que os resultados dos outros sejam mesclados.
+
+    Args:
+        mapeamento_site_usinas (dict): os sites como chave e a lista de usinas de cada site como valor.
+
+    """
+    grupos = agrupar_sites(mapeamento_site_usinas)
+
+    logger.info(f'Monitorando {len(grupos)} grupos de sites em processos separados: {[list(grupo) for grupo in grupos]}')
+
+    # 'spawn' em todos os sistemas, um fork do processo principal copiaria o estado do Playwright e dos loggers
+    contexto_mp = multiprocessing.get_context('spawn')
+
+    with ProcessPoolExecutor(max_workers=len(grupos), mp_context=contexto_mp) as executor:
+        futuros = {executor.submit(monitorar_grupo, grupo, RELOGIO.agora, DIARIO.caminho): grupo for grupo in grupos}
+
+        for futuro in as_completed(futuros):
+            sites_do_grupo = ', '.join(futuros[futuro])
+
+            try:
+                RESULTADOS.mesclar(futuro.result())
+
+            except Exception as e:
+                logger.critical(f'O processo dos sites {sites_do_grupo} encerrou sem devolver resultados: {e}')
+                enviar_email(config_do_email='erro_no_codigo', erro_capturado=e, onde_ocorreu_erro=f'processo dos sites {sites_do_grupo}')
+
+            else:
+                logger.info(f'Resultados dos sites {sites_do_grupo} recebidos')
@@ -0,0 +1,439 @@
+""" Este módulo contém as esperas por sinais concretos de que a página está pronta, usadas no lugar dos asyncio.sleep com tempo fixo.
+
+Cada espera observa um sinal específico (requisições XHR concluídas, pixels do canvas estáveis entre dois quadros, evento 'finished' do ECharts, elementos de carregamento removidos, troca do slide ativo de um carrossel ou animações CSS encerradas) e tem um teto em segundos.
+Quando o teto é atingido a espera apenas registra o ocorrido e devolve False, mantendo o mesmo comportamento do antigo sleep fixo no pior caso."""
+
+import asyncio
+import logging
+import re
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import Optional, Union
+from playwright.async_api import Locator, Page, expect
+from config import *
+
+
+logger = logging.getLogger('Prontidão')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'prontidao.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+# Compara o conteúdo do canvas a cada quadro e resolve quando dois quadros seguidos forem idênticos
+_SCRIPT_CANVAS_ESTAVEL = """
+async (canvas, tetoMs) => {
+    const quadro = () => new Promise(resolve => requestAnimationFrame(resolve));
+    const limite = performance.now() + tetoMs;
+
+    let anterior = null;
+
+    while (performance.now() < limite) {
+        await quadro();
+        await quadro();
+
+        let atual;
+        try {
+            atual = canvas.toDataURL();
+        } catch (erro) {
+            return true; // canvas contaminado por outra origem, não é possível comparar os pixels
+        }
+
+        if (atual === anterior) {
+            return true;
+        }
+
+        anterior = atual;
+    }
+
+    return false;
+}
+"""
+
+# Resolve no evento 'finished' da instância ECharts do container, ou quando o canvas dela parar de mudar
+_SCRIPT_ECHARTS_FINALIZADO = """
+async (container, tetoMs) => {
+    const echarts = window.echarts;
+    const instancia = echarts && echarts.getInstanceByDom && echarts.getInstanceByDom(container);
+
+    const quadro = () => new Promise(resolve => requestAnimationFrame(resolve));
+    const limite = performance.now() + tetoMs;
+
+    const finalizado = new Promise(resolve => {
+        if (instancia) {
+            instancia.on('finished', () => resolve(true));
+        }
+    });
+
+    const canvasEstavel = (async () => {
+        const canvas = container.tagName === 'CANVAS' ? container : container.querySelector('canvas');
+
+        if (!canvas) {
+            return false;
+        }
+
+        let anterior = null;
+
+        while (performance.now() < limite) {
+            await quadro();
+            await quadro();
+
+            let atual;
+            try {
+                atual = canvas.toDataURL();
+            } catch (erro) {
+                return true;
+            }
+
+            if (atual === anterior) {
+                return true;
+            }
+
+            anterior = atual;
+        }
+
+        return false;
+    })();
+
+    const teto = new Promise(resolve => setTimeout(() => resolve(false), tetoMs));
+
+    return Promise.race([finalizado, canvasEstavel, teto]);
+}
+"""
+
+# Resolve quando nenhum dos seletores de carregamento estiver presente e visível
+_SCRIPT_SEM_CARREGAMENTO = """
+(seletores) => seletores.every(seletor =>
+    Array.from(document.querySelectorAll(seletor)).every(elemento =>
+        elemento.offsetParent === null || getComputedStyle(elemento).visibility === 'hidden'
+    )
+)
+"""
+
+# Resolve quando as animações e transições CSS do elemento e de seus filhos terminarem
+_SCRIPT_ANIMACOES_TERMINADAS = """
+async (elemento, tetoMs) => {
+    const animacoes = elemento.getAnimations ? elemento.getAnimations({subtree: true}) : [];
+    const teto = new Promise(resolve => setTimeout(() => resolve(false), tetoMs));
+
+    return Promise.race([Promise.all(animacoes.map(animacao => animacao.finished)).then(() => true), teto]);
+}
+"""
+
+# Identifica o slide ativo de um carrossel: o índice do item ativo do el-carousel, ou o texto visível quando o carrossel não segue as classes do Element UI
+_SCRIPT_SLIDE_ATIVO = """
+(carrossel) => {
+    const indice = Array.from(carrossel.querySelectorAll('.el-carousel__item')).findIndex(item => item.classList.contains('is-active'));
+    return indice >= 0 ? indice : carrossel.innerText;
+}
+"""
+
+# Resolve quando o slide ativo (mesmo critério de _SCRIPT_SLIDE_ATIVO) for diferente do anterior e as animações do carrossel terminarem
+_SCRIPT_SLIDE_TROCADO = """
+async (carrossel, {anterior, tetoMs}) => {
+    const slideAtivo = () => {
+        const indice = Array.from(carrossel.querySelectorAll('.el-carousel__item')).findIndex(item => item.classList.contains('is-active'));
+        return indice >= 0 ? indice : carrossel.innerText;
+    };
+
+    const quadro = () => new Promise(resolve => requestAnimationFrame(resolve));
+    const limite = performance.now() + tetoMs;
+
+    while (slideAtivo() === anterior) {
+        if (performance.now() >= limite) {
+            return false;
+        }
+
+        await quadro();
+    }
+
+    const animacoes = carrossel.getAnimations ? carrossel.getAnimations({subtree: true}) : [];
+    const teto = new Promise(resolve => setTimeout(() => resolve(false), Math.max(limite - performance.now(), 0)));
+
+    return Promise.race([Promise.all(animacoes.map(animacao => animacao.finished)).then(() => true), teto]);
+}
+"""
+
+
+
+def _registrar_espera(sinal: str, inicio: float, pronto: bool, teto: float):
+    duracao = perf_counter() - inicio
+
+    if pronto:
+        logger.info(f'Sinal "{sinal}" pronto em {duracao:.2f}s')
+
+    else:
+        logger.warning(f'Teto de {teto}s atingido aguardando o sinal "{sinal}", continuando mesmo assim')
+
+
+
+async def aguardar_carregamento_sumir(pagina: Page, site: str, teto: Optional[float] = None) -> bool:
+    """ Aguarda até que os elementos de carregamento (spinners, máscaras e skeletons) do site sejam removidos ou ocultados.
+
+    Args:
+        pagina (Page): a página que está carregando.
+
+        site (str): o nome do site, usado para buscar os seletores de carregamento em SINAIS_PRONTIDAO.
+
+        teto (float): o tempo máximo de espera em segundos. Por padrão usa o teto do site.
+
+    Returns:
+        bool: True caso a página tenha ficado sem elementos de carregamento antes do teto, False caso contrário.
+
+    """
+    sinais = SINAIS_PRONTIDAO[site]
+    teto = teto or sinais['teto']
+
+    inicio = perf_counter()
+
+    try:
+        await pagina.wait_for_function(_SCRIPT_SEM_CARREGAMENTO, arg=sinais['carregamento'], timeout=teto * 1000)
+        pronto = True
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera(f'carregamento {site}', inicio, pronto, teto)
+    return pronto
+
+
+
+async def aguardar_seletor(pagina: Page, seletor: str, teto: float, estado: str = 'visible') -> bool:
+    """ Aguarda o primeiro elemento que corresponda ao seletor chegar ao estado informado.
+
+    Útil para esperar o resultado de uma aba, por exemplo 'tabela com linhas, ou aviso de sem dados', passando os dois seletores separados por vírgula.
+
+    Args:
+        pagina (Page): a página onde o elemento deve aparecer.
+
+        seletor (str): o seletor css do elemento.
+
+        teto (float): o tempo máximo de espera em segundos.
+
+        estado (str): o estado esperado ('visible', 'attached', 'hidden' ou 'detached').
+
+    Returns:
+        bool: True caso o elemento tenha chegado ao estado antes do teto, False caso contrário.
+
+    """
+    inicio = perf_counter()
+
+    try:
+        await pagina.locator(seletor).first.wait_for(state=estado, timeout=teto * 1000)
+        pronto = True
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera(seletor, inicio, pronto, teto)
+    return pronto
+
+
+
+async def aguardar_canvas_estavel(canvas: Locator, teto: float) -> bool:
+    """ Aguarda os pixels do canvas ficarem iguais entre dois quadros seguidos, ou seja, a animação do gráfico terminar.
+
+    Args:
+        canvas (Locator): o locator do elemento canvas.
+
+        teto (float): o tempo máximo de espera em segundos.
+
+    Returns:
+        bool: True caso o canvas tenha estabilizado antes do teto, False caso contrário.
+
+    """
+    inicio = perf_counter()
+
+    try:
+        await canvas.wait_for(state='visible', timeout=teto * 1000)
+        pronto = await canvas.evaluate(_SCRIPT_CANVAS_ESTAVEL, teto * 1000)
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera('canvas estável', inicio, pronto, teto)
+    return pronto
+
+
+
+async def aguardar_grafico_echarts(container: Locator, teto: float) -> bool:
+    """ Aguarda o gráfico ECharts do container terminar de renderizar.
+
+    Usa o evento 'finished' da instância ECharts quando ela está acessível pela página e, em paralelo, a estabilidade dos pixels do canvas, o que acontecer primeiro.
+
+    Args:
+        container (Locator): o elemento que contém o gráfico (ou o próprio canvas).
+
+        teto (float): o tempo máximo de espera em segundos.
+
+    Returns:
+        bool: True caso o gráfico tenha terminado de renderizar antes do teto, False caso contrário.
+
+    """
+    inicio = perf_counter()
+
+    try:
+        await container.wait_for(state='visible', timeout=teto * 1000)
+        pronto = await container.evaluate(_SCRIPT_ECHARTS_FINALIZADO, teto * 1000)
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera('gráfico ECharts', inicio, pronto, teto)
+    return pronto
+
+
+
+async def aguardar_animacoes(elemento: Locator, teto: float) -> bool:
+    """ Aguarda as animações e transições CSS do elemento (e de seus filhos) terminarem, como a troca de slide de um carrossel.
+
+    Args:
+        elemento (Locator): o elemento animado.
+
+        teto (float): o tempo máximo de espera em segundos.
+
+    Returns:
+        bool: True caso as animações tenham terminado antes do teto, False caso contrário.
+
+    """
+    inicio = perf_counter()
+
+    try:
+        pronto = await elemento.evaluate(_SCRIPT_ANIMACOES_TERMINADAS, teto * 1000)
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera('animações', inicio, pronto, teto)
+    return pronto
+
+
+
+async def slide_ativo(carrossel: Locator) -> Union[int, str]:
+    """ Retorna o identificador do slide ativo do carrossel, que deve ser lido antes de avançá-lo e passado para aguardar_slide_mudar. """
+    return await carrossel.evaluate(_SCRIPT_SLIDE_ATIVO)
+
+
+
+async def aguardar_slide_mudar(carrossel: Locator, anterior: Union[int, str], teto: float) -> bool:
+    """ Aguarda o carrossel sair do slide anterior e a transição para o novo slide terminar.
+
+    Diferente de aguardar_animacoes, não depende da transição já ter começado: logo após o clique a lista de animações ainda pode estar vazia.
+
+    Args:
+        carrossel (Locator): o carrossel.
+
+        anterior (int | str): o slide ativo antes do clique (slide_ativo).
+
+        teto (float): o tempo máximo de espera em segundos, somando a troca e a transição.
+
+    Returns:
+        bool: True caso o slide tenha mudado e a transição terminado antes do teto, False caso contrário.
+
+    """
+    inicio = perf_counter()
+
+    try:
+        pronto = await carrossel.evaluate(_SCRIPT_SLIDE_TROCADO, {'anterior': anterior, 'tetoMs': teto * 1000})
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera('troca de slide', inicio, pronto, teto)
+    return pronto
+
+
+
+@asynccontextmanager
+async def aguardando_respostas(pagina: Page, site: str, etapa: str, teto: Optional[float] = None):
+    """ Gerenciador de contexto que, ao sair, aguarda a resposta XHR da etapa disparada dentro do bloco.
+
+    A espera começa antes do bloco para não perder respostas rápidas. O padrão da url de cada etapa fica em SINAIS_PRONTIDAO.
+
+    Exemplo:
+        async with aguardando_respostas(pagina, 'Solis', 'falhas'):
+            await pagina.locator('a').filter(has_text='Alarme').click()
+
+    Args:
+        pagina (Page): a página que fará as requisições.
+
+        site (str): o nome do site.
+
+        etapa (str): a chave do padrão de url em SINAIS_PRONTIDAO[site]['respostas'].
+
+        teto (float): o tempo máximo de espera em segundos. Por padrão usa o teto do site.
+
+    """
+    sinais = SINAIS_PRONTIDAO[site]
+    teto = teto or sinais['teto']
+
+    padrao = sinais['respostas'].get(etapa)
+
+    if not padrao:
+        yield
+        return
+
+    expressao = re.compile(padrao, re.IGNORECASE)
+
+    espera = asyncio.ensure_future(pagina.wait_for_event(
+        'response',
+        predicate=lambda resposta: resposta.request.resource_type in ('xhr', 'fetch') and bool(expressao.search(resposta.url)),
+        timeout=teto * 1000
+    ))
+
+    inicio = perf_counter()
+
+    try:
+        yield
+
+    except BaseException:
+        espera.cancel()
+        raise
+
+    try:
+        resposta = await espera
+        await resposta.finished()
+        pronto = True
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera(f'resposta {site} {etapa}', inicio, pronto, teto)
+
+
+
+async def aguardar_texto_mudar(elemento: Locator, texto_anterior: Optional[str], teto: float) -> bool:
+    """ Aguarda o texto do elemento ficar diferente do texto anterior, sinal de que os dados da nova aba ou período foram carregados.
+
+    Args:
+        elemento (Locator): o elemento cujo texto deve mudar.
+
+        texto_anterior (str): o texto lido antes da ação que altera o elemento. Caso seja None apenas aguarda o elemento ficar visível.
+
+        teto (float): o tempo máximo de espera em segundos.
+
+    Returns:
+        bool: True caso o texto tenha mudado antes do teto, False caso contrário.
+
+    """
+    inicio = perf_counter()
+
+    try:
+        if texto_anterior is None:
+            await elemento.wait_for(state='visible', timeout=teto * 1000)
+
+        else:
+            await expect(elemento).not_to_have_text(texto_anterior, timeout=teto * 1000)
+
+        pronto = True
+
+    except Exception:
+        pronto = False
+
+    _registrar_espera('texto alterado', inicio, pronto, teto)
+    return pronto
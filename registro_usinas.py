@@ -0,0 +1,326 @@
+""" Este módulo contém o registro declarativo das usinas monitoradas e das contas usadas para acessá-las.
+
+O registro fica em um arquivo JSON ou em um banco SQLite (REGISTRO_USINAS['caminho'], o formato é escolhido pela extensão) com, para cada usina: o site, a conta, o perfil de captura, a prioridade e se ela está ativa.
+Cada conta indica o site e os nomes das variáveis de ambiente com o login e a senha, assim as senhas continuam fora do registro.
+
+O registro só é lido na primeira consulta e é relido automaticamente quando o arquivo muda, sem reiniciar o processo. Caso o arquivo ainda não exista ele é criado a partir de REGISTRO_USINAS_PADRAO."""
+
+import json
+import logging
+import os
+import sqlite3
+from dataclasses import asdict, dataclass
+from time import monotonic
+from typing import Optional
+from config import *
+
+
+logger = logging.getLogger('Registro de usinas')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'registro_usinas.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+@dataclass(frozen=True)
+class ContaPortal:
+    nome: str
+    site: str
+    login_env: str = ''
+    senha_env: str = ''
+
+
+
+@dataclass(frozen=True)
+class UsinaRegistrada:
+    usina: str
+    site: str
+    conta: str
+    perfil_captura: str = 'padrao'
+    prioridade: int = 0 # menor valor é monitorado primeiro
+    ativa: bool = True
+
+
+
+class RegistroUsinas:
+    """ Registro das usinas e contas, com índices por site, por conta e por (site, usina). """
+
+    def __init__(self, caminho: Optional[Path] = None, intervalo_verificacao: Optional[float] = None):
+        """
+        Args:
+            caminho (Path): o arquivo do registro, .json ou .sqlite3. Por padrão usa REGISTRO_USINAS['caminho'].
+
+            intervalo_verificacao (float): o intervalo mínimo em segundos entre duas verificações de alteração do arquivo.
+
+        """
+        self.caminho = Path(caminho or REGISTRO_USINAS['caminho'])
+        self.intervalo_verificacao = REGISTRO_USINAS['intervalo_verificacao'] if intervalo_verificacao is None else intervalo_verificacao
+
+        self._carregado = False
+        self._assinatura_arquivo = None
+        self._ultima_verificacao = 0.0
+
+        self._contas: dict[str, ContaPortal] = {}
+        self._por_site: dict[str, list[UsinaRegistrada]] = {}
+        self._por_conta: dict[str, list[UsinaRegistrada]] = {}
+        self._por_chave: dict[tuple[str, str], UsinaRegistrada] = {}
+
+
+    def _garantir_atualizado(self):
+        agora = monotonic()
+
+        if self._carregado and agora - self._ultima_verificacao < self.intervalo_verificacao:
+            return
+
+        self._ultima_verificacao = agora
+
+        if not self.caminho.exists():
+            self._criar_a_partir_do_padrao()
+
+        assinatura = _assinatura(self.caminho)
+
+        if self._carregado and assinatura == self._assinatura_arquivo:
+            return
+
+        try:
+            contas, usinas = _ler_sqlite(self.caminho) if self.caminho.suffix in ('.sqlite3', '.sqlite', '.db') else _ler_json(self.caminho)
+
+        except Exception as e:
+            if not self._carregado:
+                raise
+
+            logger.error(f'Não foi possível reler o registro {self.caminho}, mantendo a versão anterior: {e}')
+            return
+
+        self._indexar(contas, usinas)
+
+        logger.info(f'Registro {"recarregado" if self._carregado else "carregado"}: {len(usinas)} usinas e {len(contas)} contas')
+
+        self._assinatura_arquivo = assinatura
+        self._carregado = True
+
+
+    def _indexar(self, contas: list[ContaPortal], usinas: list[UsinaRegistrada]):
+        self._contas = {conta.nome: conta for conta in contas}
+
+        por_site, por_conta, por_chave = {}, {}, {}
+
+        for usina in sorted(usinas, key=lambda u: u.prioridade): # ordenação estável, mantém a ordem do arquivo entre usinas de mesma prioridade
+            if (usina.site, usina.usina) in por_chave:
+                logger.warning(f'Usina {usina.site} - {usina.usina} registrada mais de uma vez, apenas a primeira será usada')
+                continue
+
+            if usina.conta not in self._contas:
+                logger.warning(f'A usina {usina.site} - {usina.usina} usa a conta {usina.conta}, que não está registrada')
+
+            por_site.setdefault(usina.site, []).append(usina)
+            por_conta.setdefault(usina.conta, []).append(usina)
+            por_chave[(usina.site, usina.usina)] = usina
+
+        self._por_site, self._por_conta, self._por_chave = por_site, por_conta, por_chave
+
+
+    def _criar_a_partir_do_padrao(self):
+        logger.info(f'Registro {self.caminho} não encontrado, criando a partir do registro padrão')
+
+        contas = [ContaPortal(nome, **dados) for nome, dados in REGISTRO_USINAS_PADRAO['contas'].items()]
+        usinas = [UsinaRegistrada(**dados) for dados in REGISTRO_USINAS_PADRAO['usinas']]
+
+        salvar_registro(self.caminho, contas, usinas)
+
+
+    def usinas(self, site: Optional[str] = None, conta: Optional[str] = None, apenas_ativas: bool = True) -> list[UsinaRegistrada]:
+        """ Retorna as usinas do site e/ou da conta, em ordem de prioridade.
+
+        Args:
+            site (str): filtra pelo site.
+
+            conta (str): filtra pela conta.
+
+            apenas_ativas (bool): ignora as usinas desativadas.
+
+        Returns:
+            list[UsinaRegistrada]: as usinas encontradas.
+
+        """
+        self._garantir_atualizado()
+
+        if site is not None and conta is not None:
+            candidatas = [usina for usina in self._por_conta.get(conta, []) if usina.site == site]
+
+        elif site is not None:
+            candidatas = self._por_site.get(site, [])
+
+        elif conta is not None:
+            candidatas = self._por_conta.get(conta, [])
+
+        else:
+            candidatas = sorted(self._por_chave.values(), key=lambda u: u.prioridade)
+
+        return [usina for usina in candidatas if usina.ativa or not apenas_ativas]
+
+
+    def usina(self, site: str, nome_usina: str) -> Optional[UsinaRegistrada]:
+        self._garantir_atualizado()
+        return self._por_chave.get((site, nome_usina))
+
+
+    def conta(self, nome: str) -> Optional[ContaPortal]:
+        self._garantir_atualizado()
+        return self._contas.get(nome)
+
+
+    def mapeamento_site_usinas(self) -> dict:
+        """ Retorna as usinas ativas no formato {site: [usinas]} usado pelas funções de monitoramento, em ordem de prioridade. """
+        self._garantir_atualizado()
+
+        return {
+            site: [usina.usina for usina in usinas if usina.ativa]
+            for site, usinas in self._por_site.items()
+            if any(usina.ativa for usina in usinas)
+        }
+
+
+    def conta_da_usina(self, site: str, nome_usina: str) -> str:
+        usina = self.usina(site, nome_usina)
+
+        return usina.conta if usina else ''
+
+
+    def agrupar_por_conta(self, site: str, nomes_usinas: list) -> dict[str, list]:
+        """ Separa as usinas de um site pela conta de acesso, cada grupo é monitorado com um login próprio. """
+        grupos = {}
+
+        for nome_usina in nomes_usinas:
+            grupos.setdefault(self.conta_da_usina(site, nome_usina), []).append(nome_usina)
+
+        return grupos
+
+
+    def credenciais(self, site: str, nome_usina: str) -> dict:
+        """ Retorna o login e a senha da conta da usina, lidos das variáveis de ambiente indicadas na conta.
+
+        Caso a usina ou a conta não estejam registradas, ou as variáveis de ambiente da conta não estejam definidas, usa o login e a senha do site em config.sites, como antes do registro.
+
+        Args:
+            site (str): o nome do site.
+
+            nome_usina (str): o nome da usina.
+
+        Returns:
+            dict: {'login': ..., 'senha': ...}
+
+        """
+        conta = self.conta(self.conta_da_usina(site, nome_usina))
+        info_site = sites.get(site, {})
+
+        if not conta or not conta.login_env:
+            logger.warning(f'Conta da usina {site} - {nome_usina} não registrada, usando as credenciais do site')
+            return {'login': info_site.get('login'), 'senha': info_site.get('senha')}
+
+        login, senha = os.getenv(conta.login_env), os.getenv(conta.senha_env)
+
+        if not login or not senha:
+            logger.warning(f'Variáveis {conta.login_env}/{conta.senha_env} da conta {conta.nome} não definidas, usando as credenciais do site {site}')
+            return {'login': info_site.get('login'), 'senha': info_site.get('senha')}
+
+        return {'login': login, 'senha': senha}
+
+
+
+def salvar_registro(caminho: Path, contas: list[ContaPortal], usinas: list[UsinaRegistrada]):
+    """ Grava o registro no formato indicado pela extensão do arquivo (.json ou .sqlite3). """
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    if caminho.suffix in ('.sqlite3', '.sqlite', '.db'):
+        with sqlite3.connect(caminho) as conexao:
+            conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS contas (nome TEXT PRIMARY KEY, site TEXT NOT NULL, login_env TEXT, senha_env TEXT);
+
+                CREATE TABLE IF NOT EXISTS usinas (
+                    usina TEXT NOT NULL,
+                    site TEXT NOT NULL,
+                    conta TEXT NOT NULL REFERENCES contas (nome),
+                    perfil_captura TEXT NOT NULL DEFAULT 'padrao',
+                    prioridade INTEGER NOT NULL DEFAULT 0,
+                    ativa INTEGER NOT NULL DEFAULT 1,
+                    PRIMARY KEY (site, usina)
+                );
+
+                CREATE INDEX IF NOT EXISTS usinas_por_conta ON usinas (conta);
+            """)
+
+            conexao.executemany('INSERT OR REPLACE INTO contas VALUES (?, ?, ?, ?)', [(c.nome, c.site, c.login_env, c.senha_env) for c in contas])
+            conexao.executemany(
+                'INSERT OR REPLACE INTO usinas VALUES (?, ?, ?, ?, ?, ?)',
+                [(u.usina, u.site, u.conta, u.perfil_captura, u.prioridade, int(u.ativa)) for u in usinas]
+            )
+
+        return
+
+    conteudo = {
+        'contas': {conta.nome: {chave: valor for chave, valor in asdict(conta).items() if chave != 'nome'} for conta in contas},
+        'usinas': [asdict(usina) for usina in usinas]
+    }
+
+    # Grava em um arquivo temporário e substitui, para que uma releitura nunca encontre o arquivo pela metade
+    caminho_temporario = caminho.with_suffix(caminho.suffix + '.tmp')
+
+    with open(caminho_temporario, 'w', encoding='utf-8') as arquivo_json:
+        json.dump(conteudo, arquivo_json, indent=4, ensure_ascii=False)
+
+    os.replace(caminho_temporario, caminho)
+
+
+
+def _assinatura(caminho: Path) -> tuple:
+    """ Data de modificação e tamanho do arquivo (e do -wal do SQLite, que recebe as escritas antes do arquivo principal). """
+    assinatura = []
+
+    for arquivo in (caminho, caminho.with_name(caminho.name + '-wal')):
+        try:
+            estado = arquivo.stat()
+            assinatura.append((estado.st_mtime_ns, estado.st_size))
+
+        except FileNotFoundError:
+            assinatura.append(None)
+
+    return tuple(assinatura)
+
+
+
+def _ler_json(caminho: Path) -> tuple[list[ContaPortal], list[UsinaRegistrada]]:
+    with open(caminho, 'r', encoding='utf-8') as arquivo_json:
+        conteudo = json.load(arquivo_json)
+
+    contas = [ContaPortal(nome, **dados) for nome, dados in conteudo.get('contas', {}).items()]
+    usinas = [UsinaRegistrada(**dados) for dados in conteudo.get('usinas', [])]
+
+    return contas, usinas
+
+
+
+def _ler_sqlite(caminho: Path) -> tuple[list[ContaPortal], list[UsinaRegistrada]]:
+    conexao = sqlite3.connect(f'file:{caminho}?mode=ro', uri=True)
+
+    try:
+        contas = [ContaPortal(*linha) for linha in conexao.execute('SELECT nome, site, login_env, senha_env FROM contas')]
+        usinas = [
+            UsinaRegistrada(usina, site, conta, perfil_captura, prioridade, bool(ativa))
+            for usina, site, conta, perfil_captura, prioridade, ativa in conexao.execute('SELECT usina, site, conta, perfil_captura, prioridade, ativa FROM usinas')
+        ]
+
+    finally:
+        conexao.close()
+
+    return contas, usinas
+
+
+
+REGISTRO = RegistroUsinas()
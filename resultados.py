@@ -0,0 +1,165 @@
+""" Este módulo contém o registro estruturado dos resultados de um ciclo de monitoramento.
+
+Durante o ciclo as funções de monitoramento registram aqui os status dos inversores, os alertas enviados e o tempo de cada usina e de cada site. Ao final os prints gerados no ciclo são associados a cada usina.
+Quando os sites são monitorados em processos separados cada processo tem o seu registro, que é exportado como dicionário e mesclado no registro do processo principal."""
+
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+from config import *
+
+
+logger = logging.getLogger('Resultados')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'resultados.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+@dataclass
+class ResultadoUsina:
+    usina: str
+    inversores_offline: Optional[int] = None
+    alertas: list[str] = field(default_factory=list)
+    capturas: list[str] = field(default_factory=list)
+    duracao: Optional[float] = None
+    etapas: dict[str, float] = field(default_factory=dict) # duração de cada etapa do adaptador do site
+    prints: dict[str, dict] = field(default_factory=dict) # caminho, momento do print, tamanho, tempo de codificação e se o conteúdo já estava no armazém, para cada print (ver codificacao_prints.py)
+
+
+
+@dataclass
+class ResultadoSite:
+    site: str
+    usinas: dict[str, ResultadoUsina] = field(default_factory=dict)
+    alertas: list[str] = field(default_factory=list) # alertas do site que não pertencem a uma usina, como erros de login
+    duracao: Optional[float] = None
+    processo: int = field(default_factory=os.getpid)
+
+
+
+class RegistroResultados:
+    """ Acumula os resultados do ciclo atual, separados por site e por usina. """
+
+    def __init__(self):
+        self.sites: dict[str, ResultadoSite] = {}
+        self.alertas_gerais: list[str] = []
+
+
+    def limpar(self):
+        self.sites.clear()
+        self.alertas_gerais.clear()
+
+
+    def _site(self, site: str) -> ResultadoSite:
+        return self.sites.setdefault(site, ResultadoSite(site))
+
+
+    def _usina(self, site: str, usina: str) -> ResultadoUsina:
+        return self._site(site).usinas.setdefault(usina, ResultadoUsina(usina))
+
+
+    def registrar_status(self, site: str, usina: str, inversores_offline: int):
+        self._usina(site, usina).inversores_offline = inversores_offline
+
+
+    def registrar_alerta(self, tipo: str, site: Optional[str] = None, usina: Optional[str] = None):
+        if site and usina:
+            self._usina(site, usina).alertas.append(tipo)
+
+        elif site:
+            self._site(site).alertas.append(tipo)
+
+        else:
+            self.alertas_gerais.append(tipo)
+
+
+    def registrar_duracao_usina(self, site: str, usina: str, segundos: float):
+        self._usina(site, usina).duracao = round(segundos, 3)
+
+
+    def registrar_duracao_etapa(self, site: str, usina: str, etapa: str, segundos: float):
+        self._usina(site, usina).etapas[etapa] = round(segundos, 3)
+
+
+    def registrar_print(self, site: str, usina: str, caminho: Path, tamanho: int, segundos_codificacao: float, reaproveitado: bool = False, capturado_em: Optional[float] = None):
+        self._usina(site, usina).prints[caminho.name] = {
+            'caminho': str(caminho), 'capturado_em': capturado_em,
+            'bytes': tamanho, 'codificacao': round(segundos_codificacao, 3), 'reaproveitado': reaproveitado
+        }
+
+
+    def registrar_duracao_site(self, site: str, segundos: float):
+        """ As contas de um site são monitoradas em paralelo, a duração do site é a da conta mais demorada. """
+        resultado = self._site(site)
+        resultado.duracao = round(max(segundos, resultado.duracao or 0), 3)
+
+
+    def registrar_capturas(self, site: str, usinas: list):
+        """ Associa a cada usina do site os prints (inclusive os de falhas) gravados neste ciclo, a partir dos prints registrados por registrar_print.
+
+        A data de modificação dos arquivos não serve para isso: os prints idênticos são hard links para o mesmo conteúdo do armazém (armazem_prints.py), e um print antigo de outra usina dividiria a data de um print novo.
+        """
+        for usina in usinas:
+            resultado = self._usina(site, usina)
+            resultado.capturas = sorted(dados['caminho'] for dados in resultado.prints.values() if dados.get('caminho'))
+
+
+    def exportar(self) -> dict:
+        """ Converte o registro em um dicionário simples, que pode ser enviado entre processos ou salvo em JSON. """
+        return {
+            'sites': {site: asdict(resultado) for site, resultado in self.sites.items()},
+            'alertas_gerais': list(self.alertas_gerais)
+        }
+
+
+    def mesclar(self, exportado: dict):
+        """ Adiciona ao registro os resultados exportados por outro processo. """
+        for site, dados in exportado['sites'].items():
+            usinas = {usina: ResultadoUsina(**dados_usina) for usina, dados_usina in dados['usinas'].items()}
+
+            self.sites[site] = ResultadoSite(**{**dados, 'usinas': usinas})
+
+        self.alertas_gerais.extend(exportado['alertas_gerais'])
+
+
+    def registrar_resultado_usina(self, site: str, dados_usina: dict):
+        """ Adiciona o resultado de uma única usina exportado por outro processo ou máquina, como os resultados das tarefas da fila. """
+        self._site(site).usinas[dados_usina['usina']] = ResultadoUsina(**dados_usina)
+
+
+    def resultado_da_usina(self, site: str, usina: str) -> Optional[dict]:
+        resultado = self.sites.get(site, ResultadoSite(site)).usinas.get(usina)
+
+        return asdict(resultado) if resultado else None
+
+
+    def salvar(self):
+        """ Salva os resultados do ciclo em Logs/resultados <data e hora>.json e registra um resumo no log. """
+        for resultado in self.sites.values():
+            offline = sum(usina.inversores_offline or 0 for usina in resultado.usinas.values())
+            alertas = len(resultado.alertas) + sum(len(usina.alertas) for usina in resultado.usinas.values())
+            duracao = f'{resultado.duracao:.1f}s' if resultado.duracao is not None else '-'
+
+            logger.info(f'Site {resultado.site} (processo {resultado.processo}): {len(resultado.usinas)} usinas, {offline} inversores offline, {alertas} alertas, {duracao}')
+
+        caminho = Path(CAMINHO_PASTA_LOGS, f'resultados {RELOGIO.agora:%Y-%m-%d %H-%M-%S}.json')
+
+        try:
+            with open(caminho, 'w', encoding='utf-8') as arquivo_json:
+                json.dump(self.exportar(), arquivo_json, indent=4, ensure_ascii=False)
+
+        except OSError as e:
+            logger.error(f'Não foi possível salvar os resultados do ciclo: {e}')
+
+
+
+RESULTADOS = RegistroResultados()
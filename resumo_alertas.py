@@ -0,0 +1,193 @@
+""" Este módulo contém o resumo dos alertas, que junta os avisos de inversores offline e do histórico de falhas de uma execução em um único email por destinatário.
+
+enviar_email (monitoramento.py) classifica cada alerta por gravidade (RESUMO_ALERTAS['gravidades']). As gravidades de RESUMO_ALERTAS['imediatas'] continuam indo direto para a fila de emails, as demais são acumuladas aqui.
+O resumo é enviado no fim de cada site (adaptadores/executor.py), quando o alerta mais antigo pendente passa de RESUMO_ALERTAS['intervalo_envio'] segundos e no fim do processo.
+Os alertas são agrupados por site e por gravidade, e os prints anexados viram miniaturas no corpo do email (anexos_email.py), cada print uma única vez mesmo que vários alertas apontem para ele."""
+
+import atexit
+import logging
+import threading
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Optional, Union
+import yagmail
+from config import *
+from anexos_email import recodificar_imagem
+from fila_emails import FILA_EMAILS
+
+
+logger = logging.getLogger('Resumo dos alertas')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'resumo_alertas.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+ORDEM_GRAVIDADES = ('critica', 'alta', 'media', 'baixa')
+
+
+
+@dataclass
+class Alerta:
+    destinatario: str
+    site: Optional[str]
+    usina: Optional[str]
+    gravidade: str
+    assunto: str
+    corpo: str
+    anexos: list = field(default_factory=list)
+    momento: float = field(default_factory=lambda: datetime.now().timestamp())
+
+
+
+def gravidade_do_alerta(config_do_email: str, tipo_da_falha: Optional[str] = None) -> str:
+    """ Retorna a gravidade do alerta em RESUMO_ALERTAS['gravidades'], procurando primeiro por 'config_do_email/tipo_da_falha' e depois só pela configuração. """
+    gravidades = RESUMO_ALERTAS['gravidades']
+
+    return gravidades.get(f'{config_do_email}/{tipo_da_falha}', gravidades.get(config_do_email, 'media'))
+
+
+
+class ResumoAlertas:
+    """ Alertas pendentes da execução, enviados em um email de resumo por destinatário. """
+
+    def __init__(self):
+        self._alertas: list[Alerta] = []
+        self._trava = threading.Lock()
+
+
+    def adicionar(self, destinatario: str, site: Optional[str], usina: Optional[str], gravidade: str, assunto: str, corpo: str, anexos: Union[Path, list, None] = None):
+        """ Acumula o alerta para o próximo resumo. Caso o alerta pendente mais antigo já tenha passado de RESUMO_ALERTAS['intervalo_envio'] segundos todos os pendentes são enviados.
+
+        Args:
+            destinatario (str): o destinatário do email.
+
+            site (str): o site da usina, usado para agrupar os alertas.
+
+            usina (str): o nome da usina.
+
+            gravidade (str): uma das gravidades de ORDEM_GRAVIDADES.
+
+            assunto (str): o assunto que o alerta teria em um email próprio, usado como título do alerta no resumo.
+
+            corpo (str): o texto do alerta.
+
+            anexos (Path | list): os prints do alerta, que viram miniaturas no resumo.
+
+        """
+        if anexos is None:
+            anexos = []
+
+        elif not isinstance(anexos, list):
+            anexos = [anexos]
+
+        with self._trava:
+            self._alertas.append(Alerta(destinatario, site, usina, gravidade, assunto, corpo, [Path(anexo) for anexo in anexos]))
+
+            vencido = datetime.now().timestamp() - self._alertas[0].momento >= RESUMO_ALERTAS['intervalo_envio']
+
+        if vencido:
+            self.enviar()
+
+
+    def enviar(self, site: Optional[str] = None) -> int:
+        """ Envia os alertas pendentes, um email por destinatário.
+
+        Args:
+            site (str): caso informado envia apenas os alertas desse site, os demais continuam pendentes.
+
+        Returns:
+            int: a quantidade de emails de resumo colocados na fila.
+
+        """
+        with self._trava:
+            enviados, pendentes = [], []
+
+            for alerta in self._alertas:
+                (enviados if site is None or alerta.site == site else pendentes).append(alerta)
+
+            self._alertas = pendentes
+
+        if not enviados:
+            return 0
+
+        por_destinatario: dict[str, list[Alerta]] = {}
+
+        for alerta in enviados:
+            por_destinatario.setdefault(alerta.destinatario, []).append(alerta)
+
+        for destinatario, alertas in por_destinatario.items():
+            sites = sorted({alerta.site or 'Geral' for alerta in alertas})
+            assunto = f'Resumo do monitoramento: {len(alertas)} alertas ({", ".join(sites)})'
+
+            # As miniaturas são geradas pela thread da fila de emails, fora do loop de eventos
+            FILA_EMAILS.enfileirar(destinatario, assunto, partial(montar_corpo, alertas))
+
+            logger.info(f'Resumo com {len(alertas)} alertas dos sites {sites} enfileirado para {destinatario}')
+
+        return len(por_destinatario)
+
+
+
+def montar_corpo(alertas: list[Alerta]) -> list:
+    """ Monta o corpo do resumo para o yagmail: os alertas agrupados por site e por gravidade, com as miniaturas dos prints no meio do texto.
+
+    As miniaturas param de ser incluídas quando a soma delas chega a ANEXOS_EMAIL['orcamento_bytes'].
+    """
+    conteudo = [f'<h2>Resumo dos alertas do monitoramento - {RELOGIO.data}</h2>']
+    miniaturas_incluidas = set()
+    bytes_incluidos = 0
+
+    por_site: dict[str, list[Alerta]] = {}
+
+    for alerta in alertas:
+        por_site.setdefault(alerta.site or 'Geral', []).append(alerta)
+
+    for site in sorted(por_site):
+        conteudo.append(f'<h3>{site}</h3>')
+
+        alertas_site = sorted(por_site[site], key=lambda alerta: ORDEM_GRAVIDADES.index(alerta.gravidade) if alerta.gravidade in ORDEM_GRAVIDADES else len(ORDEM_GRAVIDADES))
+
+        gravidade_atual = None
+
+        for alerta in alertas_site:
+            if alerta.gravidade != gravidade_atual:
+                gravidade_atual = alerta.gravidade
+                conteudo.append(f'<h4>Gravidade {gravidade_atual}</h4>')
+
+            corpo = alerta.corpo.replace('\n', '<br>')
+            conteudo.append(f'<p><b>{alerta.assunto}</b> - {alerta.usina or site}<br>{corpo}</p>')
+
+            for anexo in alerta.anexos:
+                miniatura = recodificar_imagem(anexo, RESUMO_ALERTAS['miniatura'], ANEXOS_EMAIL['qualidade'])
+
+                if miniatura is None:
+                    continue
+
+                if miniatura in miniaturas_incluidas:
+                    conteudo.append(f'<p><i>{anexo.name}: mesmo print mostrado acima</i></p>')
+                    continue
+
+                tamanho = miniatura.stat().st_size
+
+                if bytes_incluidos + tamanho > ANEXOS_EMAIL['orcamento_bytes']:
+                    conteudo.append(f'<p><i>{anexo.name}: print omitido pelo limite de tamanho do email</i></p>')
+                    continue
+
+                bytes_incluidos += tamanho
+                miniaturas_incluidas.add(miniatura)
+                conteudo.append(yagmail.inline(str(miniatura)))
+
+    return conteudo
+
+
+
+RESUMO = ResumoAlertas()
+
+# Registrado depois da fila de emails, então o atexit envia o resumo antes de encerrar a fila
+atexit.register(RESUMO.enviar)
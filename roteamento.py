@@ -0,0 +1,233 @@
+""" Este módulo contém a política de roteamento de requisições que bloqueia recursos não essenciais de cada site.
+
+Fora das fases em que há prints (login, leitura das abas de falhas, exportação dos dados mensais) imagens, fontes e mídias são abortadas, e scripts de analytics são abortados sempre.
+Nos sites que abrem a usina na própria página da lista (sem recarregar o documento) as fontes são sempre liberadas: uma fonte abortada no login não é pedida de novo, e os prints ficariam sem os ícones e os caracteres dela.
+Cada site tem uma lista de permissões e uma de bloqueios em ROTEAMENTO. A política também registra quantas requisições e quantos bytes (estimados) foram economizados por execução."""
+
+import json
+import logging
+import re
+import weakref
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+from urllib.parse import urlsplit
+from playwright.async_api import BrowserContext, Page, Response, Route
+from config import *
+
+
+logger = logging.getLogger('Roteamento')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'roteamento.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+CAMINHO_TAMANHOS_RECURSOS = Path(CAMINHO_PASTA_CACHE, 'tamanhos_recursos.json')
+
+# Relaciona cada contexto à sua política, assim as funções de monitoramento encontram a política a partir da página
+_politicas_por_contexto = weakref.WeakKeyDictionary()
+
+
+
+class PoliticaRoteamento:
+    """ Decide, para cada requisição de um contexto, se ela segue ou é abortada.
+
+    As páginas marcadas com fase_visual (e as abas abertas a partir delas enquanto a fase durar) carregam tudo, exceto o que estiver na lista de bloqueios.
+    """
+
+    def __init__(self, site: str, liberar_fontes: bool = False):
+        self.site = site
+        self._tipos_nao_essenciais = [tipo for tipo in ROTEAMENTO['tipos_nao_essenciais'] if not (liberar_fontes and tipo == 'font')]
+
+        config_site = ROTEAMENTO['sites'].get(site, {})
+
+        self._permitir = [re.compile(padrao, re.IGNORECASE) for padrao in config_site.get('permitir', [])]
+        self._bloquear = [re.compile(padrao, re.IGNORECASE) for padrao in ROTEAMENTO['bloquear_sempre'] + config_site.get('bloquear', [])]
+
+        self._paginas_em_fase_visual: Counter = Counter()
+
+        self.bloqueadas_por_tipo: Counter = Counter()
+        self.bytes_economizados = 0
+
+        self._tamanhos = _carregar_tamanhos_recursos()
+
+
+    async def aplicar(self, contexto: BrowserContext):
+        await contexto.route('**/*', self._rotear)
+        contexto.on('response', self._registrar_tamanho)
+        contexto.on('close', lambda _: self.registrar_economia())
+
+        _politicas_por_contexto[contexto] = self
+
+
+    def _em_fase_visual(self, pagina: Optional[Page]) -> bool:
+        return pagina is not None and self._paginas_em_fase_visual[pagina] > 0
+
+
+    async def _rotear(self, route: Route):
+        requisicao = route.request
+        url = requisicao.url
+
+        if any(padrao.search(url) for padrao in self._permitir):
+            await route.continue_()
+            return
+
+        bloquear = any(padrao.search(url) for padrao in self._bloquear)
+
+        if not bloquear and requisicao.resource_type in self._tipos_nao_essenciais:
+            try:
+                pagina = requisicao.frame.page
+                abridora = await pagina.opener()
+
+            except Exception:
+                pagina = abridora = None
+
+            bloquear = not (self._em_fase_visual(pagina) or self._em_fase_visual(abridora))
+
+        if bloquear:
+            self.bloqueadas_por_tipo[requisicao.resource_type] += 1
+            self.bytes_economizados += self._tamanho_estimado(url, requisicao.resource_type)
+
+            await route.abort('blockedbyclient')
+
+        else:
+            await route.continue_()
+
+
+    def _registrar_tamanho(self, resposta: Response):
+        if resposta.request.resource_type not in ROTEAMENTO['tipos_nao_essenciais'] + ['script']:
+            return
+
+        tamanho = resposta.headers.get('content-length')
+
+        if tamanho and tamanho.isdigit():
+            self._tamanhos['urls'][_url_sem_consulta(resposta.url)] = int(tamanho)
+
+            media = self._tamanhos['media_por_tipo'].setdefault(resposta.request.resource_type, [0, 0])
+            media[0] += int(tamanho)
+            media[1] += 1
+
+
+    def _tamanho_estimado(self, url: str, tipo: str) -> int:
+        """ Usa o tamanho já visto para a mesma url, ou a média do tipo de recurso quando a url nunca foi baixada. """
+        tamanho = self._tamanhos['urls'].get(_url_sem_consulta(url))
+
+        if tamanho is not None:
+            return tamanho
+
+        total, quantidade = self._tamanhos['media_por_tipo'].get(tipo, (0, 0))
+
+        return total // quantidade if quantidade else 0
+
+
+    @asynccontextmanager
+    async def fase_visual(self, pagina: Page):
+        self._paginas_em_fase_visual[pagina] += 1
+
+        try:
+            yield
+
+        finally:
+            self._paginas_em_fase_visual[pagina] -= 1
+
+            if self._paginas_em_fase_visual[pagina] <= 0:
+                del self._paginas_em_fase_visual[pagina]
+
+
+    def registrar_economia(self):
+        """ Registra no log e no histórico (Logs/economia_roteamento.jsonl) quantas requisições e bytes foram economizados nesta execução. Chamada quando o contexto é fechado. """
+        total_bloqueadas = sum(self.bloqueadas_por_tipo.values())
+
+        logger.info(
+            f'Site {self.site}: {total_bloqueadas} requisições bloqueadas '
+            f'({dict(self.bloqueadas_por_tipo)}), aproximadamente {self.bytes_economizados / 1024 ** 2:.2f} MB economizados'
+        )
+
+        registro = {
+            'horario': datetime.now().isoformat(timespec='seconds'),
+            'site': self.site,
+            'requisicoes_bloqueadas': total_bloqueadas,
+            'bloqueadas_por_tipo': dict(self.bloqueadas_por_tipo),
+            'bytes_economizados_estimados': self.bytes_economizados
+        }
+
+        try:
+            with open(Path(CAMINHO_PASTA_LOGS, 'economia_roteamento.jsonl'), 'a', encoding='utf-8') as arquivo:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+            CAMINHO_TAMANHOS_RECURSOS.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(CAMINHO_TAMANHOS_RECURSOS, 'w', encoding='utf-8') as arquivo_json:
+                json.dump(self._tamanhos, arquivo_json)
+
+        except OSError as e:
+            logger.error(f'Não foi possível salvar a economia do roteamento do site {self.site}: {e}')
+
+
+
+async def aplicar_politica_roteamento(contexto: BrowserContext, site: str, liberar_fontes: bool = False) -> Optional[PoliticaRoteamento]:
+    """ Aplica a política de roteamento do site no contexto, caso o roteamento esteja ativo na configuração.
+
+    Args:
+        contexto (BrowserContext): o contexto do site.
+
+        site (str): o nome do site.
+
+        liberar_fontes (bool): nunca aborta as fontes, para os sites em que a página da lista (carregada fora da fase de prints) é a mesma página dos prints.
+
+    Returns:
+        PoliticaRoteamento: a política aplicada, ou None caso o roteamento esteja desativado.
+
+    """
+    if not ROTEAMENTO['ativo']:
+        return None
+
+    politica = PoliticaRoteamento(site, liberar_fontes)
+    await politica.aplicar(contexto)
+
+    return politica
+
+
+
+@asynccontextmanager
+async def fase_visual(pagina: Page):
+    """ Marca a página como em fase de prints enquanto o bloco durar, liberando imagens, fontes e mídias para ela e para as abas que ela abrir.
+
+    Caso o contexto da página não tenha política de roteamento não faz nada.
+
+    Exemplo:
+        async with fase_visual(pagina_lista):
+            ...abre a aba da usina e tira os prints...
+
+    """
+    politica = _politicas_por_contexto.get(pagina.context)
+
+    if not politica:
+        yield
+        return
+
+    async with politica.fase_visual(pagina):
+        yield
+
+
+
+def _url_sem_consulta(url: str) -> str:
+    partes = urlsplit(url)
+    return f'{partes.scheme}://{partes.netloc}{partes.path}'
+
+
+
+def _carregar_tamanhos_recursos() -> dict:
+    try:
+        with open(CAMINHO_TAMANHOS_RECURSOS, 'r', encoding='utf-8') as arquivo_json:
+            return json.load(arquivo_json)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'urls': {}, 'media_por_tipo': {}}
@@ -0,0 +1,138 @@
+""" Este módulo contém as funções que guardam e reaproveitam as sessões autenticadas de cada site entre as execuções.
+
+O estado de armazenamento do Playwright (cookies e localStorage) é salvo em disco por site e conta depois de um login bem sucedido.
+Na execução seguinte o contexto é criado a partir desse estado e uma sondagem rápida confirma se a sessão ainda vale, assim o login (e o captcha da Solplanet) só é refeito quando a sessão expirou."""
+
+import hashlib
+import logging
+from playwright.async_api import Browser, BrowserContext, Page
+from config import *
+
+
+logger = logging.getLogger('Sessões')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'sessoes.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+def caminho_estado_sessao(site: str, conta: str) -> Path:
+    """ Monta o caminho do arquivo com o estado da sessão de uma conta de um site.
+
+    O login da conta não aparece no nome do arquivo, apenas um resumo (hash) dele.
+
+    Args:
+        site (str): o nome do site.
+
+        conta (str): o login usado no site.
+
+    Returns:
+        Path: o caminho do json com o estado da sessão.
+
+    """
+    resumo_conta = hashlib.sha256(str(conta).encode('utf-8')).hexdigest()[:12]
+
+    return Path(CAMINHO_PASTA_SESSOES, f'{site} - {resumo_conta}.json')
+
+
+
+async def abrir_contexto_autenticado(browser: Browser, site: str, conta: str, **opcoes_contexto) -> BrowserContext:
+    """ Cria um novo contexto no navegador, restaurando a sessão salva daquela conta caso ela exista.
+
+    Args:
+        browser (Browser): a instância do navegador que será utilizado.
+
+        site (str): o nome do site.
+
+        conta (str): o login usado no site.
+
+        **opcoes_contexto: demais opções repassadas para browser.new_context (viewport, ignore_https_errors...).
+
+    Returns:
+        BrowserContext: o contexto criado, com ou sem a sessão restaurada.
+
+    """
+    caminho_estado = caminho_estado_sessao(site, conta)
+
+    if caminho_estado.exists():
+        try:
+            return await browser.new_context(storage_state=caminho_estado, **opcoes_contexto)
+
+        except Exception as e:
+            logger.warning(f'Não foi possível restaurar a sessão salva do site {site}, ela será descartada: {e}')
+            caminho_estado.unlink(missing_ok=True)
+
+    return await browser.new_context(**opcoes_contexto)
+
+
+
+async def sessao_valida(pagina: Page, site: str) -> bool:
+    """ Verifica com uma sondagem rápida se a sessão restaurada no contexto da página ainda está autenticada.
+
+    A página é levada para a url de sondagem do site (SONDAS_SESSAO). A sessão é considerada válida se o site não redirecionar para o login e, quando houver, o seletor que só aparece para usuários logados ficar visível.
+    Quando a sessão for válida a página termina na tela inicial do site, pronta para o monitoramento.
+
+    Args:
+        pagina (Page): uma página do contexto criado por abrir_contexto_autenticado.
+
+        site (str): o nome do site.
+
+    Returns:
+        bool: True caso a sessão ainda esteja válida, False caso contrário (ou caso não exista sessão salva).
+
+    """
+    sonda = SONDAS_SESSAO.get(site)
+
+    if not sonda or not await pagina.context.cookies():
+        return False
+
+    try:
+        await pagina.goto(sonda['url'])
+        await pagina.wait_for_load_state('networkidle', timeout=sonda['timeout'])
+
+        if 'login' in pagina.url.lower():
+            logger.info(f'Sessão salva do site {site} expirou (redirecionado para o login)')
+            return False
+
+        if sonda['seletor']:
+            await pagina.locator(sonda['seletor']).first.wait_for(state='visible', timeout=sonda['timeout'])
+
+    except Exception:
+        logger.info(f'Sessão salva do site {site} não é mais válida, o login completo será feito')
+        return False
+
+    logger.info(f'Sessão salva do site {site} reaproveitada, login ignorado')
+    return True
+
+
+
+async def salvar_sessao(contexto: BrowserContext, site: str, conta: str):
+    """ Salva em disco o estado da sessão (cookies e localStorage) do contexto logado.
+
+    Args:
+        contexto (BrowserContext): o contexto em que o login acabou de ser feito.
+
+        site (str): o nome do site.
+
+        conta (str): o login usado no site.
+
+    """
+    caminho_estado = caminho_estado_sessao(site, conta)
+
+    try:
+        caminho_estado.parent.mkdir(parents=True, exist_ok=True)
+
+        await contexto.storage_state(path=caminho_estado)
+        caminho_estado.chmod(0o600) # O arquivo contém os cookies de autenticação
+
+    except Exception as e:
+        logger.error(f'Não foi possível salvar a sessão do site {site}: {e}')
+
+    else:
+        logger.info(f'Sessão do site {site} salva')
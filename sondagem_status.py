@@ -0,0 +1,197 @@
+""" Este módulo contém o modo de sondagem dos status, que verifica apenas os inversores e o histórico de falhas das usinas, sem prints, sem dados mensais e sem docx.
+
+Cada usina tem o seu próprio intervalo entre sondagens. Após uma anomalia (inversores offline ou falhas) o intervalo cai para SONDAGEM_STATUS['intervalo_minimo'], e após cada período estável ele é multiplicado por SONDAGEM_STATUS['fator_relaxamento'] até o intervalo máximo.
+Os alertas de cada sondagem ficam retidos (ALERTAS_RETIDOS em monitoramento.py) e só são enviados os que a usina ainda não tinha alertado, assim uma anomalia que persiste não gera o mesmo email a cada sondagem.
+A agenda (intervalo, próxima sondagem, sondagens estáveis e alertas já enviados de cada usina) é salva em SONDAGEM_STATUS['caminho_agenda'] e sobrevive às reinicializações."""
+
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from playwright.async_api import Browser
+from config import *
+from adaptadores import monitorar_sites
+from escalonador import EscalonadorAdaptativo
+from monitoramento import ALERTAS_RETIDOS, enviar_email
+from resultados import RESULTADOS
+from resumo_alertas import RESUMO
+
+
+logger = logging.getLogger('Sondagem dos status')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'sondagem_status.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+@dataclass
+class AgendaUsina:
+    intervalo: float = SONDAGEM_STATUS['intervalo_inicial']
+    proxima: float = 0.0 # timestamp da próxima sondagem, 0 sonda na primeira oportunidade
+    estaveis: int = 0
+    alertado: list = field(default_factory=list) # assinaturas dos alertas já enviados para o estado atual da usina
+
+
+
+def _assinatura(alerta: dict) -> str:
+    """ Identifica o estado alertado: a quantidade de inversores offline ou o tipo da falha do histórico. """
+    if alerta['config_do_email'] == 'inversor_offline':
+        return f'inversor_offline/{alerta["qtd_inversores"]}'
+
+    return f'{alerta["config_do_email"]}/{alerta["tipo_da_falha"]}'
+
+
+
+class AgendaSondagens:
+    """ Intervalos adaptativos das sondagens de cada usina, indexados por 'site/usina'. """
+
+    def __init__(self, caminho: Path = SONDAGEM_STATUS['caminho_agenda']):
+        self.caminho = caminho
+        self.usinas: dict[str, AgendaUsina] = {}
+
+        try:
+            with open(caminho, 'r', encoding='utf-8') as arquivo_json:
+                self.usinas = {chave: AgendaUsina(**dados) for chave, dados in json.load(arquivo_json).items()}
+
+        except FileNotFoundError:
+            pass
+
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f'Não foi possível ler a agenda das sondagens, ela será recriada: {e}')
+
+
+    def _agenda(self, site: str, usina: str) -> AgendaUsina:
+        return self.usinas.setdefault(f'{site}/{usina}', AgendaUsina())
+
+
+    def usinas_pendentes(self, mapeamento_site_usinas: dict) -> dict:
+        """ Filtra o mapeamento, mantendo apenas as usinas cuja próxima sondagem já chegou. """
+        agora = datetime.now().timestamp()
+        pendentes = {}
+
+        for site, usinas in mapeamento_site_usinas.items():
+            usinas_site = [usina for usina in usinas if self._agenda(site, usina).proxima <= agora]
+
+            if usinas_site:
+                pendentes[site] = usinas_site
+
+        return pendentes
+
+
+    def registrar(self, site: str, usina: str, resultado: Optional[dict], retidos: Optional[list] = None) -> list:
+        """ Ajusta o intervalo da usina de acordo com o resultado da sondagem, agenda a próxima e separa os alertas que ainda não foram enviados.
+
+        Args:
+            site (str): o nome do site.
+
+            usina (str): o nome da usina.
+
+            resultado (dict): o resultado da usina em RESULTADOS. Caso a sondagem tenha falhado antes de ler os status (None ou sem inversores_offline) o intervalo e os alertas já enviados são mantidos.
+
+            retidos (list): os alertas retidos da usina nesta sondagem, com os argumentos de enviar_email.
+
+        Returns:
+            list: os alertas retidos cujo estado mudou desde o último alerta da usina, que devem ser enviados.
+
+        """
+        agenda = self._agenda(site, usina)
+        retidos = retidos or []
+
+        novos = [alerta for alerta in retidos if _assinatura(alerta) not in agenda.alertado]
+        estado = sorted({_assinatura(alerta) for alerta in retidos})
+
+        if resultado is None or resultado['inversores_offline'] is None:
+            logger.warning(f'Sondagem da usina {site} - {usina} não leu os status, o intervalo de {agenda.intervalo / 60:.0f} minutos foi mantido')
+
+            # Sem os status não dá para saber se a anomalia anterior acabou, então os alertas já enviados continuam valendo
+            agenda.alertado = sorted(set(agenda.alertado) | set(estado))
+
+        elif resultado['inversores_offline'] or resultado['alertas']:
+            agenda.intervalo = SONDAGEM_STATUS['intervalo_minimo']
+            agenda.estaveis = 0
+            agenda.alertado = estado
+
+            logger.warning(f'Anomalia na usina {site} - {usina}, próximas sondagens a cada {agenda.intervalo / 60:.0f} minutos')
+
+        else:
+            agenda.estaveis += 1
+            agenda.alertado = estado
+
+            if agenda.estaveis >= SONDAGEM_STATUS['sondagens_estaveis']:
+                agenda.intervalo = min(agenda.intervalo * SONDAGEM_STATUS['fator_relaxamento'], SONDAGEM_STATUS['intervalo_maximo'])
+                agenda.estaveis = 0
+
+        agenda.proxima = datetime.now().timestamp() + agenda.intervalo
+
+        if len(novos) < len(retidos):
+            logger.info(f'{len(retidos) - len(novos)} alertas da usina {site} - {usina} já foram enviados para o estado atual e não serão repetidos')
+
+        return novos
+
+
+    def salvar(self):
+        try:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(self.caminho, 'w', encoding='utf-8') as arquivo_json:
+                json.dump({chave: asdict(agenda) for chave, agenda in self.usinas.items()}, arquivo_json, indent=4)
+
+        except OSError as e:
+            logger.error(f'Não foi possível salvar a agenda das sondagens: {e}')
+
+
+
+async def executar_sondagem(chrome: Browser, agenda: AgendaSondagens, mapeamento_site_usinas: dict) -> int:
+    """ Sonda os status das usinas cujo intervalo já passou e agenda as próximas sondagens.
+
+    Args:
+        chrome (Browser): o navegador usado nas sondagens.
+
+        agenda (AgendaSondagens): a agenda das usinas.
+
+        mapeamento_site_usinas (dict): todas as usinas monitoradas, os sites como chave e a lista de usinas de cada site como valor.
+
+    Returns:
+        int: a quantidade de usinas sondadas.
+
+    """
+    pendentes = agenda.usinas_pendentes(mapeamento_site_usinas)
+
+    if not pendentes:
+        return 0
+
+    inicio = perf_counter()
+    RESULTADOS.limpar()
+
+    escalonador = EscalonadorAdaptativo()
+    escalonador.iniciar()
+
+    # As tarefas das usinas copiam o contexto atual, então todas retêm os alertas no mesmo dicionário
+    retidos = {}
+    token = ALERTAS_RETIDOS.set(retidos)
+
+    try:
+        await monitorar_sites(chrome, pendentes, escalonador, modo='status')
+
+    finally:
+        ALERTAS_RETIDOS.reset(token)
+        await escalonador.encerrar()
+
+        for site, usinas in pendentes.items():
+            for usina in usinas:
+                for alerta in agenda.registrar(site, usina, RESULTADOS.resultado_da_usina(site, usina), retidos.get((site, usina))):
+                    enviar_email(site=site, usina=usina, sondagem=True, **alerta)
+
+        agenda.salvar()
+        RESUMO.enviar()
+
+    quantidade = sum(len(usinas) for usinas in pendentes.values())
+    logger.info(f'{quantidade} usinas sondadas em {perf_counter() - inicio:.1f}s: {pendentes}')
+
+    return quantidade
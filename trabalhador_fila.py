@@ -0,0 +1,196 @@
+""" Este módulo contém o trabalhador que executa as tarefas da fila (fila_tarefas.py) e o coordenador que distribui um ciclo de monitoramento pela fila.
+
+O coordenador (python main.py --fila) enfileira uma tarefa por usina, trabalha nas tarefas como qualquer outra máquina e, quando todas terminam, junta os resultados em RESULTADOS.
+As outras máquinas rodam apenas o trabalhador (python main.py --trabalhador) apontando para a mesma fila. Os prints precisam ser gravados em uma pasta compartilhada (CAMINHO_PASTA_PRINTS) para que o coordenador monte os docx."""
+
+import asyncio
+import logging
+import os
+import socket
+from time import perf_counter
+from typing import Optional
+from playwright.async_api import Browser, async_playwright
+from config import *
+from escalonador import EscalonadorAdaptativo
+from fila_tarefas import BackendFila, Tarefa, criar_tarefa
+from adaptadores import monitorar_sites
+from navegador import GerenciadorNavegador
+from registro_usinas import REGISTRO
+from resultados import RESULTADOS
+
+
+logger = logging.getLogger('Trabalhador da fila')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'trabalhador_fila.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+def nome_do_trabalhador() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+
+def enfileirar_ciclo(fila: BackendFila, ciclo: str, mapeamento_site_usinas: dict) -> int:
+    """ Enfileira uma tarefa de monitoramento para cada usina do mapeamento. Tarefas do mesmo ciclo que já existem são ignoradas.
+
+    Args:
+        fila (BackendFila): a fila onde as tarefas serão adicionadas.
+
+        ciclo (str): a identificação do ciclo.
+
+        mapeamento_site_usinas (dict): os sites como chave e a lista de usinas de cada site como valor.
+
+    Returns:
+        int: a quantidade de tarefas adicionadas.
+
+    """
+    tarefas = [
+        criar_tarefa(ciclo, site, REGISTRO.conta_da_usina(site, usina), usina)
+        for site, usinas in mapeamento_site_usinas.items()
+        for usina in usinas
+    ]
+
+    return fila.enfileirar(tarefas)
+
+
+
+async def _renovar_arrendamentos(fila: BackendFila, trabalhador: str, tarefas: list[Tarefa]):
+    """ Renova o arrendamento das tarefas em andamento a cada terço do prazo de visibilidade, enquanto o lote não terminar. """
+    while True:
+        await asyncio.sleep(FILA_TAREFAS['visibilidade'] / 3)
+
+        for tarefa in tarefas:
+            try:
+                if not await asyncio.to_thread(fila.renovar, tarefa.id, trabalhador):
+                    logger.warning(f'O arrendamento da tarefa {tarefa.site} - {tarefa.usina} foi perdido')
+
+            except Exception as e:
+                logger.error(f'Erro ao renovar o arrendamento da tarefa {tarefa.id}: {e}')
+
+
+
+async def executar_lote(chrome: Browser, fila: BackendFila, trabalhador: str, tarefas: list[Tarefa]):
+    """ Monitora as usinas de um lote de tarefas arrendadas e conclui cada tarefa com o resultado da sua usina.
+
+    Args:
+        chrome (Browser): o navegador do trabalhador.
+
+        fila (BackendFila): a fila de onde as tarefas foram arrendadas.
+
+        trabalhador (str): o nome do trabalhador que arrendou as tarefas.
+
+        tarefas (list[Tarefa]): as tarefas arrendadas.
+
+    """
+    mapeamento_lote = {}
+
+    for tarefa in tarefas:
+        mapeamento_lote.setdefault(tarefa.site, []).append(tarefa.usina)
+
+    logger.info(f'Executando lote {mapeamento_lote}')
+
+    renovacao = asyncio.create_task(_renovar_arrendamentos(fila, trabalhador, tarefas))
+    escalonador = EscalonadorAdaptativo()
+    escalonador.iniciar()
+
+    try:
+        await monitorar_sites(chrome, mapeamento_lote, escalonador)
+
+    except Exception as e:
+        logger.error(f'Erro inesperado no lote {mapeamento_lote}, devolvendo as tarefas para a fila: {e}')
+
+        for tarefa in tarefas:
+            await asyncio.to_thread(fila.devolver, tarefa.id, trabalhador)
+
+        return
+
+    finally:
+        renovacao.cancel()
+        await escalonador.encerrar()
+
+    for tarefa in tarefas:
+        resultado = RESULTADOS.resultado_da_usina(tarefa.site, tarefa.usina)
+
+        await asyncio.to_thread(fila.concluir, tarefa.id, trabalhador, resultado)
+
+
+
+async def executar_trabalhador(fila: BackendFila, ciclo: Optional[str] = None, chrome: Optional[Browser] = None):
+    """ Arrenda e executa lotes de tarefas até a fila esvaziar.
+
+    Args:
+        fila (BackendFila): a fila de onde as tarefas são arrendadas.
+
+        ciclo (str): caso informado, o trabalhador só encerra quando todas as tarefas do ciclo estiverem concluídas ou falharem, arrendando de novo as tarefas de trabalhadores que caíram. Caso contrário continua consultando a fila indefinidamente.
+
+        chrome (Browser): o navegador a ser usado. Caso não seja informado o trabalhador abre o seu próprio.
+
+    """
+    if chrome is None:
+        async with async_playwright() as pw, GerenciadorNavegador(pw) as chrome:
+            await executar_trabalhador(fila, ciclo, chrome)
+
+        return
+
+    trabalhador = nome_do_trabalhador()
+    logger.info(f'Trabalhador {trabalhador} iniciado')
+
+    while True:
+        tarefas = await asyncio.to_thread(fila.arrendar, trabalhador, FILA_TAREFAS['lote'])
+
+        if tarefas:
+            if ciclo is None:
+                RELOGIO.atualizar() # Um trabalhador remoto fica aberto por vários ciclos, o relógio marca o início de cada lote
+
+            RESULTADOS.limpar()
+
+            await executar_lote(chrome, fila, trabalhador, tarefas)
+            continue
+
+        if ciclo is not None:
+            resumo = await asyncio.to_thread(fila.resumo, ciclo)
+
+            if not resumo.get('pendente') and not resumo.get('arrendada'):
+                logger.info(f'Todas as tarefas do ciclo {ciclo} terminaram: {resumo}')
+                return
+
+        await asyncio.sleep(FILA_TAREFAS['intervalo_consulta'])
+
+
+
+async def executar_ciclo_pela_fila(chrome: Browser, fila: BackendFila, mapeamento_site_usinas: dict):
+    """ Coordena um ciclo pela fila: enfileira as usinas, trabalha nelas junto com as outras máquinas e junta os resultados de todas as tarefas em RESULTADOS.
+
+    Args:
+        chrome (Browser): o navegador do coordenador.
+
+        fila (BackendFila): a fila compartilhada.
+
+        mapeamento_site_usinas (dict): os sites como chave e a lista de usinas de cada site como valor.
+
+    """
+    ciclo = f'{RELOGIO.agora:%Y-%m-%d %H:%M}'
+    inicio = perf_counter()
+
+    await asyncio.to_thread(enfileirar_ciclo, fila, ciclo, mapeamento_site_usinas)
+    await executar_trabalhador(fila, ciclo, chrome)
+
+    RESULTADOS.limpar()
+
+    for conclusao in await asyncio.to_thread(fila.resultados, ciclo):
+        if conclusao['resultado']:
+            RESULTADOS.registrar_resultado_usina(conclusao['site'], conclusao['resultado'])
+
+    resumo = await asyncio.to_thread(fila.resumo, ciclo)
+
+    if resumo.get('falhou'):
+        logger.error(f'{resumo["falhou"]} tarefas do ciclo {ciclo} falharam após o limite de tentativas')
+
+    logger.info(f'Ciclo {ciclo} pela fila concluído em {perf_counter() - inicio:.1f}s: {resumo}')
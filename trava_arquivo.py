@@ -0,0 +1,86 @@
+""" Este módulo contém a trava dos arquivos de estado compartilhados entre os processos dos sites (processos_sites.py), como o limite dos emails de erro e o índice das usinas.
+
+A trava é um arquivo '.lock' ao lado do estado, travado com exclusividade (fcntl.flock, ou msvcrt.locking no Windows) da leitura até a gravação do estado, assim dois processos não apagam as alterações um do outro.
+A trava é liberada pelo sistema quando o processo termina, mesmo que ele seja interrompido no meio da alteração."""
+
+import logging
+from contextlib import contextmanager
+from config import *
+
+try:
+    import fcntl
+
+except ImportError:
+    # Windows não tem fcntl, a trava usa o msvcrt
+    fcntl = None
+    import msvcrt
+
+
+logger = logging.getLogger('Trava de arquivo')
+
+logger.setLevel(logging.INFO)
+
+file_handler = logging.FileHandler(Path(CAMINHO_PASTA_LOGS, 'trava_arquivo.log'), mode='a', encoding='utf-8')
+
+file_formatter = logging.Formatter(FORMATACAO_LOGGING)
+file_handler.setFormatter(file_formatter)
+
+logger.addHandler(file_handler)
+
+
+
+def _travar(arquivo):
+    """ Trava o arquivo com exclusividade, esperando enquanto outro processo estiver com ele travado. """
+    if fcntl:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+        return
+
+    arquivo.seek(0)
+
+    while True:
+        try:
+            # LK_LOCK desiste após 10 tentativas de 1 segundo
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+            return
+
+        except OSError:
+            continue
+
+
+
+def _destravar(arquivo):
+    if fcntl:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+        return
+
+    arquivo.seek(0)
+    msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+
+@contextmanager
+def arquivo_travado(caminho: Path):
+    """ Trava o arquivo de estado entre os processos enquanto o bloco é executado.
+
+    Args:
+        caminho (Path): o arquivo de estado, a trava é o arquivo de mesmo nome com o sufixo '.lock'.
+
+    """
+    try:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        arquivo_trava = open(caminho.with_suffix(caminho.suffix + '.lock'), 'a+b')
+
+    except OSError as e:
+        # Sem a trava o estado ainda é gravado, apenas sem a proteção entre os processos
+        logger.warning(f'Não foi possível abrir a trava de {caminho.name}, ele será alterado sem ela: {e}')
+        yield
+        return
+
+    with arquivo_trava:
+        _travar(arquivo_trava)
+
+        try:
+            yield
+
+        finally:
+            _destravar(arquivo_trava)